@@ -1,41 +1,41 @@
-from nesim.simulation import NetSimulation
-from nesim.inst_parser import parse_instructions, load_instructions
-from nesim.instructions import (
-    Instruction,
-    CreateHubIns,
-    CreateHostIns,
-    ConnectIns,
-    SendIns,
-    DisconnectIns
-)
-from nesim.devices import (
-    Cable,
-    Device,
-    Hub,
-    Host
-)
-import logging
-from pathlib import Path
-
-logging.basicConfig(
-    format='%(message)s',
-    level=logging.INFO
-)
+"""
+Paquete de python que permite simular una red de computadoras.
+
+Los módulos del paquete se importan la primera vez que se accede a alguno
+de sus elementos (por ejemplo ``nesim.NetSimulation``).
+"""
+
+import importlib
 
 __version__ = '0.3.0'
 
-__all__ = [
-    'parse_instructions',
-    'load_instructions',
-    'NetSimulation',
-    'Instruction',
-    'CreateHubIns',
-    'CreateHostIns',
-    'ConnectIns',
-    'SendIns',
-    'DisconnectIns',
-    'Cable',
-    'Device',
-    'Hub',
-    'Host'
-]
+_LAZY_ATTRS = {
+    'parse_instructions': 'nesim.inst_parser',
+    'load_instructions': 'nesim.inst_parser',
+    'NetSimulation': 'nesim.simulation',
+    'Instruction': 'nesim.instructions',
+    'CreateHubIns': 'nesim.instructions',
+    'CreateHostIns': 'nesim.instructions',
+    'ConnectIns': 'nesim.instructions',
+    'SendIns': 'nesim.instructions',
+    'DisconnectIns': 'nesim.instructions',
+    'Cable': 'nesim.devices',
+    'Device': 'nesim.devices',
+    'Hub': 'nesim.devices',
+    'Host': 'nesim.devices',
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'nesim' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,4 @@
+import sys
+from nesim.cli import main
+
+sys.exit(main())
@@ -0,0 +1,313 @@
+"""
+Pruebas de rendimiento de los componentes de la simulación.
+
+Ejemplo::
+
+    python -m nesim.bench --size 64 --frames 2000
+    python -m nesim.bench --suite ports --bits 20000
+    python -m nesim.bench --suite parallel --hosts 256 --workers 1 2 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import time
+from random import Random
+from typing import Dict, List
+from nesim.devices.cable import Duplex
+from nesim.devices.send_receiver import (
+    FullDuplexSendReceiver,
+    SendReceiver,
+    SharedMediumSendReceiver
+)
+from nesim.devices.error_detection import (
+    ERROR_DETECTION_ALGORITHMS,
+    check_frame_correction,
+    get_error_detection_data
+)
+
+
+def bench_error_detection(algorithms: List[str] = None, size: int = 64,
+                          frames: int = 2000, seed: int = 0) \
+                          -> Dict[str, Dict[str, float]]:
+    """
+    Mide la velocidad de los algoritmos de detección de errores.
+
+    Parameters
+    ----------
+    algorithms : List[str], optional
+        Algoritmos a medir, por defecto todos los registrados.
+    size : int, optional
+        Tamaño de los datos de cada frame en bytes, por defecto 64.
+    frames : int, optional
+        Cantidad de frames, por defecto 2000.
+    seed : int, optional
+        Semilla con que se generan los datos, por defecto 0.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        Por cada algoritmo, los frames por segundo al calcular los datos de
+        detección (``encode``) y al comprobar los frames (``check``), y los
+        megabits de datos por segundo de ambos pasos (``mbps``).
+    """
+
+    if algorithms is None:
+        algorithms = list(ERROR_DETECTION_ALGORITHMS)
+    rand = Random(seed)
+    payloads = [[rand.randint(0, 1) for _ in range(size * 8)]
+                for _ in range(frames)]
+
+    results = {}
+    for algorithm in algorithms:
+        start = time.perf_counter()
+        codes = [get_error_detection_data(data, algorithm)
+                 for data in payloads]
+        encode_time = time.perf_counter() - start
+
+        built = [[0] * 40 + e_size + data + e_data
+                 for data, (e_size, e_data) in zip(payloads, codes)]
+        start = time.perf_counter()
+        for frame in built:
+            check_frame_correction(frame, algorithm)
+        check_time = time.perf_counter() - start
+
+        results[algorithm] = {
+            'encode': frames / encode_time,
+            'check': frames / check_time,
+            'mbps': frames * size * 8 / (encode_time + check_time) / 1e6,
+        }
+    return results
+
+
+PORT_VARIANTS = {
+    'generic': (SendReceiver, False),
+    'full_duplex': (FullDuplexSendReceiver, False),
+    'shared_medium': (SharedMediumSendReceiver, True),
+}
+
+
+def bench_ports(bits: int = 20000, signal_time: int = 10,
+                seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """
+    Mide la velocidad del camino de cada bit a través de dos
+    ``SendReceiver`` conectados por un cable (``update`` y ``receive`` de
+    ambos extremos en cada milisegundo).
+
+    Se comparan el ``SendReceiver`` genérico y sus variantes para cables
+    duplex (``full_duplex``) y para medios compartidos
+    (``shared_medium``).
+
+    Parameters
+    ----------
+    bits : int, optional
+        Cantidad de bits a enviar, por defecto 20000.
+    signal_time : int, optional
+        ``Signal time`` del cable, por defecto 10.
+    seed : int, optional
+        Semilla con que se generan los datos, por defecto 0.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        Por cada variante, los milisegundos simulados por segundo
+        (``ticks``) y los bits recibidos por segundo (``bits``).
+    """
+
+    rand = Random(seed)
+    package = [rand.randint(0, 1) for _ in range(bits)]
+
+    results = {}
+    for name, (cls, simple) in PORT_VARIANTS.items():
+        cable = Duplex(simple=simple)
+        sender = cls(signal_time)
+        receiver = cls(signal_time)
+        sender.connect(cable.head_1)
+        receiver.connect(cable.head_2)
+        received = []
+        receiver.deliver = received.append
+        sender.send([package])
+
+        ticks = 0
+        start = time.perf_counter()
+        while len(received) < bits:
+            sender.update()
+            receiver.update()
+            sender.receive()
+            receiver.receive()
+            ticks += 1
+        elapsed = time.perf_counter() - start
+
+        if received != package:
+            raise RuntimeError(f'{name}: received data does not match')
+        results[name] = {
+            'ticks': ticks / elapsed,
+            'bits': bits / elapsed,
+        }
+    return results
+
+
+def bench_parallel(hosts: int = 64, frames: int = 2, size: int = 64,
+                   workers: List[int] = None, seed: int = 0) \
+                   -> Dict[int, Dict[str, float]]:
+    """
+    Mide la velocidad de una simulación con un switch y muchos hosts al
+    actualizar los dispositivos en varios hilos (ver ``nesim.parallel``).
+
+    Cada host envía ``frames`` frames al host siguiente. La tabla mac del
+    switch se llena antes de comenzar (ver ``NetSimulation.prewarm``) para
+    que los frames no se reenvíen por todos los puertos. Solo hay mejoras
+    de velocidad en versiones de Python sin GIL.
+
+    Se comprueba que con todas las cantidades de hilos se reciben los
+    mismos datos y la simulación termina en el mismo tiempo. No se compara
+    con una simulación sin ``workers``, que usa otros números aleatorios
+    (ver ``nesim.parallel``).
+
+    Parameters
+    ----------
+    hosts : int, optional
+        Cantidad de hosts conectados al switch, por defecto 64.
+    frames : int, optional
+        Cantidad de frames que envía cada host, por defecto 2.
+    size : int, optional
+        Tamaño de los datos de cada frame en bytes, por defecto 64.
+    workers : List[int], optional
+        Cantidades de hilos a medir. Por defecto potencias de 2 hasta la
+        cantidad de procesadores.
+    seed : int, optional
+        Semilla de la simulación, por defecto 0.
+
+    Returns
+    -------
+    Dict[int, Dict[str, float]]
+        Por cada cantidad de hilos, los milisegundos simulados por segundo
+        (``ticks``) y la aceleración respecto a la primera cantidad medida
+        (``speedup``).
+    """
+
+    from nesim.devices.utils import from_number_to_bit_data
+    from nesim.instructions import (
+        ConnectIns,
+        CreateHostIns,
+        CreateSwitchIns,
+        IPIns,
+        MacIns,
+        SendFrameIns
+    )
+    from nesim.ip import IP
+    from nesim.simulation import NetSimulation
+
+    if workers is None:
+        workers = [1]
+        while workers[-1] * 2 <= (os.cpu_count() or 1):
+            workers.append(workers[-1] * 2)
+
+    rand = Random(seed)
+    macs = [from_number_to_bit_data(i + 1, 16) for i in range(hosts)]
+    mask = IP.from_str('255.0.0.0')
+    instructions = [CreateSwitchIns(0, 'S', hosts)]
+    for i in range(hosts):
+        instructions += [CreateHostIns(0, f'H{i}'),
+                         ConnectIns(0, f'H{i}_1', f'S_{i + 1}'),
+                         MacIns(0, f'H{i}', 1, macs[i]),
+                         IPIns(0, f'H{i}', 1,
+                               IP.from_str(f'10.0.{i // 250}.{i % 250 + 1}'),
+                               mask)]
+    for i in range(hosts):
+        for frame in range(frames):
+            data = [rand.randint(0, 1) for _ in range(size * 8)]
+            instructions.append(
+                SendFrameIns(1 + frame, f'H{i}', macs[(i + 1) % hosts], data))
+
+    results = {}
+    expected = None
+    for count in workers:
+        random.seed(seed)
+        sim = NetSimulation(summary_only=True, prewarm=True, workers=count)
+        with contextlib.redirect_stdout(io.StringIO()):
+            sim.load(instructions)
+            start = time.perf_counter()
+            while sim.is_running:
+                sim.update()
+            elapsed = time.perf_counter() - start
+        sim.parallel.shutdown()
+
+        received = [sim.hosts[f'H{i}'].received_data for i in range(hosts)]
+        if expected is None:
+            expected = (sim.time, received)
+        elif (sim.time, received) != expected:
+            raise RuntimeError(f'{count} workers: simulation result does not '
+                               'match')
+        results[count] = {'ticks': sim.time / elapsed}
+
+    first = results[workers[0]]['ticks']
+    for res in results.values():
+        res['speedup'] = res['ticks'] / first
+    return results
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Añade las opciones de las pruebas de rendimiento a un parser."""
+
+    parser.add_argument('--suite', nargs='+', default=['error_detection'],
+                        choices=['error_detection', 'ports', 'parallel'])
+    parser.add_argument('--algorithm', nargs='+', default=None)
+    parser.add_argument('--size', type=int, default=64,
+                        help='payload size in bytes')
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--bits', type=int, default=20000,
+                        help='bits sent in the ports benchmark')
+    parser.add_argument('--hosts', type=int, default=64,
+                        help='hosts in the parallel benchmark')
+    parser.add_argument('--workers', type=int, nargs='+', default=None,
+                        help='thread counts in the parallel benchmark')
+
+
+def run(opts: argparse.Namespace):
+    """Ejecuta las pruebas de rendimiento e imprime los resultados."""
+
+    seed = opts.seed if opts.seed is not None else 0
+    if 'error_detection' in opts.suite:
+        results = bench_error_detection(opts.algorithm, opts.size,
+                                        opts.frames, seed)
+        header = f'| {"Algorithm": ^12} | {"Encode (frames/s)": ^18} ' \
+                 f'| {"Check (frames/s)": ^18} | {"Mbit/s": ^8} |'
+        print(header)
+        print('-' * len(header))
+        for algorithm, res in results.items():
+            print(f'| {algorithm: ^12} | {res["encode"]: >18,.0f} '
+                  f'| {res["check"]: >18,.0f} | {res["mbps"]: >8.3f} |')
+
+    if 'ports' in opts.suite:
+        results = bench_ports(opts.bits, seed=seed)
+        header = f'| {"Port": ^14} | {"Ticks/s": ^12} | {"Bits/s": ^10} |'
+        print(header)
+        print('-' * len(header))
+        for name, res in results.items():
+            print(f'| {name: ^14} | {res["ticks"]: >12,.0f} '
+                  f'| {res["bits"]: >10,.0f} |')
+
+    if 'parallel' in opts.suite:
+        results = bench_parallel(opts.hosts, workers=opts.workers, seed=seed)
+        header = f'| {"Workers": ^8} | {"Ticks/s": ^12} | {"Speedup": ^8} |'
+        print(header)
+        print('-' * len(header))
+        for count, res in results.items():
+            print(f'| {count: >8} | {res["ticks"]: >12,.0f} '
+                  f'| {res["speedup"]: >8.2f} |')
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m nesim.bench',
+        description='Error detection, ports and parallel throughput.')
+    add_arguments(parser)
+    parser.add_argument('--seed', type=int, default=0)
+    run(parser.parse_args(args))
+
+
+if __name__ == '__main__':
+    main()
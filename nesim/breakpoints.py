@@ -0,0 +1,254 @@
+"""
+Puntos de parada de una simulación.
+
+Un punto de parada se conecta a los callbacks de los dispositivos, por lo
+que solo se evalúa cuando ocurre el evento que le interesa (y no en cada
+milisegundo de la simulación). Se usan con ``NetSimulation.run_until``.
+
+Ejemplo::
+
+    sim.load(instructions)
+    event = sim.run_until(FrameReceived('PCB'), Collision('S_3'))
+    print(event)
+"""
+
+import abc
+from typing import Callable, Iterable, List, Tuple
+from nesim.devices.device import Device
+from nesim.devices.host import Host
+from nesim.devices.router import Router
+from nesim.devices.send_receiver import SendReceiver
+
+
+class BreakEvent():
+    """
+    Evento que detuvo la simulación.
+
+    Parameters
+    ----------
+    kind : str
+        Tipo de evento (``'frame_received'``, ``'collision'``,
+        ``'route_miss'`` o ``'queue_above'``).
+    time : int
+        Tiempo de la simulación en que ocurrió.
+    device : str
+        Nombre del dispositivo.
+    port : str
+        Nombre del puerto (``None`` si el evento no es de un puerto).
+    info : dict
+        Datos del evento: el frame y si tenía errores (``frame``,
+        ``error``), el paquete sin ruta (``packet``) o la ocupación de la
+        cola (``depth``).
+    """
+
+    def __init__(self, kind: str, time: int, device: str, port: str,
+                 info: dict):
+        self.kind = kind
+        self.time = time
+        self.device = device
+        self.port = port
+        self.info = info
+
+    def __str__(self) -> str:
+        where = self.port if self.port is not None else self.device
+        return f'[{self.time:>6}] {self.kind} at {where}'
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+Hook = Tuple[list, Callable]
+
+
+class Breakpoint(metaclass=abc.ABCMeta):
+    """
+    Punto de parada asociado a un tipo de evento.
+
+    Parameters
+    ----------
+    target : str, optional
+        Nombre del dispositivo o del puerto donde debe ocurrir el evento.
+        Si no se especifica se consideran todos.
+    condition : Callable[[BreakEvent], bool], optional
+        Función que decide si el evento detiene la simulación. Si no se
+        especifica cualquier evento la detiene.
+
+    Attributes
+    ----------
+    event : BreakEvent
+        Último evento que activó el punto de parada (``None`` si no se ha
+        activado).
+    on_hit : List[Callable[[BreakEvent], None]]
+        Funciones que se ejecutan al activarse el punto de parada.
+    clock : Callable[[], int]
+        Función que devuelve el tiempo actual de la simulación. Si es
+        ``None`` se usa el tiempo del dispositivo.
+    """
+
+    kind = ''
+
+    def __init__(self, target: str = None,
+                 condition: Callable[[BreakEvent], bool] = None):
+        self.target = target
+        self.condition = condition
+        self.event: BreakEvent = None
+        self.on_hit: List[Callable[[BreakEvent], None]] = []
+        self.clock: Callable[[], int] = None
+        self._hooks: List[Hook] = []
+
+    @abc.abstractmethod
+    def hooks(self, device: Device) -> Iterable[Hook]:
+        """
+        Callbacks de un dispositivo que se deben conectar.
+
+        Parameters
+        ----------
+        device : Device
+            Dispositivo.
+
+        Returns
+        -------
+        Iterable[Tuple[list, Callable]]
+            Listas de callbacks del dispositivo y la función a añadir a
+            cada una.
+        """
+
+    def attach(self, device: Device):
+        """
+        Conecta el punto de parada a un dispositivo.
+
+        Parameters
+        ----------
+        device : Device
+            Dispositivo a conectar.
+        """
+
+        if self.target is not None and device.name != self.target and \
+           self.target not in device.port_names:
+            return
+        for callbacks, callback in self.hooks(device):
+            callbacks.append(callback)
+            self._hooks.append((callbacks, callback))
+
+    def detach(self):
+        """Desconecta el punto de parada de todos los dispositivos."""
+
+        for callbacks, callback in self._hooks:
+            callbacks.remove(callback)
+        self._hooks = []
+
+    def _ports(self, device: Device) -> Iterable[Tuple[str, SendReceiver]]:
+        for port_name, send_receiver in zip(device.port_names, device.ports):
+            if not isinstance(send_receiver, SendReceiver):
+                continue
+            if self.target in (None, device.name, port_name):
+                yield port_name, send_receiver
+
+    def fire(self, device: Device, port: str = None, **info):
+        """
+        Crea el evento y, si cumple la condición, activa el punto de
+        parada.
+
+        Parameters
+        ----------
+        device : Device
+            Dispositivo donde ocurrió el evento.
+        port : str, optional
+            Nombre del puerto donde ocurrió el evento.
+        **info
+            Datos del evento.
+        """
+
+        time = self.clock() if self.clock is not None else device.sim_time
+        event = BreakEvent(self.kind, time, device.name, port, info)
+        if self.condition is not None and not self.condition(event):
+            return
+        self.event = event
+        for act in self.on_hit:
+            act(event)
+
+
+class FrameReceived(Breakpoint):
+    """Se activa cuando un host recibe un frame."""
+
+    kind = 'frame_received'
+
+    def hooks(self, device: Device) -> Iterable[Hook]:
+        if isinstance(device, Host):
+            yield device.on_data_received, \
+                lambda frame, error: self.fire(
+                    device, device.port_names[0], frame=frame, error=error)
+
+
+class Collision(Breakpoint):
+    """Se activa cuando se detecta una colisión en un puerto."""
+
+    kind = 'collision'
+
+    def hooks(self, device: Device) -> Iterable[Hook]:
+        for port_name, send_receiver in self._ports(device):
+            yield send_receiver.on_collision, \
+                self._collision(device, port_name)
+
+    def _collision(self, device: Device, port_name: str):
+        return lambda: self.fire(device, port_name)
+
+
+class RouteMiss(Breakpoint):
+    """
+    Se activa cuando un router (o un host) no tiene una ruta para un
+    paquete.
+    """
+
+    kind = 'route_miss'
+
+    def hooks(self, device: Device) -> Iterable[Hook]:
+        if isinstance(device, Router):
+            yield device.on_route_miss, \
+                lambda packet: self.fire(device, packet=packet)
+
+
+class QueueAbove(Breakpoint):
+    """
+    Se activa cuando la cola de envío de un puerto supera una cantidad.
+
+    Parameters
+    ----------
+    threshold : int
+        Ocupación de la cola a partir de la cual (sin incluirla) se activa.
+    target : str, optional
+        Nombre del dispositivo o del puerto.
+    unit : str, optional
+        Unidad de la ocupación: ``'frames'`` (por defecto) o ``'bits'``.
+    condition : Callable[[BreakEvent], bool], optional
+        Condición adicional.
+    """
+
+    kind = 'queue_above'
+
+    def __init__(self, threshold: int, target: str = None,
+                 unit: str = 'frames',
+                 condition: Callable[[BreakEvent], bool] = None):
+        if unit not in ('frames', 'bits'):
+            raise ValueError(f'Unknown queue unit {unit}')
+        super().__init__(target, condition)
+        self.threshold = threshold
+        self.unit = unit
+
+    def hooks(self, device: Device) -> Iterable[Hook]:
+        for port_name, send_receiver in self._ports(device):
+            yield send_receiver.on_enqueue, self._enqueue(device, port_name)
+
+    def _enqueue(self, device: Device, port_name: str):
+        port = device.port_names.index(port_name)
+
+        def _check(*_):
+            # Connecting a cable replaces the SendReceiver of the port
+            send_receiver = device.ports[port]
+            if self.unit == 'frames':
+                depth = len(send_receiver.data)
+            else:
+                depth = send_receiver.queued_bits
+            if depth > self.threshold:
+                self.fire(device, port_name, depth=depth)
+        return _check
@@ -0,0 +1,177 @@
+"""
+Interfaz de línea de comandos de nesim.
+
+Ejemplos::
+
+    nesim run script.txt -o output --seed 42
+    nesim validate script.txt
+    nesim bench --size 64 --frames 2000
+    nesim logs output/S.txt.gz --start 1000 --end 2000
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import List
+
+
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+
+def _setup(opts: argparse.Namespace):
+    logging.basicConfig(format='%(message)s', level=opts.log_level)
+    if opts.seed is not None:
+        import random
+        random.seed(opts.seed)
+
+    import nesim.utils as utils
+    if opts.config is not None:
+        if not Path(opts.config).exists():
+            raise ValueError(f"Invalid config path '{opts.config}'")
+        utils.load_config(opts.config)
+    else:
+        utils.check_config()
+
+
+def _run(opts: argparse.Namespace) -> int:
+    from nesim.inst_parser import load_instructions
+    from nesim.simulation import NetSimulation
+
+    instructions = load_instructions(opts.script)
+    sim = NetSimulation(opts.output, metrics_interval=opts.metrics_interval,
+                        summary_only=opts.summary_only,
+                        results_db=opts.results_db, prewarm=opts.prewarm,
+                        tables_path=opts.tables,
+                        memory_interval=opts.memory_interval,
+                        log_compression=opts.compress_logs,
+                        log_compression_level=opts.compress_level,
+                        trace_flows=opts.trace_flows,
+                        max_time=opts.max_time,
+                        max_wall_time=opts.max_wall_time,
+                        expected_payloads=opts.expected_payloads,
+                        quiescence=opts.quiescence,
+                        workers=opts.workers)
+    sim.start(instructions)
+    if opts.save_tables is not None:
+        sim.save_tables(opts.save_tables)
+    return 0
+
+
+def _validate(opts: argparse.Namespace) -> int:
+    from nesim.inst_parser import load_instructions
+    from nesim.instructions import RepeatIns
+
+    pending = list(load_instructions(opts.script))
+    count = 0
+    while pending:
+        inst = pending.pop()
+        if inst.time < 0:
+            raise ValueError(f'Negative instruction time {inst.time}')
+        if isinstance(inst, RepeatIns):
+            pending.extend(inst.expand())
+        else:
+            count += 1
+    print(f'{opts.script}: {count} instructions OK')
+    return 0
+
+
+def _logs(opts: argparse.Namespace) -> int:
+    import nesim.logfiles as logfiles
+    logfiles.run(opts)
+    return 0
+
+
+def _bench(opts: argparse.Namespace) -> int:
+    import nesim.bench as bench
+    bench.run(opts)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """argparse.ArgumentParser : Parser de la línea de comandos."""
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-c', '--config', default=None,
+                        help='config file (default: ./config.txt if present)')
+    common.add_argument('--seed', type=int, default=None,
+                        help='random seed')
+    common.add_argument('--log-level', default='WARNING', choices=LOG_LEVELS,
+                        type=str.upper)
+
+    parser = argparse.ArgumentParser(
+        prog='nesim', description='Computer network simulator.')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    run = commands.add_parser('run', parents=[common],
+                              help='run a simulation script')
+    run.add_argument('script', nargs='?', default='script.txt')
+    run.add_argument('-o', '--output', default='output',
+                     help='output path (default: output)')
+    run.add_argument('--metrics-interval', type=int, default=None)
+    run.add_argument('--memory-interval', type=int, default=None,
+                     help='write memory usage samples to memory.csv')
+    run.add_argument('--summary-only', action='store_true')
+    run.add_argument('--max-time', type=int, default=None,
+                     help='stop at this simulated time (ms)')
+    run.add_argument('--max-wall-time', type=float, default=None,
+                     help='stop after running for this many seconds')
+    run.add_argument('--expected-payloads', type=int, default=None,
+                     help='stop when the hosts have received this many IP '
+                          'packets')
+    run.add_argument('--quiescence', type=int, default=None,
+                     help='stop after this many signal times without '
+                          'instructions or bits sent')
+    run.add_argument('--workers', type=int, default=None,
+                     help='update the devices in this many threads '
+                          '(faster only on free-threaded Python)')
+    run.add_argument('--trace-flows', action='store_true',
+                     help='write per-hop events to hops.csv and per-flow '
+                          'latency and hop histograms to flows.prom')
+    run.add_argument('--compress-logs', default=None, choices=['gzip', 'xz'],
+                     help='write compressed device logs and data files')
+    run.add_argument('--compress-level', type=int, default=None,
+                     choices=range(10), metavar='0-9')
+    run.add_argument('--results-db', default=None,
+                     help='store the results in this SQLite database')
+    run.add_argument('--prewarm', action='store_true',
+                     help='pre-populate MAC and ARP tables from the topology')
+    run.add_argument('--tables', default=None,
+                     help='load MAC and ARP tables saved with --save-tables')
+    run.add_argument('--save-tables', default=None,
+                     help='save the MAC and ARP tables after the run')
+    run.set_defaults(func=_run)
+
+    validate = commands.add_parser('validate', parents=[common],
+                                   help='check a simulation script')
+    validate.add_argument('script', nargs='?', default='script.txt')
+    validate.set_defaults(func=_validate)
+
+    bench = commands.add_parser('bench', parents=[common],
+                                help='error detection throughput')
+    import nesim.bench
+    nesim.bench.add_arguments(bench)
+    bench.set_defaults(func=_bench)
+
+    logs = commands.add_parser('logs', parents=[common],
+                               help='print the rows of a (compressed) log')
+    import nesim.logfiles
+    nesim.logfiles.add_arguments(logs)
+    logs.set_defaults(func=_logs)
+
+    return parser
+
+
+def main(args: List[str] = None) -> int:
+    opts = build_parser().parse_args(args)
+    try:
+        _setup(opts)
+        return opts.func(opts)
+    except ValueError as exc:
+        print(f'nesim: error: {exc}', file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,21 +1,35 @@
 """
 Contiene todo lo relacionado con dispositivos.
+
+Los módulos de cada dispositivo se importan la primera vez que se accede a
+los mismos.
 """
 
-from nesim.devices.device import Device
-from nesim.devices.host import Host
-from nesim.devices.hub import Hub
-from nesim.devices.switch import Switch
-from nesim.devices.router import Route, Router
-from nesim.devices.cable import Cable, Duplex
-
-__all__ = [
-    'Device',
-    'Host',
-    'Hub',
-    'Switch',
-    'Route',
-    'Router',
-    'Cable',
-    'Duplex'
-]
+import importlib
+
+_LAZY_ATTRS = {
+    'Device': 'nesim.devices.device',
+    'Host': 'nesim.devices.host',
+    'Hub': 'nesim.devices.hub',
+    'Switch': 'nesim.devices.switch',
+    'Route': 'nesim.devices.router',
+    'Router': 'nesim.devices.router',
+    'Cable': 'nesim.devices.cable',
+    'Duplex': 'nesim.devices.cable',
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(
+            f"module 'nesim.devices' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
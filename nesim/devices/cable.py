@@ -1,3 +1,6 @@
+from typing import Tuple
+
+
 class Cable():
     """
     Representa un cable físico.
@@ -6,10 +9,14 @@ class Cable():
     ----------
     value : int
         Valor del bit que se transmite.
+    trace_id : Tuple[str, int]
+        Identificador del frame al que pertenece el bit (solo en el
+        simulador, ver ``nesim.flows``).
     """
 
     def __init__(self):
         self.value = None
+        self.trace_id = None
 
 
 class DuplexCableHead():
@@ -21,22 +28,29 @@ class DuplexCableHead():
         Cable por el cual se reciben los datos.
     send_cable : Cable
         Cable por el cual se envían los datos.
+    signal_time : int, optional
+        Tiempo que debe estar cada bit en transmisión en este cable. Si es
+        ``None`` se usa el ``signal time`` de la simulación.
     """
 
-    def __init__(self, receive_cable, send_cable):
+    def __init__(self, receive_cable, send_cable, signal_time: int = None):
         self.receive_cable: Cable = receive_cable
         self.send_cable: Cable = send_cable
+        self.signal_time = signal_time
 
-    def send(self, bit):
+    def send(self, bit, trace_id: Tuple[str, int] = None):
         """Escribe un bit en el cablde de escritura.
 
         Parameters
         ----------
         bit : int
             Bit a enviar.
+        trace_id : Tuple[str, int], optional
+            Identificador del frame al que pertenece el bit.
         """
 
         self.send_cable.value = bit
+        self.send_cable.trace_id = trace_id
 
     def receive(self):
         """Lee del cable receptor.
@@ -70,13 +84,18 @@ class Duplex():
         Especifíca si el cable es tratado como un cable simple, o sea,
         si el cable de lectura y escritura serán el mismo, por defecto en
         ``False``.
+    signal_time : int, optional
+        Tiempo que debe estar cada bit en transmisión en este cable (la
+        velocidad del enlace). Si es ``None`` se usa el ``signal time`` de
+        la simulación.
     """
 
-    def __init__(self, simple=False):
+    def __init__(self, simple=False, signal_time: int = None):
         cable_1 = Cable()
         cable_2 = Cable() if not simple else cable_1
-        self._head_1 = DuplexCableHead(cable_1, cable_2)
-        self._head_2 = DuplexCableHead(cable_2, cable_1)
+        self.signal_time = signal_time
+        self._head_1 = DuplexCableHead(cable_1, cable_2, signal_time)
+        self._head_2 = DuplexCableHead(cable_2, cable_1, signal_time)
 
     @property
     def head_1(self):
@@ -1,11 +1,16 @@
 import abc
 from pathlib import Path
-from typing import Dict
+from typing import Callable, List
 import logging
+from nesim.logfiles import open_log, write_lines
+from nesim.parallel import emit
 from nesim.devices.send_receiver import SendReceiver
 from nesim.devices.cable import DuplexCableHead
 
 
+_logger = logging.getLogger(__name__)
+
+
 class Device(metaclass=abc.ABCMeta):
     """
     Representa un dispositivo.
@@ -14,8 +19,8 @@ class Device(metaclass=abc.ABCMeta):
     ----------
     name : str
         Nombre del dispositivo.
-    ports : Dict[str, SendReceiver]
-        Puertos del dispositivo.
+    ports : List[SendReceiver]
+        Puertos del dispositivo indexados desde 0.
 
         Cada puerto está asociado a un ``SendReceiver``. Si para un puerto
         dado el cable asociado al ``SendReceiver`` es ``None`` significa
@@ -25,25 +30,53 @@ class Device(metaclass=abc.ABCMeta):
     ----------
     name : str
         Nombre del dispositivo.
-    ports : Dict[str, SendReceiver]
-        Puertos del dispositivo.
+    ports : List[SendReceiver]
+        Puertos del dispositivo indexados desde 0.
 
         Cada puerto está asociado a un ``SendReceiver``. Si para un puerto
         dado el cable asociado al ``SendReceiver`` es ``None`` significa
         que este puerto no tiene ningún cable conectado.
+    port_names : List[str]
+        Nombre de cada puerto (``<name>_<index + 1>``). Los nombres solo se
+        usan para identificar los puertos fuera de la simulación (scripts,
+        logs); internamente los puertos se identifican por su índice.
     logs : List[str]
         Logs del dispositivo.
+    logs_enabled : bool
+        Indica si el dispositivo guarda sus logs. Si es ``False`` no se
+        registran los logs de cada ciclo, no se imprimen los frames
+        enviados y recibidos ni se guarda el archivo de logs.
+    keep_logs : bool
+        Indica si los logs se guardan en memoria (``logs``) para escribirse
+        en el archivo de logs. Si es ``False`` se siguen ejecutando los
+        callbacks ``on_port_log`` pero no se guarda el archivo de logs.
+    log_compression : str
+        Compresión de los archivos de logs: ``None`` (por defecto),
+        ``'gzip'`` o ``'xz'``.
+    log_compression_level : int
+        Nivel de compresión de los archivos de logs (``None`` para usar el
+        nivel por defecto).
     sim_time : int
         Timepo de ejecución de la simulación.
 
         Este valor se actualiza en cada llamado a la función ``update``.
+    on_port_log : List[Callable[[int, List[str], List[str]], None]]
+        Funciones que se ejecutan al registrar los valores de los puertos en
+        los logs. Reciben el tiempo y los valores recibidos y enviados por
+        cada puerto (``'-'`` si el puerto no tiene cable conectado).
     """
 
-    def __init__(self, name: str, ports: Dict[str, SendReceiver]):
+    def __init__(self, name: str, ports: List[SendReceiver]):
         self.name = name
         self.ports = ports
+        self.port_names = [f'{name}_{i + 1}' for i in range(len(ports))]
         self.logs = []
+        self.logs_enabled = True
+        self.keep_logs = True
+        self.log_compression = None
+        self.log_compression_level = None
         self.sim_time = 0
+        self.on_port_log: List[Callable[[int, List[str], List[str]], None]] = []
 
     @abc.abstractproperty
     def is_active(self):
@@ -51,32 +84,28 @@ class Device(metaclass=abc.ABCMeta):
 
     def port_name(self, port: int):
         """
-        Devuelve el nombre de un puerto dado su número.
+        Devuelve el nombre de un puerto dado su índice.
 
         Parameters
         ----------
         port : int
-            Número del puerto.
+            Índice del puerto.
 
-            Este valor debe ser mayor o igual a 1 y menor o igual que la
-            cantidad total de puertos del dispositivo.
+            Este valor debe ser mayor o igual a 0 y menor que la cantidad
+            total de puertos del dispositivo.
         """
-        return f'{self.name}_{port}'
-    
-    
-    def port_number(self, port: str):
+        return self.port_names[port]
+
+    def port_index(self, port_name: str):
         """
-        Devuelve el nombre de un puerto dado su número.
+        Devuelve el índice de un puerto dado su nombre.
 
         Parameters
         ----------
-        port : int
-            Número del puerto.
-
-            Este valor debe ser mayor o igual a 1 y menor o igual que la
-            cantidad total de puertos del dispositivo.
+        port_name : str
+            Nombre del puerto.
         """
-        return int(port.split('_')[-1])
+        return int(port_name.split('_')[-1]) - 1
 
     def reset(self):
         """
@@ -98,7 +127,7 @@ class Device(metaclass=abc.ABCMeta):
         self.sim_time = time
 
     @abc.abstractmethod
-    def connect(self, cable_head: DuplexCableHead, port_name: str):
+    def connect(self, cable_head: DuplexCableHead, port: int):
         """
         Conecta un cable dado a un puerto determinado.
 
@@ -106,21 +135,21 @@ class Device(metaclass=abc.ABCMeta):
         ----------
         cable_head : DuplexCableHead
             Uno de los extremos del cable a conectar.
-        port_name : str
-            Nombre del puerto en el que será conectado el cable.
+        port : int
+            Índice del puerto en el que será conectado el cable.
         """
 
-    def disconnect(self, port_name: str):
+    def disconnect(self, port: int):
         """
         Desconecta un puerto de un dispositivo.
 
         Parameters
         ----------
-        port_name : str
-            Nombre del puerto a desconectar.
+        port : int
+            Índice del puerto a desconectar.
         """
 
-        self.ports[port_name] = None
+        self.ports[port] = None
 
 
     def log(self, time: int, msg: str, info: str = ''):
@@ -140,9 +169,13 @@ class Device(metaclass=abc.ABCMeta):
             Información adicional.
         """
 
+        if not self.logs_enabled:
+            return
+
         log_msg = f'| {time: ^10} | {self.name: ^12} | {msg: ^14} | {info: <30} |'
-        self.logs.append(log_msg)
-        logging.info(log_msg)
+        if self.keep_logs:
+            self.logs.append(log_msg)
+        emit(_logger.info, log_msg)
 
     def save_log(self, path: str = ''):
         """
@@ -154,13 +187,17 @@ class Device(metaclass=abc.ABCMeta):
             Ruta donde se guardarán los logs. (Por defecto en la raíz)
         """
 
+        if not self.logs_enabled or not self.keep_logs:
+            return
+
         output_folder = Path(path)
         output_folder.mkdir(parents=True, exist_ok=True)
         output_path = output_folder / Path(f'{self.name}.txt')
-        with open(str(output_path), 'w+') as file:
+        with open_log(output_path, self.log_compression,
+                      self.log_compression_level) as file:
             header = f'| {"Time (ms)": ^10} | {"Device":^12} | {"Action" :^14} | {"Info": ^30} |'
             file.write(f'{"-" * len(header)}\n')
             file.write(f'{header}\n')
             file.write(f'{"-" * len(header)}\n')
-            file.write('\n'.join(self.logs))
+            write_lines(file, self.logs)
             file.write(f'\n{"-" * len(header)}\n')
@@ -1,8 +1,13 @@
-from typing import List, Tuple
+from typing import Callable, Dict, List, Tuple
 from math import log, ceil
 import operator as op
 from functools import reduce
-from nesim.devices.utils import data_size, extend_to_byte_divisor, from_bit_data_to_number
+from nesim.devices.utils import (
+    data_size,
+    extend_to_byte_divisor,
+    from_bit_data_to_number,
+    from_number_to_bit_data
+)
 
 ##############################################################################
 #                                Check error                                 #
@@ -21,16 +26,6 @@ def _hamming(frame: List[int]) -> Tuple[List[int], bool]:
     _, actual_parity = _get_hamming(data)
     return frame, not all(b1 == b2 for b1, b2 in zip(correct_parity, actual_parity))
 
-def check_frame_correction(frame: List[int],
-                           error_det_algorithm: str) \
-                           -> Tuple[List[int], bool]:
-    if error_det_algorithm == 'simple_hash':
-        return _simple_hash(frame)
-    if error_det_algorithm == 'hamming':
-        return _hamming(frame)
-    else:
-        raise ValueError('Invalid error detection algorithm')
-
 ##############################################################################
 #                      Apply error correction algorithm                      #
 ##############################################################################
@@ -65,9 +60,9 @@ def _get_hamming(data: List[List[int]]) -> Tuple[List[int], List[int]]:
         pos = 2**i
         data[pos] = reduce(op.xor,[
             bit for j, bit in enumerate(data) if bit and f'{j:0255b}'[-(i+1)] == '1'
-        ])
+        ], 0)
         parity.append(data[pos])
-    parity.insert(0, reduce(op.xor,parity))
+    parity.insert(0, reduce(op.xor,parity, 0))
 
     # Removing the parity check bits
     for i in range(needed_bits - 1, -1, -1):
@@ -79,15 +74,166 @@ def _get_hamming(data: List[List[int]]) -> Tuple[List[int], List[int]]:
 
     return data_size(parity), extend_to_byte_divisor(parity)
 
+##############################################################################
+#                                    CRC                                     #
+##############################################################################
+
+def _reflect(value: int, width: int) -> int:
+    return int(f'{value:0{width}b}'[::-1], 2)
+
+
+def _to_bytes(data: List[int]) -> bytes:
+    data = extend_to_byte_divisor(data)
+    if not data:
+        return b''
+    return int(''.join(map(str, data)), 2).to_bytes(len(data) // 8, 'big')
+
+
+class CRC():
+    """
+    CRC calculado byte a byte mediante una tabla precalculada.
+
+    Parameters
+    ----------
+    width : int
+        Tamaño del CRC en bits (múltiplo de 8).
+    poly : int
+        Polinomio generador (sin el bit más significativo).
+    init : int, optional
+        Valor inicial del registro, por defecto 0.
+    reflected : bool, optional
+        Si los bytes de entrada y el resultado se procesan comenzando por el
+        bit menos significativo, por defecto False.
+    xor_out : int, optional
+        Valor con que se hace xor al resultado, por defecto 0.
+    """
+
+    def __init__(self, width: int, poly: int, init: int = 0,
+                 reflected: bool = False, xor_out: int = 0):
+        self.width = width
+        self.poly = poly
+        self.reflected = reflected
+        self.xor_out = xor_out
+        self.mask = (1 << width) - 1
+        self.init = _reflect(init, width) if reflected else init
+        self.table = self._build_table()
+
+    def _build_table(self) -> List[int]:
+        table = []
+        if self.reflected:
+            poly = _reflect(self.poly, self.width)
+            for byte in range(256):
+                crc = byte
+                for _ in range(8):
+                    crc = (crc >> 1) ^ poly if crc & 1 else crc >> 1
+                table.append(crc)
+        else:
+            top_bit = 1 << (self.width - 1)
+            for byte in range(256):
+                crc = byte << (self.width - 8)
+                for _ in range(8):
+                    crc = (crc << 1) ^ self.poly if crc & top_bit else crc << 1
+                table.append(crc & self.mask)
+        return table
+
+    def checksum(self, data: bytes) -> int:
+        """
+        Calcula el CRC de una secuencia de bytes.
+
+        Parameters
+        ----------
+        data : bytes
+            Datos.
+
+        Returns
+        -------
+        int
+            CRC de los datos.
+        """
+
+        table, crc = self.table, self.init
+        if self.reflected:
+            for byte in data:
+                crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+        else:
+            shift, mask = self.width - 8, self.mask
+            for byte in data:
+                crc = table[((crc >> shift) ^ byte) & 0xFF] ^ ((crc << 8) & mask)
+        return crc ^ self.xor_out
+
+    def get_detection_data(self, data: List[int]) \
+            -> Tuple[List[int], List[int]]:
+        crc = self.checksum(_to_bytes(data))
+        return data_size([0] * self.width), \
+               from_number_to_bit_data(crc, self.width)
+
+    def check_frame(self, frame: List[int]) -> Tuple[List[int], bool]:
+        correction_size = from_bit_data_to_number(frame[40:48])
+        data = frame[48:len(frame) - 8*correction_size]
+        received = from_bit_data_to_number(frame[-8*correction_size:])
+        return frame, self.checksum(_to_bytes(data)) != received
+
+
+CRC8 = CRC(8, 0x07)
+CRC16 = CRC(16, 0x1021, init=0xFFFF)
+CRC32 = CRC(32, 0x04C11DB7, init=0xFFFFFFFF, reflected=True,
+            xor_out=0xFFFFFFFF)
+
+##############################################################################
+#                                  Registry                                  #
+##############################################################################
+
+ERROR_DETECTION_ALGORITHMS: Dict[str, Tuple[Callable, Callable]] = {}
+
+
+def register_error_detection(name: str,
+                             get_data: Callable[[List[int]],
+                                                Tuple[List[int], List[int]]],
+                             check: Callable[[List[int]],
+                                             Tuple[List[int], bool]]):
+    """
+    Registra un algoritmo de detección de errores.
+
+    Parameters
+    ----------
+    name : str
+        Nombre del algoritmo (valor de ``error_detection`` en la
+        configuración).
+    get_data : Callable[[List[int]], Tuple[List[int], List[int]]]
+        Función que recibe los datos a enviar y devuelve el tamaño en bytes
+        de los datos de detección (8 bits) y los datos de detección.
+    check : Callable[[List[int]], Tuple[List[int], bool]]
+        Función que recibe un frame completo y devuelve el frame y si se
+        detectó algún error.
+    """
+
+    ERROR_DETECTION_ALGORITHMS[name] = (get_data, check)
+
+
+def _get_algorithm(error_det_algorithm: str) -> Tuple[Callable, Callable]:
+    algorithm = ERROR_DETECTION_ALGORITHMS.get(error_det_algorithm)
+    if algorithm is None:
+        raise ValueError('Invalid error detection algorithm')
+    return algorithm
+
+
 def get_error_detection_data(data: List[int],
                              error_det_algorithm: str) \
                              -> Tuple[List[int], List[int]]:
-    if error_det_algorithm == 'simple_hash':
-        return _get_simple_hash(data)
-    if error_det_algorithm == 'hamming':
-        return _get_hamming(data)
-    else:
-        raise ValueError('Invalid error detection algorithm')
+    return _get_algorithm(error_det_algorithm)[0](data)
+
+
+def check_frame_correction(frame: List[int],
+                           error_det_algorithm: str) \
+                           -> Tuple[List[int], bool]:
+    return _get_algorithm(error_det_algorithm)[1](frame)
+
+
+register_error_detection('simple_hash', _get_simple_hash, _simple_hash)
+register_error_detection('hamming', _get_hamming, _hamming)
+register_error_detection('crc8', CRC8.get_detection_data, CRC8.check_frame)
+register_error_detection('crc16', CRC16.get_detection_data, CRC16.check_frame)
+register_error_detection('crc32', CRC32.get_detection_data, CRC32.check_frame)
 
 
 if __name__ == '__main__':
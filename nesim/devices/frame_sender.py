@@ -1,7 +1,8 @@
 import abc
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from nesim.devices.multiple_port_device import MultiplePortDevice
 from nesim.frame import Frame
+from nesim.parallel import emit
 
 
 class FrameSender(MultiplePortDevice, metaclass=abc.ABCMeta):
@@ -12,13 +13,18 @@ class FrameSender(MultiplePortDevice, metaclass=abc.ABCMeta):
     ----------
     mac_addrs: Dict[int, List[int]]
         Tabla que contiene la dirección MAC de cada puerto.
+    frames_sent : int
+        Cantidad de frames enviados. El identificador de cada frame es el
+        nombre del dispositivo y la cantidad de frames enviados antes.
     """
 
     def __init__(self, name: str, ports_count: int, signal_time: int):
         self.mac_addrs: Dict[int, List[int]] = {}
+        self.frames_sent = 0
         super().__init__(name, ports_count, signal_time)
 
-    def send(self, data: List[int], package_size = None, port: int = 1):
+    def send(self, data: List[int], package_size = None, port: int = 1,
+             trace_id: Tuple[str, int] = None):
         """
         Agrega nuevos datos para ser enviados a la lista de datos.
 
@@ -26,6 +32,8 @@ class FrameSender(MultiplePortDevice, metaclass=abc.ABCMeta):
         ----------
         data : List[List[int]]
             Datos a ser enviados.
+        trace_id : Tuple[str, int], optional
+            Identificador del frame al que pertenecen los datos.
         """
 
         if package_size is None:
@@ -36,8 +44,8 @@ class FrameSender(MultiplePortDevice, metaclass=abc.ABCMeta):
             packages.append(data[:package_size])
             data = data[package_size:]
 
-        send_receiver = self.ports[self.port_name(port)]
-        send_receiver.send(packages)
+        send_receiver = self.ports[port - 1]
+        send_receiver.send(packages, trace_id)
 
     def send_frame(self, mac: List[int], data: List[int], port: int = 1):
         """
@@ -55,5 +63,10 @@ class FrameSender(MultiplePortDevice, metaclass=abc.ABCMeta):
         """
 
         frame = Frame.build(mac, self.mac_addrs[port], data)
-        print(f'[{self.sim_time:>6}] {self.name + " - " + str(port):>18}      send: {frame}')
-        self.send(frame.bit_data, port=port)
+        trace_id = (self.name, self.frames_sent)
+        self.frames_sent += 1
+        for act in self.on_frame:
+            act('sent', port - 1, frame, trace_id)
+        if self.logs_enabled:
+            emit(print, f'[{self.sim_time:>6}] {self.name + " - " + str(port):>18}      send: {frame}')
+        self.send(frame.bit_data, port=port, trace_id=trace_id)
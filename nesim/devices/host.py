@@ -1,6 +1,7 @@
 from nesim.devices.send_receiver import SendReceiver
-from typing import List, Tuple
+from typing import Callable, List, Tuple
 from pathlib import Path
+from nesim.logfiles import open_log
 from nesim.devices.router import Router
 from nesim.frame import Frame
 from nesim.devices.utils import (
@@ -13,11 +14,24 @@ import nesim.utils as utils
 
 
 class Host(Router):
-    """Representa un host."""
+    """
+    Representa un host.
+
+    Attributes
+    ----------
+    on_data_received : List[Callable[[Frame, bool], None]]
+        Funciones que se ejecutan al recibir un frame. Reciben el frame y si
+        se detectó algún error en el mismo.
+    on_payload_received : List[Callable[[IPPacket, str], None]]
+        Funciones que se ejecutan al recibir un paquete IP dirigido al host.
+        Reciben el paquete y el texto con que se registra su contenido.
+    """
 
     def __init__(self, name: str, signal_time: int):
         self.received_data = []
         self.received_payload = []
+        self.on_data_received: List[Callable[[Frame, bool], None]] = []
+        self.on_payload_received: List[Callable[[IPPacket, str], None]] = []
         super().__init__(name, 1, signal_time)
 
     def send_ping_to(self, to_ip: IP) -> None:
@@ -37,20 +51,23 @@ class Host(Router):
         self.enroute(packet)
 
     def save_log(self, path: str = ''):
+        Path(path).mkdir(parents=True, exist_ok=True)
         output_path = Path(path) / Path(f'{self.name}_data.txt')
-        with open(output_path, 'w+') as data_file:
+        with open_log(output_path, self.log_compression,
+                      self.log_compression_level) as data_file:
             data = [' '.join(map(str, d)) + '\n' for d in self.received_data]
             data_file.writelines(data)
 
         output_path = Path(path) / Path(f'{self.name}_payload.txt')
-        with open(output_path, 'w+') as data_file:
+        with open_log(output_path, self.log_compression,
+                      self.log_compression_level) as data_file:
             data = [' '.join(map(str, d)) + '\n' for d in self.received_payload]
             data_file.writelines(data)
 
     @property
     def send_receiver(self) -> SendReceiver:
         """SendReceiver : Send-Recever del host"""
-        return self.ports[self.port_name(0)]
+        return self.ports[0]
 
     @property
     def ip(self) -> IP:
@@ -78,8 +95,7 @@ class Host(Router):
         return check_frame_correction(frame, error_det_algorith)
 
     def on_frame_received(self, frame: Frame, port: str) -> None:
-        frame, error = self.check_errors(frame.bit_data)
-        frame = Frame(frame)
+        _, error = self.check_errors(frame.bit_data)
         data_from = from_bit_data_to_hex(from_number_to_bit_data(frame.from_mac))
         hex_data = from_bit_data_to_hex(frame.data)
         r_data = [self.sim_time, data_from, hex_data]
@@ -88,6 +104,8 @@ class Host(Router):
         else:
             super().on_frame_received(frame, 1)
         self.received_data.append(r_data)
+        for act in self.on_data_received:
+            act(frame, error)
 
     def on_ip_packet_received(self, packet: IPPacket, port: int = 1, frame: Frame = None) -> None:
         if packet.to_ip != self.ip:
@@ -105,3 +123,5 @@ class Host(Router):
             hex_data = from_bit_data_to_hex(packet.payload)
             r_data.append(hex_data)
         self.received_payload.append(r_data)
+        for act in self.on_payload_received:
+            act(packet, r_data[2])
@@ -1,6 +1,7 @@
 from functools import reduce
-from typing import Dict, List
+from typing import List
 from pathlib import Path
+from nesim.logfiles import open_log, write_lines
 from nesim.devices.device import Device
 from nesim.devices.cable import DuplexCableHead
 
@@ -19,11 +20,8 @@ class Hub(Device):
     def __init__(self, name: str, ports_count: int):
         self._updating = False
         self._received, self._sent = [], []
-        self.ports: Dict[str, DuplexCableHead] = {}
+        self.ports: List[DuplexCableHead] = [None] * ports_count
         self.active = 0
-        for i in range(ports_count):
-            self.ports[f'{name}_{i+1}'] = None
-
         super().__init__(name, self.ports)
 
     @property
@@ -32,26 +30,30 @@ class Hub(Device):
 
     def reset(self):
         self._updating = False
-        for _, cable_head in self.ports.items():
+        for cable_head in self.ports:
             if cable_head is not None:
                 cable_head.send(None)
 
     def save_log(self, path=''):
+        if not self.logs_enabled or not self.keep_logs:
+            return
+
         output_folder = Path(path)
         output_folder.mkdir(parents=True, exist_ok=True)
         output_path = output_folder / Path(f'{self.name}.txt')
-        with open(str(output_path), 'w+') as file:
+        with open_log(output_path, self.log_compression,
+                      self.log_compression_level) as file:
             header = f'| {"Time (ms)": ^10} |'
-            for port in self.ports.keys():
+            for port in self.port_names:
                 header += f' {port: ^11} |'
             header_len = len(header)
             header += f'\n| {"": ^10} |'
-            for port in self.ports.keys():
+            for port in self.port_names:
                 header += f' {"Rece . Sent": ^11} |'
             file.write(f'{"-" * header_len}\n')
             file.write(f'{header}\n')
             file.write(f'{"-" * header_len}\n')
-            file.write('\n'.join(self.logs))
+            write_lines(file, self.logs)
             file.write(f'\n{"-" * header_len}\n')
 
     def special_log(self, time: int, received: List[int], sent: List[int]):
@@ -68,6 +70,11 @@ class Hub(Device):
             Lista de bits enviados por cada puerto.
         """
 
+        for act in self.on_port_log:
+            act(time, received, sent)
+        if not self.keep_logs:
+            return
+
         log_msg = f'| {time: ^10} |'
         for bit_re, bit_se in zip(received, sent):
             if bit_re == '-':
@@ -79,18 +86,18 @@ class Hub(Device):
         else:
             self.logs.append(log_msg)
 
-    def get_port_value(self, port_name: str, received: bool = True):
+    def get_port_value(self, port: int, received: bool = True):
         """
         Devuelve el valor del cable conectado a un puerto dado. En caso de no
         tener un cable conectado devuelve ``'-'``.
 
         Parameters
         ----------
-        port_name : str
-            Nombre del puerto.
+        port : int
+            Índice del puerto.
         """
 
-        cable_head = self.ports[port_name]
+        cable_head = self.ports[port]
         bit = None
         if cable_head is not None:
             if received:
@@ -103,32 +110,38 @@ class Hub(Device):
 
     def update(self, time):
         super().update(time)
-        p_data = [c.receive_cable.value for c in self.ports.values() \
-                  if c is not None]
-        p_data_filt = [bit for bit in p_data if bit is not None]
+        cables = [c.receive_cable for c in self.ports
+                  if c is not None and c.receive_cable.value is not None]
+        p_data_filt = [cable.value for cable in cables]
 
         val = None
         if p_data_filt:
             val = reduce(lambda x, y: x|y, p_data_filt)
+        # The bits keep the identifier of their frame unless they collide
+        trace_ids = {cable.trace_id for cable in cables}
+        trace_id = trace_ids.pop() if len(trace_ids) == 1 else None
 
         if not self._updating:
             self.active = max(self.active - 1, 0)
-            self._received = [self.get_port_value(p) for p in self.ports]
+            self._received = [self.get_port_value(p)
+                              for p in range(len(self.ports))]
 
         if val is not None:
-            for _, cable_head in self.ports.items():
+            for cable_head in self.ports:
                 if cable_head is not None:
-                    cable_head.send(val)
+                    cable_head.send(val, trace_id)
 
-        self._sent = [self.get_port_value(p, False) for p in self.ports]
-        self.special_log(time, self._received, self._sent)
+        self._sent = [self.get_port_value(p, False)
+                      for p in range(len(self.ports))]
+        if self.logs_enabled:
+            self.special_log(time, self._received, self._sent)
         self._updating = True
 
-    def connect(self, cable_head: DuplexCableHead, port_name: str):
-        if self.ports[port_name] is not None:
-            raise ValueError(f'Port {port_name} is currently in use.')
+    def connect(self, cable_head: DuplexCableHead, port: int):
+        if self.ports[port] is not None:
+            raise ValueError(f'Port {self.port_name(port)} is currently in use.')
 
-        self.ports[port_name] = cable_head
+        self.ports[port] = cable_head
 
-    def disconnect(self, port_name: str):
+    def disconnect(self, port: int):
         pass
@@ -1,6 +1,6 @@
 import abc
 from nesim.frame import Frame
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 from nesim.devices.utils import from_number_to_bit_data, from_str_to_bin, from_str_to_bit_data
 from nesim.ip import IP, IPPacket
 from nesim.devices.frame_sender import FrameSender
@@ -16,19 +16,23 @@ class IPPacketSender(FrameSender, metaclass=abc.ABCMeta):
         Tabla que contiene la dirección IP de cada puerto.
     masks: Dict[int, IP]
         Tabla que contiene la máscara del IP de cada puerto.
-    ip_table: Dict[int, List[int]]
+    ip_table: Dict[IP, List[int]]
         Tabla que contiene la dirección MAC de los dispositivos según
         la dirección IP.
-    waiting_for_arpq: Dict[int, List[List[int]]]
+    waiting_for_arpq: Dict[IP, List[List[int]]]
         Tabla que contiene paquetes que esán en espera de una respuesta del
         protocolo ARPQ para ser enviados.
+    on_arp_miss: List[Callable[[IP], None]]
+        Funciones que se ejecutan cuando un paquete debe esperar por una
+        respuesta ARPQ. Reciben el IP buscado.
     """
 
     def __init__(self, name: str, ports_count: int, signal_time: int):        
         self.ips: Dict[int, IP] = {}
         self.masks: Dict[int, IP] = {}
-        self.ip_table: Dict[str, List[int]] = {}
-        self.waiting_for_arpq: Dict[str, List[List[int]]] = {}
+        self.ip_table: Dict[IP, List[int]] = {}
+        self.waiting_for_arpq: Dict[IP, List[List[int]]] = {}
+        self.on_arp_miss: List[Callable[[IP], None]] = []
         super().__init__(name, ports_count, signal_time)
 
     def make_arpq(self, ip: IP, port: int = 1):
@@ -80,14 +84,14 @@ class IPPacketSender(FrameSender, metaclass=abc.ABCMeta):
 
         if ip_dest is None:
             ip_dest = packet.to_ip
-        ip_dest_str = str(ip_dest)
-        if ip_dest_str not in self.ip_table:
-            if ip_dest_str not in self.waiting_for_arpq:
-                self.waiting_for_arpq[ip_dest_str] = []
-            self.waiting_for_arpq[ip_dest_str].append(packet.bit_data)
+        mac = self.ip_table.get(ip_dest)
+        if mac is None:
+            self.waiting_for_arpq.setdefault(ip_dest, []).append(packet.bit_data)
+            for act in self.on_arp_miss:
+                act(ip_dest)
             self.make_arpq(ip_dest, port)
         else:
-            self.send_frame(self.ip_table[ip_dest_str], packet.bit_data, port)
+            self.send_frame(mac, packet.bit_data, port)
 
     def send_by_ip(self, ip_dest: IP, data: List[int], port: int = 1) -> None:
         """
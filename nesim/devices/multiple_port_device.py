@@ -1,8 +1,10 @@
 import abc
+from functools import partial
 from nesim.frame import Frame
-from typing import Dict, List
+from typing import Callable, Dict, List, Tuple
 from pathlib import Path
-from nesim.devices.send_receiver import SendReceiver
+from nesim.logfiles import open_log, write_lines
+from nesim.devices.send_receiver import SendReceiver, for_cable
 from nesim.devices.cable import DuplexCableHead
 from nesim.devices.device import Device
 
@@ -18,39 +20,55 @@ class MultiplePortDevice(Device, metaclass=abc.ABCMeta):
         Cantidad de puertos
     signal_time : int
         ``Signal time`` de la simulación
+
+    Attributes
+    ----------
+    on_frame : List[Callable[[str, int, Frame, Tuple[str, int]], None]]
+        Funciones que se ejecutan al enviar (``'sent'``) o recibir
+        (``'received'``) un frame. Reciben el evento, el índice del puerto,
+        el frame y su identificador (ver ``nesim.flows``).
+    ports_trace_id : List[Tuple[str, int]]
+        Identificador del frame que se recibe por cada puerto (``None`` si
+        los bits del buffer pertenecen a más de un frame, por ejemplo luego
+        de una colisión).
     """
 
     def __init__(self, name: str, ports_count: int, signal_time: int):
         self.signa_time = signal_time
         self._updating = False
-        ports = {}
-        for i in range(ports_count):
-            ports[f'{name}_{i+1}'] = self.create_send_receiver(i)
+        ports = [self.create_send_receiver(i) for i in range(ports_count)]
         self.ports_buffer = [[] for _ in range(ports_count)]
-        self.mac_table: Dict[int, str] = {}
+        self.ports_trace_id: List[Tuple[str, int]] = [None] * ports_count
+        self.mac_table: Dict[int, int] = {}
+        self.on_frame: List[Callable[[str, int, Frame, Tuple[str, int]],
+                                     None]] = []
         super().__init__(name, ports)
 
     @property
     def is_active(self):
         """bool : Estado del switch"""
-        return any([sr.is_active for sr in self.ports.values()])
+        return any([sr.is_active for sr in self.ports])
 
     def save_log(self, path=''):
+        if not self.logs_enabled or not self.keep_logs:
+            return
+
         output_folder = Path(path)
         output_folder.mkdir(parents=True, exist_ok=True)
         output_path = output_folder / Path(f'{self.name}.txt')
-        with open(str(output_path), 'w+') as file:
+        with open_log(output_path, self.log_compression,
+                      self.log_compression_level) as file:
             header = f'| {"Time (ms)": ^10} |'
-            for port in self.ports.keys():
+            for port in self.port_names:
                 header += f' {port: ^11} |'
             header_len = len(header)
             header += f'\n| {"": ^10} |'
-            for port in self.ports.keys():
+            for port in self.port_names:
                 header += f' {"Rece . Sent": ^11} |'
             file.write(f'{"-" * header_len}\n')
             file.write(f'{header}\n')
             file.write(f'{"-" * header_len}\n')
-            file.write('\n'.join(self.logs))
+            write_lines(file, self.logs)
             file.write(f'\n{"-" * header_len}\n')
 
     def special_log(self, time: int, received: List[int], sent: List[int]):
@@ -67,6 +85,11 @@ class MultiplePortDevice(Device, metaclass=abc.ABCMeta):
             Lista de bits enviados por cada puerto.
         """
 
+        for act in self.on_port_log:
+            act(time, received, sent)
+        if not self.keep_logs:
+            return
+
         log_msg = f'| {time: ^10} |'
         for bit_re, bit_se in zip(received, sent):
             if bit_re == '-'  and bit_se == '-':
@@ -75,26 +98,29 @@ class MultiplePortDevice(Device, metaclass=abc.ABCMeta):
                 log_msg += f' {bit_re :>4} . {bit_se: <4} |'
         self.logs.append(log_msg)
 
-    def broadcast(self, from_port, data):
+    def broadcast(self, from_port: int, data,
+                  trace_id: Tuple[str, int] = None):
         """Envia un frame por todos los puertos.
 
         Parameters
         ----------
-        from_port : str
-            Puerto del cual se transmite la información.
+        from_port : int
+            Índice del puerto del cual se transmite la información.
         data : List[List[int]]
             Frame a ser enviado.
+        trace_id : Tuple[str, int], optional
+            Identificador del frame.
         """
 
-        for port, send_receiver in self.ports.items():
+        for port, send_receiver in enumerate(self.ports):
             if port != from_port and send_receiver.cable_head is not None:
-                send_receiver.send(data)
+                send_receiver.send(data, trace_id)
 
     def reset(self):
         pass
 
     def update(self, time: int)-> None:
-        for send_receiver in self.ports.values():
+        for send_receiver in self.ports:
             send_receiver.update()
         super().update(time)
 
@@ -104,12 +130,15 @@ class MultiplePortDevice(Device, metaclass=abc.ABCMeta):
         esté llegnado. (Leer del cable)
         """
 
-        for send_receiver in self.ports.values():
+        for send_receiver in self.ports:
             if send_receiver.cable_head is not None:
                 send_receiver.receive()
 
-        received = [self.get_port_value(p) for p in self.ports]
-        sent = [self.get_port_value(p, False) for p in self.ports]
+        if not self.logs_enabled:
+            return
+
+        received = [self.get_port_value(p) for p in range(len(self.ports))]
+        sent = [self.get_port_value(p, False) for p in range(len(self.ports))]
         self.special_log(self.sim_time, received, sent)
 
     @abc.abstractmethod
@@ -125,13 +154,13 @@ class MultiplePortDevice(Device, metaclass=abc.ABCMeta):
             Puerto por el cual llegó el frame.
         """
 
-    def handle_buffer_data(self, port: str) -> None:
+    def handle_buffer_data(self, port: int) -> None:
         """Se encarga de procesar los datos en el buffer de un puerto.
 
         Parameters
         ----------
-        port : str
-            Nombre del puerto
+        port : int
+            Índice del puerto
         """
         data = self.ports_buffer[port]
 
@@ -139,22 +168,24 @@ class MultiplePortDevice(Device, metaclass=abc.ABCMeta):
         if not frame.is_valid:
             return
 
+        for act in self.on_frame:
+            act('received', port, frame, self.ports_trace_id[port])
         self.on_frame_received(frame, port + 1)
         self.ports_buffer[port] = []
 
 
-    def get_port_value(self, port_name: str, received: bool = True):
+    def get_port_value(self, port: int, received: bool = True):
         """
         Devuelve el valor del cable conectado a un puerto dado. En caso de no
         tener un cable conectado devuelve ``'-'``.
 
         Parameters
         ----------
-        port_name : str
-            Nombre del puerto.
+        port : int
+            Índice del puerto.
         """
 
-        send_receiver = self.ports[port_name]
+        send_receiver = self.ports[port]
         bit = None
         if send_receiver.cable_head is not None:
             if received:
@@ -163,27 +194,33 @@ class MultiplePortDevice(Device, metaclass=abc.ABCMeta):
                 bit = send_receiver.cable_head.send_value
         return str(bit) if bit is not None else '-'
 
-    def receive_on_port(self, port: str, bit: int):
+    def receive_on_port(self, port: int, bit: int):
         """Guarda el bit recibido en un puerto y procesa los datos del mismo.
 
         Parameters
         ----------
-        port : str
-            Nombre del puerto.
+        port : int
+            Índice del puerto.
         bit : int
             Bit recibido
         """
 
-        self.ports_buffer[port].append(bit)
+        buffer = self.ports_buffer[port]
+        trace_id = self.ports[port].received_trace_id
+        if not buffer:
+            self.ports_trace_id[port] = trace_id
+        elif trace_id != self.ports_trace_id[port]:
+            self.ports_trace_id[port] = None
+        buffer.append(bit)
         self.handle_buffer_data(port)
 
-    def create_send_receiver(self, port: str):
+    def create_send_receiver(self, port: int):
         """Crea un ``SendReceiver``.
 
         Parameters
         ----------
-        port : str
-            Puerto al que será asignado el ``SendReceiver``.
+        port : int
+            Índice del puerto al que será asignado el ``SendReceiver``.
 
         Returns
         -------
@@ -192,18 +229,17 @@ class MultiplePortDevice(Device, metaclass=abc.ABCMeta):
         """
 
         send_receiver = SendReceiver(self.signa_time, None)
-        send_receiver.on_receive.append(
-            lambda bit : self.receive_on_port(port, bit)
-        )
+        send_receiver.deliver = partial(self.receive_on_port, port)
         return send_receiver
 
-    def connect(self, cable_head: DuplexCableHead, port_name: str):
-        send_receiver = self.ports[port_name]
+    def connect(self, cable_head: DuplexCableHead, port: int):
+        send_receiver = self.ports[port]
         if send_receiver.cable_head is not None:
-            raise ValueError(f'Port {port_name} is currently in use.')
+            raise ValueError(f'Port {self.port_name(port)} is currently in use.')
 
-        send_receiver.cable_head = cable_head
+        self.ports[port] = for_cable(send_receiver, cable_head)
 
-    def disconnect(self, port_name: str):
-        self.ports_buffer[list(self.ports.keys()).index(port_name)] = []
-        self.ports[port_name].disconnect()
+    def disconnect(self, port: int):
+        self.ports_buffer[port] = []
+        self.ports[port].disconnect()
+        self.ports[port] = for_cable(self.ports[port])
@@ -1,9 +1,10 @@
 from nesim.devices.ip_packet_sender import IPPacketSender
-from nesim.devices.utils import from_bit_data_to_number, from_number_to_bit_data, from_str_to_bin
-from typing import List, Union
+from nesim.devices.utils import from_bit_data_to_number, from_number_to_bit_data
+from typing import Callable, List, Union
 from nesim.devices.multiple_port_device import MultiplePortDevice
 from nesim.frame import Frame
-from nesim.ip import IP, IPPacket
+from nesim.ip import IP, IPNetwork, IPPacket
+from nesim.parallel import emit
 
 
 class Route():
@@ -14,19 +15,29 @@ class Route():
         self.mask = mask
         self.gateway = gateway
         self.interface = interface
+        self._mask_value = mask.raw_value
+        self._destination_value = destination_ip.raw_value
+
+    @property
+    def network(self) -> IPNetwork:
+        """IPNetwork : Red de destino de la ruta."""
+        return IPNetwork(self.destination_ip, self.mask)
 
     def enroute(self, ip: IP) -> bool:
-        masked_ip = ip.raw_value & self.mask.raw_value
-        if masked_ip == self.destination_ip.raw_value:
-            return True
-        return False
+        return ip.raw_value & self._mask_value == self._destination_value
 
     def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Route):
+            return NotImplemented
         return self.destination_ip == other.destination_ip and \
                self.mask == other.mask and \
                self.gateway == other.gateway and \
                self.interface == other.interface
 
+    def __hash__(self) -> int:
+        return hash((self.destination_ip, self.mask, self.gateway,
+                     self.interface))
+
     def __str__(self) -> str:
         return f'{self.destination_ip} {self.mask} {self.gateway} {self.interface}'
 
@@ -55,6 +66,19 @@ class RouteTable():
         self.routes.append(route)
         self.routes.sort(key=lambda x: x.mask.raw_value, reverse=True)
 
+    def set_routes(self, routes: List[Route]) -> None:
+        """
+        Reemplaza todas las rutas de la tabla.
+
+        Parameters
+        ----------
+        routes : List[Route]
+            Rutas nuevas.
+        """
+
+        self.routes = sorted(routes, key=lambda x: x.mask.raw_value,
+                             reverse=True)
+
     def remove_route(self, route: Route) -> None:
         """
         Elimina una ruta de la tabla de rutas.
@@ -90,10 +114,19 @@ class RouteTable():
 
 
 class Router(IPPacketSender, RouteTable):
-    """Representa un router en la simulación."""
+    """
+    Representa un router en la simulación.
+
+    Attributes
+    ----------
+    on_route_miss : List[Callable[[IPPacket], None]]
+        Funciones que se ejecutan cuando no hay una ruta para un paquete.
+        Reciben el paquete.
+    """
 
     def __init__(self, name: str, ports_count: int, signal_time: int):
         self.routes = []
+        self.on_route_miss: List[Callable[[IPPacket], None]] = []
         super().__init__(name, ports_count, signal_time)
 
     def enroute(self, packet: IPPacket, port: int = 1, frame: Frame = None):
@@ -108,17 +141,24 @@ class Router(IPPacketSender, RouteTable):
             Puerto por el cual sale el paquete (interfase), por defecto 1.
         frame : Frame, optional
             Frame que contiene al paquete, por defecto None.
+
+        Si no hay una ruta para el paquete este se descarta y, si llegó en
+        un frame, se responde al origen con un paquete ``no_dest_host``.
         """
 
         route = self.get_enrouting(packet.to_ip)
 
-        if route is None and frame is not None:
-            data = IPPacket.no_dest_host(packet.from_ip, self.ips[port]).bit_data
-            super().send_frame(
-                from_number_to_bit_data(frame.from_mac, 16),
-                data,
-                port
-            )
+        if route is None:
+            for act in self.on_route_miss:
+                act(packet)
+            if frame is not None:
+                data = IPPacket.no_dest_host(packet.from_ip,
+                                             self.ips[port]).bit_data
+                super().send_frame(
+                    from_number_to_bit_data(frame.from_mac, 16),
+                    data,
+                    port
+                )
             return
 
         to_ip = route.gateway
@@ -143,32 +183,24 @@ class Router(IPPacketSender, RouteTable):
         self.enroute(packet, port, frame)
 
     def on_frame_received(self, frame: Frame, port: int) -> None:
-        print(f'[{self.sim_time:>6}] {self.name:>18}  received:', frame)
-        mac_dest = from_number_to_bit_data(frame.to_mac, 16)
-        mac_dest_str = ''.join(map(str, mac_dest))
+        if self.logs_enabled:
+            emit(print, f'[{self.sim_time:>6}] {self.name:>18}  received:', frame)
         mac_origin = from_number_to_bit_data(frame.from_mac, 16)
         data_s = frame.frame_data_size
         data = frame.data
 
         # ARPQ protocol
         if data_s / 8 == 8:
-            arpq = from_str_to_bin('ARPQ')
-            ip = ''.join(map(str, data[32:64]))
-            if mac_dest_str == '1'*16:
-                arpq_data = ''.join(map(str, data[:32]))
-                ip_values = [i.str_binary for i in self.ips.values()]
-                if arpq_data.endswith(arpq) and \
-                    ip in ip_values:
+            ip = IP.from_bit_data(data[32:64])
+            if frame.to_mac == 0xFFFF:
+                if frame.is_arpq and ip in self.ips.values():
                     self.respond_arpq(mac_origin, port)
             else:
-                new_ip = IP.from_bin(ip)
-                self.ip_table[str(new_ip)] = mac_origin
-                if str(new_ip) in self.waiting_for_arpq:
-                    for data in self.waiting_for_arpq[str(new_ip)]:
-                        self.send_frame(mac_origin, data, port)
-                    self.waiting_for_arpq[str(new_ip)] = []
+                self.ip_table[ip] = mac_origin
+                for data in self.waiting_for_arpq.pop(ip, []):
+                    self.send_frame(mac_origin, data, port)
             return
 
-        valid_packet, packet = IPPacket.parse(frame.data)
-        if valid_packet:
+        packet = frame.ip_packet
+        if packet is not None:
             self.on_ip_packet_received(packet, port, frame)
@@ -1,9 +1,99 @@
-from random import randint
-from typing import List
-from collections import Counter
+import abc
+from nesim.rng import randint, random
+from typing import Callable, Deque, List, Tuple
+from collections import deque
 from nesim.devices.cable import DuplexCableHead
 
 
+class DropPolicy(metaclass=abc.ABCMeta):
+    """
+    Política que decide si un paquete se añade a una cola de envío
+    acotada o se descarta.
+    """
+
+    @abc.abstractmethod
+    def accept(self, occupancy: int, size: int, capacity: int) -> bool:
+        """
+        Decide si un paquete se añade a la cola.
+
+        Parameters
+        ----------
+        occupancy : int
+            Ocupación actual de la cola.
+        size : int
+            Tamaño del paquete (en la misma unidad que ``occupancy``).
+        capacity : int
+            Capacidad de la cola.
+
+        Returns
+        -------
+        bool
+            ``True`` si el paquete se añade, ``False`` si se descarta.
+        """
+
+
+class TailDrop(DropPolicy):
+    """Descarta los paquetes que no caben en la cola."""
+
+    def accept(self, occupancy: int, size: int, capacity: int) -> bool:
+        return occupancy + size <= capacity
+
+
+class RandomEarlyDrop(DropPolicy):
+    """
+    Política RED (*Random Early Detection*).
+
+    Se mantiene un promedio exponencial de la ocupación de la cola. Por
+    debajo de ``min_threshold`` no se descarta nada, por encima de
+    ``max_threshold`` se descarta todo y entre ambos valores se descarta
+    con una probabilidad que crece linealmente hasta ``max_prob``. Los
+    paquetes que no caben en la cola siempre se descartan.
+
+    Parameters
+    ----------
+    min_threshold : float, optional
+        Umbral inferior como fracción de la capacidad, por defecto 0.25.
+    max_threshold : float, optional
+        Umbral superior como fracción de la capacidad, por defecto 0.75.
+    max_prob : float, optional
+        Probabilidad de descarte al llegar al umbral superior, por defecto
+        0.1.
+    weight : float, optional
+        Peso de la ocupación actual en el promedio, por defecto 0.1.
+    """
+
+    def __init__(self, min_threshold: float = 0.25,
+                 max_threshold: float = 0.75, max_prob: float = 0.1,
+                 weight: float = 0.1):
+        if not 0 <= min_threshold < max_threshold:
+            raise ValueError('RED thresholds must satisfy 0 <= min < max')
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.max_prob = max_prob
+        self.weight = weight
+        self.average = 0
+
+    def accept(self, occupancy: int, size: int, capacity: int) -> bool:
+        if occupancy + size > capacity:
+            return False
+
+        self.average += self.weight * (occupancy - self.average)
+        min_th = self.min_threshold * capacity
+        max_th = self.max_threshold * capacity
+        if self.average < min_th:
+            return True
+        if self.average >= max_th:
+            return False
+        prob = self.max_prob * (self.average - min_th) / (max_th - min_th)
+        return random() >= prob
+
+
+DROP_POLICIES = {
+    'tail': TailDrop,
+    'red': RandomEarlyDrop,
+}
+
+
 class SendReceiver():
     """
     Componente capaz de recibir y enviar información a través de un cable
@@ -18,15 +108,67 @@ class SendReceiver():
 
     Attributes
     ----------
-    data : List[int]
-        Datos a enviar.
+    data : Deque[List[int]]
+        Cola de paquetes a enviar.
+    queue_capacity : int
+        Capacidad de la cola de envío (``None`` si no está acotada).
+    queue_unit : str
+        Unidad de la capacidad: ``'frames'`` (paquetes) o ``'bits'``.
+    drop_policy : DropPolicy
+        Política de descarte de la cola.
+    queued_bits : int
+        Cantidad de bits en la cola. Cada paquete cuenta con el tamaño que
+        tenía al añadirse a la cola (un paquete puede crecer mientras
+        espera, como los frames que reenvía un switch ``cut_through``).
+    dropped_frames, dropped_bits : int
+        Cantidad de paquetes y de bits descartados.
+    on_drop : List[Callable[[List[int], Tuple[str, int]], None]]
+        Funciones que se ejecutan al descartar un paquete. Reciben el
+        paquete descartado y el identificador de su frame.
+    on_enqueue : List[Callable[[List[int], Tuple[str, int]], None]]
+        Funciones que se ejecutan al añadir un paquete a la cola de envío.
+        Reciben el paquete añadido y el identificador de su frame.
+    current_trace_id : Tuple[str, int]
+        Identificador del frame del paquete que se está enviando. Se
+        escribe en el cable junto a cada bit (ver ``nesim.flows``).
+    received_trace_id : Tuple[str, int]
+        Identificador del frame al que pertenece el último bit leído.
+    signal_time : int
+        Tiempo que debe estar cada bit en transmisión en el enlace actual.
+    backoff_slot : int
+        Milisegundos de cada unidad del tiempo de espera luego de una
+        colisión.
+    deliver : Callable[[int], None]
+        Función del dispositivo que recibe cada bit leído. Se ejecuta antes
+        que las funciones de ``on_receive``.
     """
 
+    # Attributes kept when a port is replaced by another implementation
+    PORT_STATE = ('data', '_queued_sizes', '_queued_ids', 'queued_bits',
+                  'queue_capacity', 'queue_unit', 'drop_policy', 'dropped_frames',
+                  'dropped_bits', 'deliver', 'on_send', 'on_receive',
+                  'on_collision', 'on_drop', 'on_enqueue')
+
     def __init__(self, signal_time: int, cable_head: DuplexCableHead = None):
         self.cable_head = cable_head
+        self.default_signal_time = signal_time
         self.signal_time = signal_time
-        self.data = []
+        self.backoff_slot = 1
+        self.data: Deque[List[int]] = deque()
+        self.queue_capacity = None
+        self.queue_unit = 'frames'
+        self.drop_policy: DropPolicy = TailDrop()
+        self.queued_bits = 0
+        self._queued_sizes: Deque[int] = deque()
+        self._queued_ids: Deque[Tuple[str, int]] = deque()
+        self.dropped_frames = 0
+        self.dropped_bits = 0
+        self.on_drop: List[Callable[[List[int], Tuple[str, int]], None]] = []
+        self.on_enqueue: List[Callable[[List[int], Tuple[str, int]],
+                                       None]] = []
         self.current_package = []
+        self.current_trace_id: Tuple[str, int] = None
+        self.received_trace_id: Tuple[str, int] = None
         self.package_index = 0
         self.time_to_send = 0
         self.max_time_to_send = 1
@@ -35,6 +177,8 @@ class SendReceiver():
         self.is_sending = False
         self.time_connected = 0
         self.recived_bits = []
+        self._phase = None
+        self.deliver: Callable[[int], None] = None
         self.on_send, self.on_receive, self.on_collision = [], [], []
 
     @property
@@ -42,6 +186,66 @@ class SendReceiver():
         """bool : Estado del ``SendReceiver``."""
         return self.is_sending or self.time_to_send
 
+    def set_queue(self, capacity: int, unit: str = 'frames',
+                  policy: DropPolicy = None):
+        """
+        Acota la cola de envío.
+
+        Parameters
+        ----------
+        capacity : int
+            Capacidad de la cola. ``None`` para no acotarla.
+        unit : str, optional
+            Unidad de la capacidad: ``'frames'`` (por defecto) o ``'bits'``.
+        policy : DropPolicy, optional
+            Política de descarte, por defecto ``TailDrop``.
+        """
+
+        if unit not in ('frames', 'bits'):
+            raise ValueError(f'Invalid queue unit {unit}')
+        if capacity is not None and capacity <= 0:
+            raise ValueError('Queue capacity must be positive')
+
+        self.queue_capacity = capacity
+        self.queue_unit = unit
+        self.drop_policy = policy if policy is not None else TailDrop()
+
+    def connect(self, cable_head: DuplexCableHead):
+        """
+        Conecta un cable.
+
+        Para usar la implementación especializada según el tipo de cable se
+        debe crear el ``SendReceiver`` con ``for_cable``.
+
+        Parameters
+        ----------
+        cable_head : DuplexCableHead
+            Extremo del cable.
+        """
+
+        self.cable_head = cable_head
+        self.set_signal_time(cable_head.signal_time)
+
+    def set_signal_time(self, signal_time: int = None):
+        """
+        Cambia la velocidad del enlace.
+
+        El tiempo de espera luego de una colisión se escala en la misma
+        proporción que el tiempo de cada bit respecto al ``signal time``
+        por defecto.
+
+        Parameters
+        ----------
+        signal_time : int, optional
+            Tiempo que debe estar cada bit en transmisión. Si es ``None`` se
+            usa el ``signal time`` por defecto.
+        """
+
+        if signal_time is None:
+            signal_time = self.default_signal_time
+        self.signal_time = signal_time
+        self.backoff_slot = max(1, signal_time // self.default_signal_time)
+
     def readjust_max_time_to_send(self):
         """
         Ajusta el tiempo máximo que será utilizado en la selección aleatoria
@@ -57,7 +261,9 @@ class SendReceiver():
 
         if not self.current_package:
             if self.data:
-                self.current_package = self.data.pop(0)
+                self.current_package = self.data.popleft()
+                self.current_trace_id = self._queued_ids.popleft()
+                self.queued_bits -= self._queued_sizes.popleft()
                 self.max_time_to_send = 16
                 self.package_index = 0
                 self.send_time = 0
@@ -88,10 +294,10 @@ class SendReceiver():
         if self.current_package:
             self.is_sending = True
             self.sending_bit = self.current_package[self.package_index]
-            self.cable_head.send(self.sending_bit)
+            self.cable_head.send(self.sending_bit, self.current_trace_id)
 
 
-    def send(self, data: List[List[int]]):
+    def send(self, data: List[List[int]], trace_id: Tuple[str, int] = None):
         """
         Agrega nuevos datos para ser enviados a la lista de datos.
 
@@ -99,8 +305,51 @@ class SendReceiver():
         ----------
         data : List[List[int]]
             Datos a ser enviados.
+        trace_id : Tuple[str, int], optional
+            Identificador del frame al que pertenecen los datos.
+        """
+        for package in data:
+            self.enqueue(package, trace_id)
+
+    def enqueue(self, package: List[int],
+                trace_id: Tuple[str, int] = None) -> bool:
         """
-        self.data += data
+        Añade un paquete a la cola de envío si la política de descarte lo
+        permite.
+
+        Parameters
+        ----------
+        package : List[int]
+            Paquete a añadir.
+        trace_id : Tuple[str, int], optional
+            Identificador del frame al que pertenece el paquete.
+
+        Returns
+        -------
+        bool
+            ``True`` si el paquete se añadió, ``False`` si se descartó.
+        """
+
+        if self.queue_capacity is not None:
+            if self.queue_unit == 'frames':
+                occupancy, size = len(self.data), 1
+            else:
+                occupancy, size = self.queued_bits, len(package)
+            if not self.drop_policy.accept(occupancy, size,
+                                           self.queue_capacity):
+                self.dropped_frames += 1
+                self.dropped_bits += len(package)
+                for act in self.on_drop:
+                    act(package, trace_id)
+                return False
+
+        self.data.append(package)
+        self._queued_sizes.append(len(package))
+        self._queued_ids.append(trace_id)
+        self.queued_bits += len(package)
+        for act in self.on_enqueue:
+            act(package, trace_id)
+        return True
 
     def receive(self):
         """
@@ -121,30 +370,56 @@ class SendReceiver():
             coll = self.check_collision()
 
             if not coll:
-                if self.send_time == 0:
-                    for act in self.on_send:
-                        act(self.sending_bit)
-                self.send_time += 1
-                if self.send_time == self.signal_time:
-                    self.package_index += 1
-                    if self.package_index == len(self.current_package):
-                        self.current_package = []
-                    self.send_time = 0
+                self.advance()
 
             if self.cable_head.send_cable == self.cable_head.receive_cable:
                 return
 
-        if self.time_connected % self.signal_time//3 == 0:
-            bit = self.cable_head.receive()
-            if bit is not None:
-                self.recived_bits.append(bit)
+        self.sample()
+
+    def advance(self):
+        """
+        Avanza un milisegundo en el envío del bit actual (sin colisión).
+        """
 
-        if self.time_connected % self.signal_time == 0 and self.recived_bits:
-            temp = [(v,k) for k,v in Counter(self.recived_bits).items()]
-            received = max(temp)[1]
-            for act in self.on_receive:
-                act(received)
+        if self.send_time == 0 and self.on_send:
+            for act in self.on_send:
+                act(self.sending_bit)
+        self.send_time += 1
+        if self.send_time == self.signal_time:
+            self.package_index += 1
+            if self.package_index == len(self.current_package):
+                self.current_package = []
+            self.send_time = 0
+
+    def sample(self):
+        """
+        Lee el cable de recepción. Al concluir cada ``signal_time`` se
+        entrega como bit recibido la moda de las lecturas (``1`` en caso de
+        empate).
+        """
+
+        bit = self.cable_head.receive_cable.value
+        if bit is None:
+            self._phase = None
+            return
+        if self._phase is None:
+            self._phase = self.time_connected - 1
+        slot = (self.time_connected - self._phase) % self.signal_time
+
+        if slot < 3:
+            self.recived_bits.append(bit)
+
+        if slot == 0 and self.recived_bits:
+            bits = self.recived_bits
+            received = 1 if 2 * sum(bits) >= len(bits) else 0
             self.recived_bits = []
+            self.received_trace_id = self.cable_head.receive_cable.trace_id
+            if self.deliver is not None:
+                self.deliver(received)
+            if self.on_receive:
+                for act in self.on_receive:
+                    act(received)
 
     def check_collision(self):
         """
@@ -157,7 +432,8 @@ class SendReceiver():
         """
 
         if self.is_sending and self.cable_head.send_value != self.sending_bit:
-            self.time_to_send = randint(1, self.max_time_to_send)
+            self.time_to_send = randint(1, self.max_time_to_send) * \
+                                self.backoff_slot
             self.readjust_max_time_to_send()
             self.package_index = 0
             self.send_time = 0
@@ -179,8 +455,12 @@ class SendReceiver():
 
         # Reset sending info
         if self.current_package:
-            self.data.insert(0, self.current_package)
+            self.data.appendleft(self.current_package)
+            self._queued_sizes.appendleft(len(self.current_package))
+            self._queued_ids.appendleft(self.current_trace_id)
+            self.queued_bits += len(self.current_package)
         self.current_package = []
+        self.current_trace_id = None
         self.package_index = 0
         self.is_sending = False
         self.send_time = 0
@@ -188,3 +468,108 @@ class SendReceiver():
         self.max_time_to_send = 16
         self.time_connected = 0
         self.recived_bits = []
+
+
+class FullDuplexSendReceiver(SendReceiver):
+    """
+    ``SendReceiver`` conectado a un cable duplex punto a punto.
+
+    El cable de envío solo es escrito por este ``SendReceiver``, por lo que
+    no se comprueban colisiones y siempre se lee el cable de recepción.
+    """
+
+    def update(self):
+        self.time_connected += 1
+
+        if not self.current_package:
+            self.load_package()
+
+        if self.time_to_send:
+            self.time_to_send -= 1
+            if self.time_to_send:
+                return
+
+        if self.current_package:
+            self.is_sending = True
+            self.sending_bit = self.current_package[self.package_index]
+            self.cable_head.send(self.sending_bit, self.current_trace_id)
+
+    def receive(self):
+        if self.is_sending:
+            self.advance()
+        self.sample()
+
+
+class SharedMediumSendReceiver(SendReceiver):
+    """
+    ``SendReceiver`` conectado a un medio compartido (un cable simple hacia
+    un hub).
+
+    Mientras envía comprueba si hay colisiones y no lee el cable, que es el
+    mismo por el que envía.
+    """
+
+    def update(self):
+        self.time_connected += 1
+
+        if not self.current_package:
+            self.load_package()
+
+        if self.time_to_send:
+            self.time_to_send -= 1
+            if self.time_to_send:
+                return
+
+        if self.current_package:
+            self.is_sending = True
+            self.sending_bit = self.current_package[self.package_index]
+            self.cable_head.send(self.sending_bit, self.current_trace_id)
+
+    def receive(self):
+        if self.is_sending:
+            if not self.check_collision():
+                self.advance()
+            return
+        self.sample()
+
+
+def for_cable(send_receiver: SendReceiver,
+              cable_head: DuplexCableHead = None) -> SendReceiver:
+    """
+    Crea el ``SendReceiver`` adecuado para un cable, que reemplaza a otro
+    en un puerto.
+
+    Se crea un ``FullDuplexSendReceiver`` para un cable duplex punto a
+    punto, un ``SharedMediumSendReceiver`` para un cable simple (conectado
+    a un hub) y un ``SendReceiver`` genérico si no hay cable. El nuevo
+    ``SendReceiver`` conserva la cola de envío (y su configuración), las
+    estadísticas de descarte, la función ``deliver`` y las listas de
+    callbacks del anterior, que debe estar desconectado.
+
+    Parameters
+    ----------
+    send_receiver : SendReceiver
+        ``SendReceiver`` a reemplazar.
+    cable_head : DuplexCableHead, optional
+        Extremo del cable que se conecta. Si es ``None`` el nuevo
+        ``SendReceiver`` queda desconectado.
+
+    Returns
+    -------
+    SendReceiver
+        ``SendReceiver`` creado (conectado al cable si se especificó).
+    """
+
+    if cable_head is None:
+        cls = SendReceiver
+    elif cable_head.send_cable is cable_head.receive_cable:
+        cls = SharedMediumSendReceiver
+    else:
+        cls = FullDuplexSendReceiver
+
+    new = cls(send_receiver.default_signal_time)
+    for name in SendReceiver.PORT_STATE:
+        setattr(new, name, getattr(send_receiver, name))
+    if cable_head is not None:
+        new.connect(cable_head)
+    return new
@@ -1,16 +1,204 @@
+from functools import partial
+from typing import Callable, List, Tuple
 from nesim.frame import Frame
 from nesim.devices.multiple_port_device import MultiplePortDevice
+from nesim.devices.utils import from_bit_data_to_number
+from nesim.parallel import emit
+
+
+SWITCH_MODES = ('store_and_forward', 'cut_through', 'fragment_free')
 
 
 class Switch(MultiplePortDevice):
-    """Representa un switch en la simulación."""
+    """
+    Representa un switch en la simulación.
+
+    Parameters
+    ----------
+    name : str
+        Nombre del switch.
+    ports_count : int
+        Cantidad de puertos.
+    signal_time : int
+        ``Signal time`` de la simulación.
+    mode : str, optional
+        Modo de conmutación:
+
+        - ``'store_and_forward'`` (por defecto): el frame se reenvía luego
+          de recibirse completo.
+        - ``'cut_through'``: el puerto de salida se escoge en cuanto se
+          recibe la mac destino (16 bits) y los bits se reenvían a medida
+          que llegan.
+        - ``'fragment_free'``: como ``'cut_through'`` pero se espera a
+          recibir los primeros ``FRAGMENT_FREE_BITS`` bits (o el frame
+          completo si es más corto), de forma que no se reenvían los
+          fragmentos de frames cortados por una colisión.
+
+        Si algún puerto de salida está ocupado o su enlace es más rápido
+        (menor ``signal time``) que el de entrada, el frame se reenvía al
+        recibirse completo, como en ``'store_and_forward'``. Si el frame
+        que se está reenviando se corta (el enlace de entrada queda libre
+        o hay una colisión en el puerto de entrada) se descartan los bits
+        recibidos y los puertos de salida solo envían el fragmento.
+
+    Attributes
+    ----------
+    on_forward : List[Callable[[int, int], None]]
+        Funciones que se ejecutan al reenviar un frame por un único puerto.
+        Reciben los índices del puerto de entrada y del de salida.
+    on_flood : List[Callable[[int], None]]
+        Funciones que se ejecutan al reenviar un frame por todos los
+        puertos. Reciben el índice del puerto de entrada.
+    """
+
+    CUT_THROUGH_BITS = 16
+    FRAGMENT_FREE_BITS = 64 * 8
+
+    def __init__(self, name: str, ports_count: int, signal_time: int,
+                 mode: str = 'store_and_forward'):
+        if mode not in SWITCH_MODES:
+            raise ValueError(f'Unknown switch mode {mode}')
+        self.mode = mode
+        self.on_forward: List[Callable[[int, int], None]] = []
+        self.on_flood: List[Callable[[int], None]] = []
+        self._streams: List[List[int]] = [None] * ports_count
+        super().__init__(name, ports_count, signal_time)
+
+    @property
+    def stream_threshold(self) -> int:
+        """
+        int : Cantidad de bits que se deben recibir para comenzar a
+        reenviar un frame (``None`` en ``'store_and_forward'``).
+        """
+
+        if self.mode == 'cut_through':
+            return self.CUT_THROUGH_BITS
+        if self.mode == 'fragment_free':
+            return self.FRAGMENT_FREE_BITS
+        return None
+
+    def is_streaming(self, port: int) -> bool:
+        """
+        Indica si el frame que se recibe por un puerto se está reenviando a
+        medida que llega (``'cut_through'`` o ``'fragment_free'``).
+
+        Parameters
+        ----------
+        port : int
+            Índice del puerto.
+        """
+
+        return self._streams[port] is not None
+
+    def forward(self, in_port: int, to_mac: int, bit_data: List[int],
+                trace_id: Tuple[str, int] = None):
+        """
+        Reenvía un frame según la tabla mac del switch.
+
+        Parameters
+        ----------
+        in_port : int
+            Índice del puerto por el que llegó el frame.
+        to_mac : int
+            Mac destino del frame.
+        bit_data : List[int]
+            Bits del frame.
+        trace_id : Tuple[str, int], optional
+            Identificador del frame.
+        """
+
+        if to_mac == 65_535 or to_mac not in self.mac_table:
+            self.broadcast(in_port, [bit_data], trace_id)
+            for act in self.on_flood:
+                act(in_port)
+        else:
+            out_port = self.mac_table[to_mac]
+            self.ports[out_port].send([bit_data], trace_id)
+            for act in self.on_forward:
+                act(in_port, out_port)
+
+    def _out_ports(self, in_port: int, to_mac: int) -> List[int]:
+        if to_mac == 65_535 or to_mac not in self.mac_table:
+            return [port for port, send_receiver in enumerate(self.ports)
+                    if port != in_port and send_receiver.cable_head is not None]
+        return [self.mac_table[to_mac]]
+
+    def _start_stream(self, in_port: int):
+        data = self.ports_buffer[in_port]
+        to_mac = from_bit_data_to_number(data[:16])
+        in_signal_time = self.ports[in_port].signal_time
+        for port in self._out_ports(in_port, to_mac):
+            send_receiver = self.ports[port]
+            if send_receiver.data or send_receiver.current_package:
+                return
+            # A faster egress link would run out of bits before the frame
+            # is fully received.
+            if send_receiver.signal_time < in_signal_time:
+                return
+
+        # The egress ports send the same list, which grows with every bit
+        # received on the ingress port.
+        stream = list(data)
+        self._streams[in_port] = stream
+        self.forward(in_port, to_mac, stream, self.ports_trace_id[in_port])
+
+    def abort_stream(self, port: int):
+        """
+        Descarta el frame que se está reenviando a medida que llega por un
+        puerto (los puertos de salida solo envían los bits ya recibidos).
+
+        Parameters
+        ----------
+        port : int
+            Índice del puerto de entrada.
+        """
+
+        if self._streams[port] is not None:
+            self._streams[port] = None
+            self.ports_buffer[port] = []
+
+    def receive(self) -> None:
+        super().receive()
+        for port, stream in enumerate(self._streams):
+            if stream is None:
+                continue
+            cable_head = self.ports[port].cable_head
+            if cable_head is None or cable_head.receive_value is None:
+                self.abort_stream(port)
+
+    def create_send_receiver(self, port: int):
+        send_receiver = super().create_send_receiver(port)
+        send_receiver.on_collision.append(partial(self.abort_stream, port))
+        return send_receiver
+
+    def receive_on_port(self, port: int, bit: int):
+        stream = self._streams[port]
+        if stream is not None:
+            stream.append(bit)
+        super().receive_on_port(port, bit)
+
+        threshold = self.stream_threshold
+        if threshold is not None and self._streams[port] is None and \
+           len(self.ports_buffer[port]) >= threshold:
+            self._start_stream(port)
 
     def on_frame_received(self, frame: Frame, port: int) -> None:
-        print(f'[{self.sim_time:>6}] {self.name + " - " + str(port):>18}  received: {frame}')
-        self.mac_table[frame.from_mac] = self.port_name(port)
+        if self.logs_enabled:
+            emit(print, f'[{self.sim_time:>6}] {self.name + " - " + str(port):>18}  received: {frame}')
+        in_port = port - 1
+        self.mac_table[frame.from_mac] = in_port
 
-        if frame.to_mac == 65_535 or frame.to_mac not in self.mac_table:
-            self.broadcast(self.port_name(port), [frame.bit_data])
+        if self._streams[in_port] is not None:
+            self._streams[in_port] = None
         else:
-            self.ports[self.mac_table[frame.to_mac]].send([frame.bit_data])
-        self.ports_buffer[port - 1] = []
+            self.forward(in_port, frame.to_mac, frame.bit_data,
+                         self.ports_trace_id[in_port])
+        self.ports_buffer[in_port] = []
+
+    def disconnect(self, port: int):
+        self._streams[port] = None
+        # The macs learned on the port are no longer reachable through it
+        for mac in [mac for mac, out_port in self.mac_table.items()
+                    if out_port == port]:
+            del self.mac_table[mac]
+        super().disconnect(port)
@@ -0,0 +1,348 @@
+"""
+Experimentos de Monte Carlo para medir la efectividad de los algoritmos de
+detección de errores sin ejecutar simulaciones completas.
+
+Los datos se procesan por lotes con operaciones de NumPy. NumPy es una
+dependencia opcional (``pip install nesim[analysis]``).
+
+Ejemplo::
+
+    python -m nesim.error_analysis --bits 64 --trials 1000000 \\
+        --algorithm simple_hash hamming --model single swap burst
+"""
+
+import argparse
+import time
+from math import ceil, log
+from typing import Dict, List
+from nesim.devices.error_detection import (
+    check_frame_correction,
+    get_error_detection_data
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+ERROR_MODELS = ('single', 'bernoulli', 'burst', 'swap')
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError(
+            'NumPy is required for the error detection analysis. '
+            'Install it with: pip install nesim[analysis]')
+
+
+##############################################################################
+#                        Batch error detection                               #
+##############################################################################
+
+def _hamming_matrix(size: int):
+    """Matriz de paridad equivalente a ``_get_hamming`` para ``size`` bits.
+
+    Cada fila corresponde a un bit de paridad y marca los bits de datos que
+    participan en él.
+    """
+
+    needed_bits = ceil(log(size, 2))
+    positions = [None] + list(range(size))
+    for i in range(needed_bits):
+        positions.insert(2**i, None)
+
+    matrix = np.zeros((needed_bits, size), dtype=np.uint8)
+    for pos, data_index in enumerate(positions):
+        if data_index is None:
+            continue
+        for i in range(needed_bits):
+            if pos >> i & 1:
+                matrix[i, data_index] = 1
+    return matrix
+
+
+def _detect_simple_hash(original, corrupted):
+    return original.sum(axis=1) != corrupted.sum(axis=1)
+
+
+def _detect_hamming(original, corrupted):
+    matrix = _hamming_matrix(original.shape[1]).T.astype(np.int64)
+    syndrome = ((original ^ corrupted).astype(np.int64) @ matrix) % 2
+    return syndrome.any(axis=1)
+
+
+def _linear_matrix(algorithm: str, size: int):
+    """Matriz de un algoritmo lineal (como los CRC) para ``size`` bits.
+
+    La fila ``i`` contiene la diferencia entre los datos de detección de un
+    frame con solo el bit ``i`` en 1 y los de un frame de ceros, por lo que
+    un error se detecta si y solo si su producto con la matriz no es nulo.
+    """
+
+    _, base = get_error_detection_data([0] * size, algorithm)
+    rows = []
+    for i in range(size):
+        unit = [0] * size
+        unit[i] = 1
+        _, code = get_error_detection_data(unit, algorithm)
+        rows.append([a ^ b for a, b in zip(code, base)])
+    return np.array(rows, dtype=np.int64)
+
+
+def _linear_detector(algorithm: str):
+    matrices = {}
+
+    def _detect(original, corrupted):
+        size = original.shape[1]
+        if size not in matrices:
+            matrices[size] = _linear_matrix(algorithm, size)
+        syndrome = ((original ^ corrupted).astype(np.int64) @ matrices[size]) % 2
+        return syndrome.any(axis=1)
+    return _detect
+
+
+_BATCH_DETECTORS = {
+    'simple_hash': _detect_simple_hash,
+    'hamming': _detect_hamming,
+    'crc8': _linear_detector('crc8'),
+    'crc16': _linear_detector('crc16'),
+    'crc32': _linear_detector('crc32'),
+}
+
+
+def _detect_reference(original, corrupted, algorithm: str):
+    detected = np.zeros(original.shape[0], dtype=bool)
+    for row, (orig, corr) in enumerate(zip(original.tolist(),
+                                           corrupted.tolist())):
+        detected[row] = _reference_check(orig, corr, algorithm)
+    return detected
+
+
+def _reference_check(original: List[int], corrupted: List[int],
+                     algorithm: str) -> bool:
+    e_size, e_data = get_error_detection_data(list(original), algorithm)
+    frame = [0] * 40 + e_size + list(corrupted) + e_data
+    _, error = check_frame_correction(frame, algorithm)
+    return error
+
+
+def detect_batch(original, corrupted, algorithm: str):
+    """
+    Indica para cada fila si el algoritmo detecta la diferencia entre los
+    datos originales y los recibidos.
+
+    Los algoritmos sin versión vectorizada se evalúan frame a frame con
+    ``get_error_detection_data`` y ``check_frame_correction``.
+
+    Parameters
+    ----------
+    original, corrupted : numpy.ndarray
+        Matrices de bits (una fila por frame).
+    algorithm : str
+        Algoritmo de detección de errores.
+
+    Returns
+    -------
+    numpy.ndarray
+        Vector booleano con ``True`` en los frames en que se detectó error.
+    """
+
+    detector = _BATCH_DETECTORS.get(algorithm)
+    if detector is None:
+        return _detect_reference(original, corrupted, algorithm)
+    return detector(original, corrupted)
+
+
+##############################################################################
+#                              Error models                                  #
+##############################################################################
+
+def error_pattern(rng, data, model: str, error_prob: float,
+                  burst_length: int = 8):
+    """
+    Genera los bits a invertir en un lote de frames.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        Generador de números aleatorios.
+    data : numpy.ndarray
+        Lote de frames (una fila por frame).
+    model : str
+        Modelo de error:
+
+        * ``single``: con probabilidad ``error_prob`` se invierte un bit del
+          frame (el modelo usado por la simulación).
+        * ``bernoulli``: cada bit se invierte con probabilidad
+          ``error_prob``.
+        * ``burst``: con probabilidad ``error_prob`` se altera una ráfaga de
+          ``burst_length`` bits (los extremos se invierten siempre y los
+          bits intermedios con probabilidad 0.5).
+        * ``swap``: con probabilidad ``error_prob`` se invierten un 0 y un 1
+          del frame.
+    error_prob : float
+        Probabilidad de error (por frame o por bit según el modelo).
+    burst_length : int, optional
+        Longitud de las ráfagas, por defecto 8.
+
+    Returns
+    -------
+    numpy.ndarray
+        Matriz booleana con ``True`` en los bits a invertir.
+    """
+
+    frames, size = data.shape
+    hit = rng.random(frames) < error_prob
+    rows = np.arange(frames)
+
+    if model == 'single':
+        pattern = np.zeros((frames, size), dtype=bool)
+        pattern[rows, rng.integers(0, size, frames)] = True
+    elif model == 'bernoulli':
+        return rng.random((frames, size)) < error_prob
+    elif model == 'burst':
+        length = min(burst_length, size)
+        start = rng.integers(0, size - length + 1, frames)[:, None]
+        index = np.arange(size)[None, :]
+        inside = (index >= start) & (index < start + length)
+        pattern = inside & (rng.random((frames, size)) < 0.5)
+        pattern |= (index == start) | (index == start + length - 1)
+    elif model == 'swap':
+        keys = rng.random((frames, size))
+        ones = np.where(data == 1, keys, -1).argmax(axis=1)
+        zeros = np.where(data == 0, keys, -1).argmax(axis=1)
+        pattern = np.zeros((frames, size), dtype=bool)
+        pattern[rows, ones] = True
+        pattern[rows, zeros] = True
+        mixed = data.any(axis=1) & (~data.astype(bool)).any(axis=1)
+        hit &= mixed
+    else:
+        raise ValueError(f'Invalid error model {model}')
+
+    return pattern & hit[:, None]
+
+
+##############################################################################
+#                               Experiment                                   #
+##############################################################################
+
+def run_experiment(algorithm: str, bits: int = 64, trials: int = 100_000,
+                   model: str = 'single', error_prob: float = 1.0,
+                   burst_length: int = 8, batch_size: int = 65_536,
+                   seed: int = None, validate: int = 0) -> Dict[str, float]:
+    """
+    Mide la efectividad de un algoritmo de detección de errores.
+
+    Parameters
+    ----------
+    algorithm : str
+        Algoritmo de detección de errores.
+    bits : int, optional
+        Tamaño de los datos de cada frame en bits, por defecto 64.
+    trials : int, optional
+        Cantidad de frames, por defecto 100 000.
+    model : str, optional
+        Modelo de error (ver ``error_pattern``), por defecto ``single``.
+    error_prob : float, optional
+        Probabilidad de error, por defecto 1.0.
+    burst_length : int, optional
+        Longitud de las ráfagas del modelo ``burst``, por defecto 8.
+    batch_size : int, optional
+        Cantidad de frames por lote, por defecto 65 536.
+    seed : int, optional
+        Semilla del generador de números aleatorios.
+    validate : int, optional
+        Cantidad de frames de cada lote que se comprueban además con
+        ``check_frame_correction``, por defecto 0.
+
+    Returns
+    -------
+    Dict[str, float]
+        Cantidad de frames, frames con error, errores detectados y no
+        detectados, falsas alarmas, tasas de detección y de fallo, y
+        frames procesados por segundo.
+
+    Raises
+    ------
+    AssertionError
+        Si la versión vectorizada no coincide con la de referencia en los
+        frames validados.
+    """
+
+    _require_numpy()
+    rng = np.random.default_rng(seed)
+    counts = dict(frames=0, corrupted=0, detected=0, missed=0,
+                  false_alarms=0)
+
+    start_time = time.perf_counter()
+    remaining = trials
+    while remaining > 0:
+        frames = min(batch_size, remaining)
+        remaining -= frames
+
+        original = rng.integers(0, 2, (frames, bits), dtype=np.uint8)
+        pattern = error_pattern(rng, original, model, error_prob,
+                                burst_length)
+        corrupted = original ^ pattern.astype(np.uint8)
+
+        detected = detect_batch(original, corrupted, algorithm)
+        corrupted_rows = pattern.any(axis=1)
+
+        if validate:
+            sample = slice(0, min(validate, frames))
+            reference = _detect_reference(original[sample],
+                                          corrupted[sample], algorithm)
+            assert (reference == detected[sample]).all(), \
+                f'Batch and reference {algorithm} results differ'
+
+        counts['frames'] += frames
+        counts['corrupted'] += int(corrupted_rows.sum())
+        counts['detected'] += int((detected & corrupted_rows).sum())
+        counts['missed'] += int((~detected & corrupted_rows).sum())
+        counts['false_alarms'] += int((detected & ~corrupted_rows).sum())
+
+    elapsed = time.perf_counter() - start_time
+    corrupted = counts['corrupted']
+    counts['detection_rate'] = counts['detected'] / corrupted if corrupted else 0
+    counts['miss_rate'] = counts['missed'] / corrupted if corrupted else 0
+    counts['frames_per_second'] = counts['frames'] / elapsed if elapsed else 0
+    return counts
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m nesim.error_analysis',
+        description='Monte Carlo analysis of the error detection algorithms.')
+    parser.add_argument('--algorithm', nargs='+',
+                        default=['simple_hash', 'hamming', 'crc8',
+                                 'crc16', 'crc32'])
+    parser.add_argument('--model', nargs='+', default=list(ERROR_MODELS),
+                        choices=ERROR_MODELS)
+    parser.add_argument('--bits', type=int, default=64)
+    parser.add_argument('--trials', type=int, default=1_000_000)
+    parser.add_argument('--error-prob', type=float, default=1.0)
+    parser.add_argument('--burst-length', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=65_536)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--validate', type=int, default=0)
+    opts = parser.parse_args(args)
+
+    header = f'| {"Algorithm": ^12} | {"Model": ^10} | {"Corrupted": ^10} ' \
+             f'| {"Detected": ^9} | {"Missed": ^9} | {"Frames/s": ^12} |'
+    print(header)
+    print('-' * len(header))
+    for algorithm in opts.algorithm:
+        for model in opts.model:
+            res = run_experiment(algorithm, opts.bits, opts.trials, model,
+                                 opts.error_prob, opts.burst_length,
+                                 opts.batch_size, opts.seed, opts.validate)
+            print(f'| {algorithm: ^12} | {model: ^10} '
+                  f'| {res["corrupted"]: >10} '
+                  f'| {res["detection_rate"]: >9.4%} '
+                  f'| {res["miss_rate"]: >9.4%} '
+                  f'| {res["frames_per_second"]: >12,.0f} |')
+
+
+if __name__ == '__main__':
+    main()
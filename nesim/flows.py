@@ -0,0 +1,481 @@
+"""
+Seguimiento de los frames y paquetes IP de una simulación.
+
+Cada frame y cada paquete IP recibe un identificador (solo en el simulador,
+no se transmite) y se registra el tiempo de cada evento del mismo en cada
+dispositivo por el que pasa. Al finalizar se obtienen histogramas de la
+latencia y de la cantidad de saltos por flujo (origen y destino).
+"""
+
+import csv
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from nesim.devices.device import Device
+from nesim.devices.frame_sender import FrameSender
+from nesim.devices.host import Host
+from nesim.devices.hub import Hub
+from nesim.devices.send_receiver import SendReceiver
+from nesim.devices.switch import Switch
+from nesim.devices.utils import (
+    from_bit_data_to_hex,
+    from_bit_data_to_number,
+    from_number_to_bit_data
+)
+from nesim.frame import Frame
+from nesim.ip import IPPacket
+from nesim.metrics import MetricsRegistry
+
+Port = Tuple[Device, int]
+
+LATENCY_BUCKETS = [2 ** i for i in range(6, 19)]
+HOP_BUCKETS = [0, 1, 2, 3, 4, 5, 6, 8, 12, 16, 32]
+
+
+class Trace():
+    """
+    Recorrido de un frame o de un paquete IP.
+
+    Parameters
+    ----------
+    kind : str
+        ``'frame'`` o ``'packet'``.
+    trace_id : int
+        Identificador del frame o paquete.
+    source : str
+        Origen del flujo: nombre del dispositivo que envió el frame o IP
+        origen del paquete.
+    destination : str
+        Destino del flujo: mac destino del frame (en hexadecimal) o IP
+        destino del paquete.
+    start : int
+        Tiempo en que se envió.
+    key : Tuple
+        Identificador del frame en la simulación (ver
+        ``FrameSender.frames_sent``) o bits del paquete.
+
+    Attributes
+    ----------
+    events : List[Tuple[int, str, str, str]]
+        Eventos en orden: tiempo, dispositivo, puerto y evento
+        (``'arp_wait'``, ``'send'``, ``'receive'``, ``'forward'``,
+        ``'flood'``, ``'deliver'``, ``'drop'`` o ``'error'``). En
+        ``'flood'`` el puerto es el de entrada y en ``'arp_wait'`` no se
+        especifica.
+    hops : int
+        Cantidad de saltos: switches atravesados por un frame o routers que
+        reenviaron un paquete.
+    reached : Dict[str, int]
+        Cantidad de switches atravesados por un frame hasta cada
+        dispositivo al que llegó.
+    packet : Trace
+        Recorrido del paquete IP contenido en un frame (``None`` si el frame
+        no contiene un paquete).
+    finished : bool
+        Indica si el frame o paquete fue entregado o descartado.
+    """
+
+    __slots__ = ('kind', 'trace_id', 'source', 'destination', 'start',
+                 'key', 'events', 'hops', 'reached', 'packet', 'finished')
+
+    def __init__(self, kind: str, trace_id: int, source: str,
+                 destination: str, start: int, key: Tuple):
+        self.kind = kind
+        self.trace_id = trace_id
+        self.source = source
+        self.destination = destination
+        self.start = start
+        self.key = key
+        self.events: List[Tuple[int, str, str, str]] = []
+        self.hops = 0
+        self.reached: Dict[str, int] = {}
+        self.packet: Trace = None
+        self.finished = False
+
+    @property
+    def flow(self) -> Tuple[str, str]:
+        """Tuple[str, str] : Origen y destino del flujo."""
+        return self.source, self.destination
+
+
+class FlowTracer():
+    """
+    Identifica los frames y paquetes IP de una simulación y registra sus
+    recorridos.
+
+    Cada frame lleva su identificador junto a sus bits por las colas de
+    envío, los cables, los hubs y los switches, y los callbacks ``on_frame``
+    y ``on_drop`` lo reciben, por lo que un frame recibido o descartado se
+    asocia exactamente al frame enviado aunque otro frame tenga los mismos
+    bits. Los frames cuyos bits se mezclan en una colisión no tienen
+    identificador y se ignoran. Un paquete IP se asocia al paquete del
+    último frame que recibió el dispositivo que lo reenvía o lo entrega.
+
+    Los eventos se alimentan de los callbacks de los dispositivos
+    (``on_frame``, ``on_forward``, ``on_flood``, ``on_arp_miss``,
+    ``on_data_received`` y ``on_payload_received``) y de los
+    ``SendReceiver`` (``on_drop``).
+
+    Parameters
+    ----------
+    clock : Callable[[], int]
+        Función que devuelve el tiempo actual de la simulación.
+
+    Attributes
+    ----------
+    frames : List[Trace]
+        Recorridos de los frames en el orden en que se enviaron.
+    packets : List[Trace]
+        Recorridos de los paquetes IP en el orden en que se enviaron.
+    registry : MetricsRegistry
+        Histogramas de latencia y cantidad de saltos por flujo y
+        contadores de frames y paquetes perdidos por flujo.
+    """
+
+    def __init__(self, clock: Callable[[], int]):
+        self.clock = clock
+        self.frames: List[Trace] = []
+        self.packets: List[Trace] = []
+        self._live_frames: Dict[Tuple[str, int], Trace] = {}
+        self._arp_waiting: Dict[Tuple[str, Tuple[int, ...]], List[Trace]] = {}
+        self._received: Dict[Tuple[str, int], Trace] = {}
+        self._incoming: Dict[str, Trace] = {}
+        self._streamed: Dict[Tuple[str, int], List[Tuple[int, str, str]]] = {}
+        self._peers: Dict[Port, Port] = {}
+        self._attached = set()
+
+        self.registry = reg = MetricsRegistry()
+        flow_labels = ('source', 'destination')
+        self.frame_latency = reg.histogram(
+            'nesim_frame_latency_ms',
+            'Time from send_frame to the delivery of a frame.', flow_labels,
+            buckets=LATENCY_BUCKETS)
+        self.frame_hops = reg.histogram(
+            'nesim_frame_hops', 'Switches traversed by a delivered frame.',
+            flow_labels, buckets=HOP_BUCKETS)
+        self.packet_latency = reg.histogram(
+            'nesim_packet_latency_ms',
+            'Time from the first send to the delivery of an IP packet.',
+            flow_labels, buckets=LATENCY_BUCKETS)
+        self.packet_hops = reg.histogram(
+            'nesim_packet_hops', 'Routers that forwarded a delivered packet.',
+            flow_labels, buckets=HOP_BUCKETS)
+        self.lost = reg.counter(
+            'nesim_flow_lost_total',
+            'Frames and packets dropped or not delivered by the end.',
+            ('kind',) + flow_labels)
+
+    def attach(self, device: Device):
+        """
+        Conecta el seguimiento a los callbacks de un dispositivo.
+
+        Conectar varias veces el mismo dispositivo no tiene efecto.
+
+        Parameters
+        ----------
+        device : Device
+            Dispositivo a conectar.
+        """
+
+        if id(device) in self._attached or isinstance(device, Hub):
+            return
+        self._attached.add(id(device))
+
+        device.on_frame.append(
+            lambda event, port, frame, trace_id: self._on_frame(
+                device, event, port, frame, trace_id))
+        for port, send_receiver in enumerate(device.ports):
+            if isinstance(send_receiver, SendReceiver):
+                send_receiver.on_drop.append(
+                    self._drop_observer(device, port))
+
+        if isinstance(device, Switch):
+            device.on_forward.append(
+                lambda in_port, out_port: self._on_forward(
+                    device, in_port, out_port, 'forward'))
+            device.on_flood.append(
+                lambda in_port: self._on_forward(
+                    device, in_port, in_port, 'flood'))
+
+        if hasattr(device, 'on_arp_miss'):
+            device.on_arp_miss.append(lambda ip: self._on_arp_miss(device, ip))
+
+        if isinstance(device, Host):
+            device.on_data_received.append(
+                lambda frame, error: self._on_data(device, frame, error))
+            device.on_payload_received.append(
+                lambda packet, _: self._on_payload(device, packet))
+
+    def set_links(self, peers: Dict[Port, Port]):
+        """
+        Actualiza los cables de la topología, usados para calcular la
+        cantidad de switches que atraviesa cada frame.
+
+        Parameters
+        ----------
+        peers : Dict[Port, Port]
+            Puerto del otro extremo del cable conectado a cada puerto (ver
+            ``nesim.topology.links``).
+        """
+
+        self._peers = peers
+
+    # Frames
+
+    def _on_frame(self, device: Device, event: str, port: int, frame: Frame,
+                  trace_id: Tuple[str, int]):
+        if event == 'sent':
+            self._frame_sent(device, port, frame, trace_id)
+            return
+
+        trace = self._live_frames.get(trace_id)
+        if isinstance(device, FrameSender):
+            # Packet carried by the frame, routed or delivered right after
+            self._incoming[device.name] = \
+                trace.packet if trace is not None else None
+        if trace is None:
+            return
+        time = self.clock()
+        port_name = device.port_name(port)
+        hops = self._hops(trace, device, port)
+        trace.reached.setdefault(device.name, hops)
+
+        if isinstance(device, Switch):
+            for forward in self._streamed.pop((device.name, port), ()):
+                trace.events.append((forward[0], device.name) + forward[1:])
+            trace.events.append((time, device.name, port_name, 'receive'))
+            self._received[(device.name, port)] = trace
+            return
+
+        if isinstance(device, Host):
+            # The frame is delivered (or discarded) after checking errors
+            self._received[(device.name, 0)] = trace
+            return
+
+        self._deliver_frame(trace, device, port, frame, time)
+
+    def _frame_sent(self, device: Device, port: int, frame: Frame,
+                    trace_id: Tuple[str, int]):
+        time = self.clock()
+        to_mac = from_bit_data_to_hex(
+            from_number_to_bit_data(frame.to_mac, 16))
+        trace = Trace('frame', len(self.frames) + 1, device.name, to_mac,
+                      time, trace_id)
+        trace.events.append((time, device.name, device.port_name(port),
+                             'send'))
+        trace.reached[device.name] = 0
+        self.frames.append(trace)
+        # A broadcast is never finished
+        self._live_frames[trace_id] = trace
+
+        packet = frame.ip_packet
+        if packet is not None:
+            trace.packet = self._packet_sent(device, port, packet, time)
+
+    def _hops(self, trace: Trace, device: Device, port: int) -> int:
+        # Closest device (through hubs) already reached by the frame
+        hops = None
+        seen = set()
+        pending = [self._peers.get((device, port))]
+        while pending:
+            peer = pending.pop()
+            if peer is None:
+                continue
+            dev, index = peer
+            if dev.name in trace.reached:
+                hops = trace.reached[dev.name]
+                break
+            if isinstance(dev, Hub) and id(dev) not in seen:
+                seen.add(id(dev))
+                pending.extend(self._peers.get((dev, i))
+                               for i in range(len(dev.ports)) if i != index)
+        if hops is None:
+            hops = max(trace.reached.values())
+        if isinstance(device, Switch):
+            hops += 1
+        return hops
+
+    @staticmethod
+    def _is_addressed(device: FrameSender, port: int, frame: Frame) -> bool:
+        if frame.to_mac == 0xFFFF:
+            return True
+        mac = device.mac_addrs.get(port + 1)
+        return mac is not None and \
+            from_bit_data_to_number(mac) == frame.to_mac
+
+    def _deliver_frame(self, trace: Trace, device: Device, port: int,
+                       frame: Frame, time: int):
+        port_name = device.port_name(port)
+        if not self._is_addressed(device, port, frame):
+            trace.events.append((time, device.name, port_name, 'receive'))
+            return
+
+        trace.events.append((time, device.name, port_name, 'deliver'))
+        hops = trace.reached[device.name]
+        self.frame_latency.observe(trace.flow, time - trace.start)
+        self.frame_hops.observe(trace.flow, hops)
+        if frame.to_mac != 0xFFFF:
+            self._finish(trace)
+
+    def _on_data(self, host: Host, frame: Frame, error: bool):
+        trace = self._received.pop((host.name, 0), None)
+        if trace is None:
+            return
+        time = self.clock()
+        if not error:
+            self._deliver_frame(trace, host, 0, frame, time)
+            return
+
+        trace.events.append((time, host.name, host.port_name(0), 'error'))
+        if frame.to_mac != 0xFFFF and self._is_addressed(host, 0, frame):
+            self._lose(trace)
+
+    def _on_forward(self, switch: Switch, in_port: int, out_port: int,
+                    event: str):
+        time = self.clock()
+        port_name = switch.port_name(out_port)
+        if switch.is_streaming(in_port):
+            # The frame is forwarded before being received completely
+            self._streamed[(switch.name, in_port)] = [(time, port_name, event)]
+            return
+        trace = self._received.get((switch.name, in_port))
+        if trace is not None:
+            trace.events.append((time, switch.name, port_name, event))
+
+    def _drop_observer(self, device: Device, port: int):
+        port_name = device.port_name(port)
+
+        def _drop(package: List[int], trace_id: Tuple[str, int]):
+            trace = self._live_frames.get(trace_id)
+            if trace is None:
+                return
+            trace.events.append((self.clock(), device.name, port_name,
+                                 'drop'))
+            if trace.destination != 'FFFF':
+                self._lose(trace)
+        return _drop
+
+    # Packets
+
+    def _packet_sent(self, device: Device, port: int, packet: IPPacket,
+                     time: int) -> Trace:
+        key = tuple(packet.bit_data)
+        port_name = device.port_name(port)
+        trace = self._pop_arp_waiting(device, key)
+        if packet.from_ip in device.ips.values():
+            if trace is None:
+                trace = self._new_packet(packet, time, key)
+            trace.events.append((time, device.name, port_name, 'send'))
+            return trace
+
+        if trace is None:
+            trace = self._packet_trace(device, key)
+            if trace is None:
+                return None
+        trace.hops += 1
+        trace.events.append((time, device.name, port_name, 'forward'))
+        return trace
+
+    def _packet_trace(self, device: Device, key: Tuple[int, ...]) -> Trace:
+        # The packet of the last frame received by the device
+        trace = self._incoming.pop(device.name, None)
+        if trace is None or trace.finished or trace.key != key:
+            return None
+        return trace
+
+    def _pop_arp_waiting(self, device: Device,
+                         key: Tuple[int, ...]) -> Trace:
+        waiting = self._arp_waiting.get((device.name, key))
+        if not waiting:
+            return None
+        trace = waiting.pop(0)
+        if not waiting:
+            del self._arp_waiting[(device.name, key)]
+        return trace
+
+    def _new_packet(self, packet: IPPacket, time: int,
+                    key: Tuple[int, ...]) -> Trace:
+        trace = Trace('packet', len(self.packets) + 1, str(packet.from_ip),
+                      str(packet.to_ip), time, key)
+        self.packets.append(trace)
+        return trace
+
+    def _on_arp_miss(self, device: Device, ip):
+        # The packet is traced from the moment it waits for the ARPQ
+        bit_data = device.waiting_for_arpq[ip][-1]
+        valid, packet = IPPacket.parse(bit_data)
+        if not valid:
+            return
+        key = tuple(packet.bit_data)
+        time = self.clock()
+        if packet.from_ip in device.ips.values():
+            trace = self._new_packet(packet, time, key)
+        else:
+            trace = self._packet_trace(device, key)
+            if trace is None:
+                return
+        trace.events.append((time, device.name, '', 'arp_wait'))
+        self._arp_waiting.setdefault((device.name, key), []).append(trace)
+
+    def _on_payload(self, host: Host, packet: IPPacket):
+        trace = self._packet_trace(host, tuple(packet.bit_data))
+        if trace is None:
+            return
+        time = self.clock()
+        trace.events.append((time, host.name, host.port_name(0), 'deliver'))
+        self.packet_latency.observe(trace.flow, time - trace.start)
+        self.packet_hops.observe(trace.flow, trace.hops)
+        self._finish(trace)
+
+    # Results
+
+    def _finish(self, trace: Trace):
+        trace.finished = True
+        if trace.kind == 'frame':
+            self._live_frames.pop(trace.key, None)
+
+    def _lose(self, trace: Trace):
+        # A lost frame also loses the packet it carries
+        self._finish(trace)
+        self.lost.inc((trace.kind,) + trace.flow)
+        packet = trace.packet
+        if packet is not None and not packet.finished:
+            packet.events.append(trace.events[-1])
+            self._finish(packet)
+            self.lost.inc((packet.kind,) + packet.flow)
+
+    def write(self, path: str, hops_file: str, histograms_file: str):
+        """
+        Escribe los resultados del seguimiento.
+
+        Los frames (no broadcast) y paquetes que no llegaron a su destino
+        al terminar la simulación se cuentan como perdidos.
+
+        Parameters
+        ----------
+        path : str
+            Carpeta donde se escriben los archivos.
+        hops_file : str
+            Nombre del archivo CSV con los eventos de cada frame y paquete
+            (``kind, id, time, device, port, event``).
+        histograms_file : str
+            Nombre del archivo con los histogramas en formato de texto de
+            Prometheus.
+        """
+
+        for trace in self.frames + self.packets:
+            if not trace.finished and trace.destination != 'FFFF' and \
+               trace.destination != '255.255.255.255':
+                trace.finished = True
+                self.lost.inc((trace.kind,) + trace.flow)
+        self._live_frames.clear()
+
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        with open(str(path / hops_file), 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(('kind', 'id', 'time', 'device', 'port', 'event'))
+            for trace in self.frames + self.packets:
+                writer.writerows((trace.kind, trace.trace_id) + event
+                                 for event in trace.events)
+        self.registry.write(str(path / histograms_file))
+
@@ -1,22 +1,160 @@
 from __future__ import annotations
-from typing import List
-from random import randint, random
+import copy
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from nesim.rng import randint, random
 from nesim.ip import IP, IPPacket
 from nesim import utils
 from nesim.devices.error_detection import get_error_detection_data
 from nesim.devices.utils import data_size, extend_to_byte_divisor, from_bit_data_to_hex, from_bit_data_to_number, from_number_to_bit_data, from_str_to_bin
 
 
+_NOT_PARSED = object()
+_ARPQ = from_str_to_bin('ARPQ')
+
+
+class FrameCache():
+    """
+    Caché LRU de frames codificados.
+
+    Los frames se guardan según la mac destino, la mac origen, los datos y
+    el algoritmo de detección de errores usado. La cantidad máxima de
+    frames guardados es ``CONFIG['frame_cache_size']`` (``0`` desactiva la
+    caché). Las operaciones se pueden usar desde varios hilos (ver
+    ``nesim.parallel``).
+
+    Attributes
+    ----------
+    hits : int
+        Cantidad de frames encontrados en la caché.
+    misses : int
+        Cantidad de frames no encontrados en la caché.
+    """
+
+    def __init__(self):
+        self._frames: OrderedDict[Tuple, Frame] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Frame:
+        """
+        Busca un frame en la caché.
+
+        Parameters
+        ----------
+        key : Tuple
+            Llave del frame.
+
+        Returns
+        -------
+        Frame
+            Frame guardado, ``None`` si no se encuentra.
+        """
+
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key: Tuple, frame: Frame):
+        """
+        Guarda un frame en la caché, descartando el usado hace más tiempo
+        si la caché está llena.
+
+        Parameters
+        ----------
+        key : Tuple
+            Llave del frame.
+        frame : Frame
+            Frame a guardar.
+        """
+
+        max_size = utils.CONFIG['frame_cache_size']
+        if max_size <= 0:
+            return
+        with self._lock:
+            self._frames[key] = frame
+            while len(self._frames) > max_size:
+                self._frames.popitem(last=False)
+
+    def clear(self):
+        """Elimina los frames guardados y reinicia las estadísticas."""
+
+        with self._lock:
+            self._frames.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> Dict[str, float]:
+        """
+        Estadísticas de la caché.
+
+        Returns
+        -------
+        Dict[str, float]
+            Aciertos (``hits``), fallos (``misses``), frames guardados
+            (``size``) y proporción de aciertos (``hit_rate``).
+        """
+
+        with self._lock:
+            hits, misses, size = self.hits, self.misses, len(self._frames)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'size': size,
+            'hit_rate': hits / total if total else 0.0,
+        }
+
+
+FRAME_CACHE = FrameCache()
+
+
 class Frame():
+    """
+    Representa un frame.
+
+    Al construirse solo se decodifican los tamaños de los datos y de la
+    corrección de errores (necesarios para saber si el frame está
+    completo). El resto de los campos se decodifican la primera vez que se
+    accede a ellos.
+
+    Parameters
+    ----------
+    bit_data : List[int]
+        Bits del frame.
+
+    Attributes
+    ----------
+    is_valid : bool
+        Indica si ``bit_data`` contiene un frame completo.
+    bit_data : List[int]
+        Bits del frame.
+    frame_data_size : int
+        Tamaño de los datos en bits.
+    error_size : int
+        Tamaño de los datos de corrección de errores en bits.
+    """
 
     def __init__(self, bit_data: List[int]) -> None:
         self.is_valid = False
+        self.bit_data = bit_data
+        self._to_mac = None
+        self._from_mac = None
+        self._data = None
+        self._error_data = None
+        self._is_arpq = None
+        self._ip_packet = _NOT_PARSED
 
         if len(bit_data) < 48:
             return
 
-        self.to_mac = from_bit_data_to_number(bit_data[:16])
-        self.from_mac = from_bit_data_to_number(bit_data[16:32])
         self.frame_data_size = from_bit_data_to_number(bit_data[32:40]) * 8
         self.error_size = from_bit_data_to_number(bit_data[40:48]) * 8
         total_size = self.frame_data_size + self.error_size
@@ -24,32 +162,81 @@ class Frame():
         if len(bit_data) - 48 < total_size:
             return
 
-        top_data_pos = 48 + 8*self.frame_data_size
-        self.data = bit_data[48: top_data_pos]
-        self.error_data = bit_data[top_data_pos: top_data_pos + 8 * self.error_size]
-        self.bit_data = bit_data
         self.is_valid = True
-        self.additional_info = ''
-
-        if self.frame_data_size / 8 == 8:
-            arpq = from_str_to_bin('ARPQ')
-            ip = ''.join(map(str, self.data[32:64]))
-            mac_dest_str = ''.join(map(str, bit_data[:16]))
-            arpq_data = ''.join(map(str, self.data[:32]))
-            if arpq_data.endswith(arpq):
-                if mac_dest_str == '1'*16:
-                    self.additional_info = f'(ARPQ) Who is {IP.from_bin(ip)} ?'
-                else:
-                    self.additional_info = '(ARPQ) response'
+
+    @property
+    def to_mac(self) -> int:
+        """int : Mac destino."""
+        if self._to_mac is None:
+            self._to_mac = from_bit_data_to_number(self.bit_data[:16])
+        return self._to_mac
+
+    @property
+    def from_mac(self) -> int:
+        """int : Mac origen."""
+        if self._from_mac is None:
+            self._from_mac = from_bit_data_to_number(self.bit_data[16:32])
+        return self._from_mac
+
+    @property
+    def data(self) -> List[int]:
+        """List[int] : Datos del frame."""
+        if self._data is None:
+            top_data_pos = 48 + 8*self.frame_data_size
+            self._data = self.bit_data[48: top_data_pos]
+        return self._data
+
+    @property
+    def error_data(self) -> List[int]:
+        """List[int] : Datos de corrección de errores del frame."""
+        if self._error_data is None:
+            top_data_pos = 48 + 8*self.frame_data_size
+            self._error_data = \
+                self.bit_data[top_data_pos: top_data_pos + 8 * self.error_size]
+        return self._error_data
+
+    @property
+    def is_arpq(self) -> bool:
+        """bool : Indica si el frame es una pregunta o respuesta ARPQ."""
+        if self._is_arpq is None:
+            self._is_arpq = False
+            if self.frame_data_size / 8 == 8:
+                arpq_data = ''.join(map(str, self.data[:32]))
+                self._is_arpq = arpq_data.endswith(_ARPQ)
+        return self._is_arpq
+
+    @property
+    def additional_info(self) -> str:
+        """str : Información adicional del frame (protocolo ARPQ)."""
+        if not self.is_arpq:
+            return ''
+        if self.to_mac == 0xFFFF:
+            return f'(ARPQ) Who is {IP.from_bit_data(self.data[32:64])} ?'
+        return '(ARPQ) response'
+
+    @property
+    def ip_packet(self) -> IPPacket:
+        """
+        IPPacket : Paquete IP contenido en el frame (``None`` si los datos
+        del frame no son un paquete IP válido).
+
+        Los datos se parsean solo la primera vez que se accede.
+        """
+
+        if self._ip_packet is _NOT_PARSED:
+            valid, packet = IPPacket.parse(self.data)
+            self._ip_packet = packet if valid else None
+        return self._ip_packet
 
     def __str__(self) -> str:
         from_mac = from_bit_data_to_hex(from_number_to_bit_data(self.from_mac, 16))
         to_mac = from_bit_data_to_hex(from_number_to_bit_data(self.to_mac, 16))
 
-        data = from_bit_data_to_hex(self.data)
-        valid, packet = IPPacket.parse(self.data)
-        if valid:
+        packet = self.ip_packet
+        if packet is not None:
             data = str(packet)
+        else:
+            data = from_bit_data_to_hex(self.data)
 
         return f'{from_mac} -> {to_mac} | {data} | {self.additional_info}'
 
@@ -58,14 +245,44 @@ class Frame():
 
     @staticmethod
     def build(dest_mac: List[int], orig_mac: List[int], data: List[int]) -> Frame:
+        """
+        Construye un frame.
+
+        Los frames construidos se guardan en ``FRAME_CACHE``, por lo que
+        construir de nuevo el mismo frame no vuelve a calcular los datos de
+        detección de errores. La caché no se usa si se introduce un error
+        en los datos (con probabilidad ``CONFIG['error_prob']``).
+
+        Parameters
+        ----------
+        dest_mac : List[int]
+            Mac destino.
+        orig_mac : List[int]
+            Mac origen.
+        data : List[int]
+            Datos del frame.
+
+        Returns
+        -------
+        Frame
+            Frame construido.
+        """
+
+        algorithm = utils.CONFIG['error_detection']
+        flip = random() < utils.CONFIG['error_prob']
+        if not flip:
+            key = (tuple(dest_mac), tuple(orig_mac), tuple(data), algorithm)
+            frame = FRAME_CACHE.get(key)
+            if frame is not None:
+                return copy.copy(frame)
+
         data = extend_to_byte_divisor(data)
 
-        e_size, e_data = get_error_detection_data(
-            data, utils.CONFIG['error_detection']
-        )
+        e_size, e_data = get_error_detection_data(data, algorithm)
 
-        rand = random()
-        if rand < utils.CONFIG['error_prob']:
+        if flip:
+            # The data may be the caller's list, which must not change.
+            data = list(data)
             ind = randint(0, len(data) - 1)
             data[ind] = (data[ind] + 1) % 2
 
@@ -78,4 +295,6 @@ class Frame():
                      e_data
 
         frame = Frame(final_data)
+        if not flip:
+            FRAME_CACHE.put(key, copy.copy(frame))
         return frame
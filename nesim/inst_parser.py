@@ -1,19 +1,31 @@
+import re
 from nesim.devices.router import Route
+from nesim.devices.switch import SWITCH_MODES
 from nesim.ip import IP
-from typing import List
+from typing import TYPE_CHECKING, Iterator, List
 from pathlib import Path
 from nesim.instructions import (
+    AllToAllTrafficIns,
+    CBRTrafficIns,
     CreateHostIns,
     CreateHubIns, CreateRouterIns,
     CreateSwitchIns,
-    IPIns, Instruction,
-    MacIns, PingIns, RouteIns, SendIPPackage,
+    IPIns, IPRangeIns, Instruction,
+    MacIns, MacRangeIns, OnOffTrafficIns, PingIns, PoissonTrafficIns,
+    QueueIns, RepeatIns, RouteIns,
+    SendIPPackage,
     SendIns,
     SendFrameIns,
     ConnectIns,
     DisconnectIns
 )
 
+if TYPE_CHECKING:
+    import asyncio
+
+_TEMPLATE_RE = re.compile(r'\{(\w+)(?:([-+*])(\d+))?(?::([^{}]*))?\}')
+_IP_RE = re.compile(r'\d+\.\d+\.\d+\.\d+')
+
 def _to_binary(hex_num: str, fmt: str = '016b'):
     """Convierte una representación hexagesimal a binaria.
 
@@ -32,6 +44,82 @@ def _to_binary(hex_num: str, fmt: str = '016b'):
 
     return format(int(hex_num, base=16), fmt)
 
+def _split_interface(device_name: str):
+    interfase = 1
+    if ':' in device_name:
+        device_name, interfase_str = device_name.split(':')
+        interfase = int(interfase_str)
+    return device_name, interfase
+
+def _parse_target(target: str):
+    if _IP_RE.fullmatch(target):
+        return IP.from_str(target)
+    return target
+
+def _parse_traffic(inst_time: int, temp_line: List[str]):
+    kind = temp_line[2]
+    if kind == 'all':
+        hosts = None if temp_line[3] == '*' else temp_line[3].split(',')
+        interval, duration = int(temp_line[4]), int(temp_line[6])
+        data = [int(i) for i in _to_binary(temp_line[5])]
+        mode = temp_line[7] if len(temp_line) > 7 else 'mac'
+        if mode not in ('mac', 'ip'):
+            raise ValueError(f'Unknown traffic mode {mode}')
+        return AllToAllTrafficIns(inst_time, data, duration, interval, hosts,
+                                  mode == 'ip')
+
+    source, target = temp_line[3], _parse_target(temp_line[4])
+    data = [int(i) for i in _to_binary(temp_line[6])]
+    duration = int(temp_line[7])
+    if kind == 'cbr':
+        return CBRTrafficIns(inst_time, source, target, data, duration,
+                             int(temp_line[5]))
+    if kind == 'poisson':
+        return PoissonTrafficIns(inst_time, source, target, data, duration,
+                                 float(temp_line[5]))
+    if kind == 'onoff':
+        return OnOffTrafficIns(inst_time, source, target, data, duration,
+                               int(temp_line[5]), int(temp_line[8]),
+                               int(temp_line[9]))
+    raise ValueError(f'Unknown traffic generator {kind}')
+
+def substitute(text: str, var: str, value: int) -> str:
+    """Sustituye las apariciones de una variable de un bloque ``repeat``.
+
+    Las apariciones son de la forma ``{var}``, ``{var<op><n>}`` (donde
+    ``op`` es ``+``, ``-`` o ``*``) y opcionalmente pueden incluir un
+    formato: ``{var:04X}``, ``{var+1:02x}``.
+
+    Parameters
+    ----------
+    text : str
+        Texto donde se sustituye la variable.
+    var : str
+        Nombre de la variable.
+    value : int
+        Valor de la variable.
+
+    Returns
+    -------
+    str
+        Texto con la variable sustituida.
+    """
+
+    def _repl(match):
+        name, oper, operand, fmt = match.groups()
+        if name != var:
+            return match.group(0)
+        result = value
+        if oper == '+':
+            result += int(operand)
+        elif oper == '-':
+            result -= int(operand)
+        elif oper == '*':
+            result *= int(operand)
+        return format(result, fmt or '')
+
+    return _TEMPLATE_RE.sub(_repl, text)
+
 def _parse_single_inst(inst_text: str):
 
     temp_line = inst_text.split()
@@ -46,7 +134,10 @@ def _parse_single_inst(inst_text: str):
             return CreateHubIns(inst_time, device_name, cant_ports)
         if device_type == 'switch':
             cant_ports = int(temp_line[4])
-            return CreateSwitchIns(inst_time, device_name, cant_ports)
+            mode = temp_line[5] if len(temp_line) > 5 else 'store_and_forward'
+            if mode not in SWITCH_MODES:
+                raise ValueError(f'Unknown switch mode {mode}')
+            return CreateSwitchIns(inst_time, device_name, cant_ports, mode)
         if device_type == 'router':
             cant_ports = int(temp_line[4])
             return CreateRouterIns(inst_time, device_name, cant_ports)
@@ -55,7 +146,8 @@ def _parse_single_inst(inst_text: str):
     elif inst_name == 'connect':
         first_port = temp_line[2]
         second_port = temp_line[3]
-        return ConnectIns(inst_time, first_port, second_port)
+        signal_time = int(temp_line[4]) if len(temp_line) > 4 else None
+        return ConnectIns(inst_time, first_port, second_port, signal_time)
 
     elif inst_name == 'send':
         host_name = temp_line[2]
@@ -63,24 +155,31 @@ def _parse_single_inst(inst_text: str):
         return SendIns(inst_time, host_name, data)
 
     elif inst_name == 'mac':
-        host_name = temp_line[2]
-        interfase = 1
-        if ':' in host_name:
-            host_name, interfase_str = host_name.split(':')
-            interfase = int(interfase_str)
+        host_name, interfase = _split_interface(temp_line[2])
         address = [int(i) for i in _to_binary(temp_line[3])]
         return MacIns(inst_time, host_name, interfase, address)
 
     elif inst_name == 'ip':
-        host_name = temp_line[2]
-        interfase = 1
-        if ':' in host_name:
-            host_name, interfase_str = host_name.split(':')
-            interfase = int(interfase_str)
+        host_name, interfase = _split_interface(temp_line[2])
         ip = IP.from_str(temp_line[3])
         mask = IP.from_str(temp_line[4])
         return IPIns(inst_time, host_name, interfase, ip, mask)
 
+    elif inst_name == 'mac_range':
+        name_template, interfase = _split_interface(temp_line[2])
+        start, stop = int(temp_line[3]), int(temp_line[4])
+        first_mac = int(temp_line[5], base=16)
+        return MacRangeIns(inst_time, name_template, interfase, start, stop,
+                           first_mac)
+
+    elif inst_name == 'ip_range':
+        name_template, interfase = _split_interface(temp_line[2])
+        start, stop = int(temp_line[3]), int(temp_line[4])
+        first_ip = IP.from_str(temp_line[5])
+        mask = IP.from_str(temp_line[6])
+        return IPRangeIns(inst_time, name_template, interfase, start, stop,
+                          first_ip, mask)
+
     elif inst_name == 'send_frame':
         host_name = temp_line[2]
         mac = [int(i) for i in _to_binary(temp_line[3])]
@@ -103,8 +202,18 @@ def _parse_single_inst(inst_text: str):
             PingIns(inst_time + 300, host_name, ip)
         ]
 
+    elif inst_name == 'queue':
+        target = temp_line[2]
+        capacity = int(temp_line[3])
+        unit = temp_line[4] if len(temp_line) > 4 else 'frames'
+        policy = temp_line[5] if len(temp_line) > 5 else 'tail'
+        return QueueIns(inst_time, target, capacity, unit, policy)
+
     elif inst_name == 'route':
         action = temp_line[2]
+        if action == 'auto':
+            return RouteIns(inst_time, action='auto')
+
         device_name = temp_line[3]
 
         if action == 'reset':
@@ -117,10 +226,91 @@ def _parse_single_inst(inst_text: str):
         return RouteIns(inst_time, device_name, action, dest_ip, mask,
                         gateway, interface)
 
-    else:
+    elif inst_name == 'traffic':
+        return _parse_traffic(inst_time, temp_line)
+
+    elif inst_name == 'disconnect':
         port_name = temp_line[2]
         return DisconnectIns(inst_time, port_name)
 
+    raise ValueError(f'Unknown instruction {inst_name}')
+
+def _parse_repeat_header(inst_text: str, body: List[str]) -> RepeatIns:
+    temp_line = inst_text.split()
+    inst_time = int(temp_line[0])
+    var = temp_line[2]
+    start, stop = int(temp_line[3]), int(temp_line[4])
+    step = int(temp_line[5]) if len(temp_line) > 5 else 1
+    return RepeatIns(inst_time, var, start, stop, body, step)
+
+def _is_repeat_header(line: str) -> bool:
+    temp_line = line.split()
+    return len(temp_line) > 1 and temp_line[1] == 'repeat'
+
+def iter_instructions(instr_lines: List[str],
+                      base_time: int = 0) -> Iterator[Instruction]:
+    """
+    Parsea una lista de instrucciones de forma perezosa.
+
+    Los bloques ``repeat`` no se expanden: se devuelven como una única
+    instrucción :class:`~instructions.RepeatIns` que genera sus
+    instrucciones al ser ejecutada.
+
+    Parameters
+    ----------
+    instr_lines : List[str]
+        Lista de instrucciones en modo de texto.
+    base_time : int, optional
+        Tiempo que se suma al de cada instrucción, por defecto 0.
+
+    Yields
+    ------
+    Instruction
+        Instrucciones en el orden en que fueron escritas.
+
+    Raises
+    ------
+    ValueError
+        Si alguna instrucción es inválida o algún bloque ``repeat`` no está
+        cerrado con ``end``.
+    """
+
+    block_header, block_body, depth = None, [], 0
+    for line in instr_lines:
+        if block_header is not None:
+            stripped = line.strip()
+            if stripped == 'end':
+                depth -= 1
+                if depth == 0:
+                    block = _parse_repeat_header(block_header, block_body)
+                    block.time += base_time
+                    yield block
+                    block_header, block_body = None, []
+                    continue
+            elif _is_repeat_header(stripped):
+                depth += 1
+            block_body.append(stripped)
+            continue
+
+        if not line.strip() or line.startswith('#') or line.startswith(' '):
+            continue
+        if _is_repeat_header(line):
+            block_header, depth = line, 1
+            continue
+        try:
+            inst = _parse_single_inst(line)
+        except (ValueError, IndexError) as exc:
+            raise ValueError(
+                f"Invalid instruction '{line.strip()}': {exc}") from exc
+        if isinstance(inst, Instruction):
+            inst = [inst]
+        for ins in inst:
+            ins.time += base_time
+            yield ins
+
+    if block_header is not None:
+        raise ValueError(f"Missing 'end' for block '{block_header.strip()}'")
+
 def parse_instructions(instr_lines: List[str]):
     """
     Parsea una lista de instrucciones.
@@ -135,18 +325,51 @@ def parse_instructions(instr_lines: List[str]):
     List[Instruction]
         Lista de instrucciones.
     """
-    instructions = []
-    for line in instr_lines:
-        if line == '\n' or line.startswith('#') or line.startswith(' '):
-            continue
-        inst = _parse_single_inst(line)
-        if isinstance(inst, Instruction):
-            instructions.append(inst)
-        elif isinstance(inst, list):
-            instructions += inst
+    instructions = list(iter_instructions(instr_lines))
     instructions.sort(key=lambda inst: inst.time)
     return instructions
 
+async def feed_instructions(lines, queue: 'asyncio.Queue',
+                            close: bool = True):
+    """
+    Parsea instrucciones desde una fuente asíncrona de líneas (por ejemplo
+    un ``asyncio.StreamReader`` conectado a la entrada estándar o a un
+    pipe) y las añade a una cola a medida que llegan.
+
+    Los bloques ``repeat`` se añaden una vez leída la línea ``end``
+    correspondiente.
+
+    Parameters
+    ----------
+    lines : AsyncIterable[Union[str, bytes]]
+        Fuente de líneas.
+    queue : asyncio.Queue
+        Cola a la que se añaden las instrucciones.
+    close : bool, optional
+        Si es ``True`` se añade ``None`` a la cola al agotarse la fuente,
+        por defecto ``True``.
+    """
+
+    pending, depth = [], 0
+    async for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode()
+        pending.append(line)
+        if _is_repeat_header(line):
+            depth += 1
+        elif line.strip() == 'end':
+            depth -= 1
+        if depth == 0:
+            for inst in iter_instructions(pending):
+                await queue.put(inst)
+            pending = []
+
+    if pending:
+        for inst in iter_instructions(pending):
+            await queue.put(inst)
+    if close:
+        await queue.put(None)
+
 def load_instructions(inst_path: str = './script.txt'):
     """
     Carga una serie de instrucciones de un archivo.
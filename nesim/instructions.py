@@ -1,6 +1,8 @@
 import abc
-from typing import List
-from nesim.ip import IP
+import random
+from typing import Iterator, List, Union
+from nesim.ip import IP, IPNetwork
+from nesim.devices.utils import from_number_to_bit_data
 import nesim.simulation as sim
 import nesim.devices as dv
 
@@ -92,17 +94,22 @@ class CreateSwitchIns(Instruction):
         Nombre del switch.
     ports_count : int
         Cantidad de puertos del switch.
+    mode : str, optional
+        Modo de conmutación del switch, por defecto
+        ``'store_and_forward'``.
     """
 
-    def __init__(self, time: int, switch_name: str, ports_count: int):
+    def __init__(self, time: int, switch_name: str, ports_count: int,
+                 mode: str = 'store_and_forward'):
         super().__init__(time)
         self.switch_name = switch_name
         self.ports_count = ports_count
+        self.mode = mode
 
     def execute(self, net_sim: sim.NetSimulation):
         print(f'Creating switch: {self.switch_name}')
         switch = dv.Switch(self.switch_name, self.ports_count, 
-                           net_sim.signal_time)
+                           net_sim.signal_time, self.mode)
         net_sim.add_device(switch)
 
 class CreateRouterIns(Instruction):
@@ -143,16 +150,20 @@ class ConnectIns(Instruction):
         la simulación.
     port1, port2 : str
         Nombre de los puertos a conectar.
+    signal_time : int, optional
+        ``Signal time`` del cable, por defecto el de la simulación.
     """
 
-    def __init__(self, time: int, port1: str, port2: str):
+    def __init__(self, time: int, port1: str, port2: str,
+                 signal_time: int = None):
         super().__init__(time)
         self.port1 = port1
         self.port2 = port2
+        self.signal_time = signal_time
 
     def execute(self, net_sim: sim.NetSimulation):
         print(f'Connecting: {self.port1} - {self.port2}')
-        net_sim.connect(self.port1, self.port2)
+        net_sim.connect(self.port1, self.port2, self.signal_time)
 
 
 class SendIns(Instruction):
@@ -198,6 +209,38 @@ class DisconnectIns(Instruction):
         net_sim.disconnect(self.port_name)
 
 
+class QueueIns(Instruction):
+    """
+    Instrucción para acotar la cola de envío de un puerto o de todos los
+    puertos de un dispositivo.
+
+    Parameters
+    ----------
+    time : int
+        Timepo en milisegundos en el que será ejecutada la instrucción en
+        la simulación.
+    target : str
+        Nombre del puerto o del dispositivo.
+    capacity : int
+        Capacidad de la cola.
+    unit : str, optional
+        Unidad de la capacidad: ``'frames'`` (por defecto) o ``'bits'``.
+    policy : str, optional
+        Política de descarte: ``'tail'`` (por defecto) o ``'red'``.
+    """
+
+    def __init__(self, time: int, target: str, capacity: int,
+                 unit: str = 'frames', policy: str = 'tail'):
+        super().__init__(time)
+        self.target = target
+        self.capacity = capacity
+        self.unit = unit
+        self.policy = policy
+
+    def execute(self, net_sim: sim.NetSimulation):
+        net_sim.set_queue(self.target, self.capacity, self.unit, self.policy)
+
+
 class MacIns(Instruction):
     def __init__(self, time: int, host_name: str, interface: int, address: List[int]):
         super().__init__(time)
@@ -219,6 +262,220 @@ class IPIns(Instruction):
     def execute(self, net_sim: sim.NetSimulation):
         net_sim.assign_ip_addres(self.device_name, self.ip, self.mask, self.interface)
 
+class MacRangeIns(Instruction):
+    """
+    Instrucción para asignar direcciones MAC consecutivas a un rango de
+    dispositivos.
+
+    Parameters
+    ----------
+    time : int
+        Timepo en milisegundos en el que será ejecutada la instrucción en
+        la simulación.
+    name_template : str
+        Nombre de los dispositivos. ``{}`` se sustituye por cada índice
+        del rango.
+    interface : int
+        Interfase a la que se le asigna la dirección.
+    start, stop : int
+        Primer y último índice del rango (ambos incluidos).
+    first_mac : int
+        Dirección MAC asignada al dispositivo ``start``.
+    """
+
+    def __init__(self, time: int, name_template: str, interface: int,
+                 start: int, stop: int, first_mac: int):
+        super().__init__(time)
+        self.name_template = name_template
+        self.interface = interface
+        self.start = start
+        self.stop = stop
+        self.first_mac = first_mac
+
+    def execute(self, net_sim: sim.NetSimulation):
+        for index in range(self.start, self.stop + 1):
+            mac = self.first_mac + index - self.start
+            if mac > 0xFFFF:
+                raise ValueError(f'MAC address out of range for index {index}')
+            net_sim.assign_mac_addres(self.name_template.format(index),
+                                      from_number_to_bit_data(mac, 16),
+                                      self.interface)
+
+class IPRangeIns(Instruction):
+    """
+    Instrucción para asignar direcciones IP consecutivas de una subred a
+    un rango de dispositivos.
+
+    Parameters
+    ----------
+    time : int
+        Timepo en milisegundos en el que será ejecutada la instrucción en
+        la simulación.
+    name_template : str
+        Nombre de los dispositivos. ``{}`` se sustituye por cada índice
+        del rango.
+    interface : int
+        Interfase a la que se le asigna la dirección.
+    start, stop : int
+        Primer y último índice del rango (ambos incluidos).
+    first_ip : IP
+        Dirección IP asignada al dispositivo ``start``.
+    mask : IP
+        Máscara de la subred. Todas las direcciones asignadas deben
+        pertenecer a la subred de ``first_ip``.
+    """
+
+    def __init__(self, time: int, name_template: str, interface: int,
+                 start: int, stop: int, first_ip: IP, mask: IP):
+        super().__init__(time)
+        self.name_template = name_template
+        self.interface = interface
+        self.start = start
+        self.stop = stop
+        self.first_ip = first_ip
+        self.mask = mask
+
+    def execute(self, net_sim: sim.NetSimulation):
+        subnet = IPNetwork(self.first_ip, self.mask)
+        for index in range(self.start, self.stop + 1):
+            ip = IP.from_raw(self.first_ip.raw_value + index - self.start)
+            if ip not in subnet:
+                raise ValueError(
+                    f'IP address out of the subnet for index {index}')
+            net_sim.assign_ip_addres(self.name_template.format(index),
+                                     ip, self.mask, self.interface)
+
+class RepeatIns(Instruction):
+    """
+    Bloque ``repeat`` de instrucciones parametrizadas.
+
+    El bloque se expande de forma perezosa al ejecutarse: las iteraciones
+    se generan en orden y cada una solo cuando llega el tiempo de su
+    primera instrucción. De cada iteración se ejecutan las instrucciones
+    que corresponden al tiempo actual y se planifican en la simulación las
+    restantes. Por tanto, las instrucciones de una iteración no pueden ser
+    anteriores a la primera instrucción de la iteración anterior.
+
+    Parameters
+    ----------
+    time : int
+        Timepo en milisegundos en el que será ejecutada la instrucción en
+        la simulación. Los tiempos de las instrucciones del cuerpo son
+        relativos a este tiempo.
+    var : str
+        Nombre de la variable del bloque.
+    start, stop : int
+        Primer y último valor de la variable (ambos incluidos).
+    body : List[str]
+        Instrucciones del bloque en modo de texto.
+    step : int, optional
+        Incremento de la variable, por defecto 1.
+    """
+
+    def __init__(self, time: int, var: str, start: int, stop: int,
+                 body: List[str], step: int = 1):
+        super().__init__(time)
+        if step <= 0:
+            raise ValueError('The step of a repeat block must be positive')
+        self.var = var
+        self.start = start
+        self.stop = stop
+        self.body = body
+        self.step = step
+
+    def iteration(self, index: int) -> List[Instruction]:
+        """
+        Genera las instrucciones de una iteración del bloque (los bloques
+        ``repeat`` anidados no se expanden).
+
+        Parameters
+        ----------
+        index : int
+            Valor de la variable del bloque.
+
+        Returns
+        -------
+        List[Instruction]
+            Instrucciones de la iteración en orden.
+        """
+
+        # inst_parser imports this module
+        import nesim.inst_parser as inst_parser
+
+        lines = [inst_parser.substitute(line, self.var, index)
+                 for line in self.body]
+        return list(inst_parser.iter_instructions(lines, self.time))
+
+    def expand(self) -> Iterator[Instruction]:
+        """
+        Genera las instrucciones del bloque (los bloques ``repeat``
+        anidados no se expanden).
+
+        Yields
+        ------
+        Instruction
+            Instrucciones del bloque en orden.
+        """
+
+        for index in range(self.start, self.stop + 1, self.step):
+            yield from self.iteration(index)
+
+    def run_from(self, net_sim: sim.NetSimulation, index: int):
+        """
+        Ejecuta las iteraciones del bloque a partir de un valor de la
+        variable hasta encontrar una que comienza más adelante, que se
+        planifica en la simulación.
+
+        Parameters
+        ----------
+        net_sim : sim.NetSimulation
+            Simulación en la que se ejecuta el bloque.
+        index : int
+            Valor de la variable de la primera iteración a ejecutar.
+        """
+
+        while index <= self.stop:
+            instructions = self.iteration(index)
+            index += self.step
+            if not instructions:
+                continue
+            first = min(inst.time for inst in instructions)
+            if first > net_sim.time:
+                net_sim.schedule(
+                    _RepeatIteration(first, self, index, instructions))
+                return
+            _run_or_schedule(net_sim, instructions)
+
+    def execute(self, net_sim: sim.NetSimulation):
+        self.run_from(net_sim, self.start)
+
+
+def _run_or_schedule(net_sim: sim.NetSimulation,
+                     instructions: List[Instruction]):
+    for inst in instructions:
+        if inst.time == net_sim.time:
+            inst.execute(net_sim)
+        else:
+            net_sim.schedule(inst)
+
+
+class _RepeatIteration(Instruction):
+    """
+    Iteración de un bloque ``repeat`` que comienza más adelante. Al
+    ejecutarse continúa con las iteraciones siguientes del bloque.
+    """
+
+    def __init__(self, time: int, block: RepeatIns, next_index: int,
+                 instructions: List[Instruction]):
+        super().__init__(time)
+        self.block = block
+        self.next_index = next_index
+        self.instructions = instructions
+
+    def execute(self, net_sim: sim.NetSimulation):
+        _run_or_schedule(net_sim, self.instructions)
+        self.block.run_from(net_sim, self.next_index)
+
 class SendFrameIns(Instruction):
     def __init__(self, time: int, host_name: str, mac: List[int],
                  data: List[int]):
@@ -269,3 +526,226 @@ class RouteIns(Instruction):
 
     def execute(self, net_sim: sim.NetSimulation):
         net_sim.route(self.device_name, self.action, self.route)
+
+
+class TrafficIns(Instruction):
+    """
+    Representación general de un generador de tráfico.
+
+    Un generador es una única instrucción que al ejecutarse envía los datos
+    y se vuelve a planificar en la simulación para el próximo envío, por lo
+    que los envíos no se crean de antemano.
+
+    Parameters
+    ----------
+    time : int
+        Timepo en milisegundos en el que se realiza el primer envío.
+    source : str
+        Nombre del host que envía los datos.
+    target : Union[str, IP]
+        Destino de los datos: el nombre de un host (se envía un frame a su
+        dirección mac) o una dirección IP (se envía un paquete IP).
+    data : List[int]
+        Datos a enviar en cada envío.
+    duration : int
+        Milisegundos, a partir del primer envío, durante los cuales se
+        genera tráfico.
+
+    Attributes
+    ----------
+    sent : int
+        Cantidad de envíos realizados.
+    """
+
+    def __init__(self, time: int, source: str, target: Union[str, IP],
+                 data: List[int], duration: int):
+        super().__init__(time)
+        if duration <= 0:
+            raise ValueError('The duration of a traffic generator must be '
+                             'positive')
+        self.source = source
+        self.target = target
+        self.data = data
+        self.duration = duration
+        self.start = None
+        self.sent = 0
+
+    @abc.abstractmethod
+    def next_time(self) -> int:
+        """
+        int : Tiempo del próximo envío (mayor que el tiempo actual).
+        """
+
+    @staticmethod
+    def send_to(net_sim: sim.NetSimulation, source: str,
+                target: Union[str, IP], data: List[int]):
+        """
+        Envía datos de un host a otro host o a una dirección IP.
+
+        Raises
+        ------
+        ValueError
+            Si el host destino no existe o no tiene dirección mac.
+        """
+
+        data = list(data)
+        if isinstance(target, IP):
+            net_sim.send_ip_package(source, target, data)
+            return
+
+        host = net_sim.hosts.get(target)
+        if host is None:
+            raise ValueError(f'Unknown host {target}')
+        mac = host.mac_addrs.get(1)
+        if mac is None:
+            raise ValueError(f'Host {target} has no mac address')
+        net_sim.send_frame(source, mac, data)
+
+    def generate(self, net_sim: sim.NetSimulation):
+        """
+        Realiza un envío.
+
+        Parameters
+        ----------
+        net_sim : sim.NetSimulation
+            Simulación en la que se envían los datos.
+        """
+
+        self.send_to(net_sim, self.source, self.target, self.data)
+
+    def execute(self, net_sim: sim.NetSimulation):
+        if self.start is None:
+            self.start = self.time
+        self.generate(net_sim)
+        self.sent += 1
+        next_time = self.next_time()
+        if next_time < self.start + self.duration:
+            self.time = next_time
+            net_sim.schedule(self)
+
+
+class CBRTrafficIns(TrafficIns):
+    """
+    Generador de tráfico a tasa constante: envía los datos cada
+    ``interval`` milisegundos.
+
+    Parameters
+    ----------
+    time, source, target, data, duration
+        Ver :class:`TrafficIns`.
+    interval : int
+        Milisegundos entre un envío y el siguiente.
+    """
+
+    def __init__(self, time: int, source: str, target: Union[str, IP],
+                 data: List[int], duration: int, interval: int):
+        super().__init__(time, source, target, data, duration)
+        if interval <= 0:
+            raise ValueError('The traffic interval must be positive')
+        self.interval = interval
+
+    def next_time(self) -> int:
+        return self.time + self.interval
+
+
+class PoissonTrafficIns(TrafficIns):
+    """
+    Generador de tráfico de Poisson: el tiempo entre un envío y el
+    siguiente sigue una distribución exponencial.
+
+    Parameters
+    ----------
+    time, source, target, data, duration
+        Ver :class:`TrafficIns`.
+    mean_interval : float
+        Media en milisegundos del tiempo entre envíos.
+    """
+
+    def __init__(self, time: int, source: str, target: Union[str, IP],
+                 data: List[int], duration: int, mean_interval: float):
+        super().__init__(time, source, target, data, duration)
+        if mean_interval <= 0:
+            raise ValueError('The traffic interval must be positive')
+        self.mean_interval = mean_interval
+
+    def next_time(self) -> int:
+        wait = round(random.expovariate(1 / self.mean_interval))
+        return self.time + max(1, wait)
+
+
+class OnOffTrafficIns(CBRTrafficIns):
+    """
+    Generador de tráfico en ráfagas: durante ``on_time`` milisegundos
+    envía los datos cada ``interval`` milisegundos y luego no envía nada
+    durante ``off_time`` milisegundos.
+
+    Parameters
+    ----------
+    time, source, target, data, duration, interval
+        Ver :class:`CBRTrafficIns`.
+    on_time, off_time : int
+        Duración de los periodos de envío y de silencio.
+    """
+
+    def __init__(self, time: int, source: str, target: Union[str, IP],
+                 data: List[int], duration: int, interval: int,
+                 on_time: int, off_time: int):
+        super().__init__(time, source, target, data, duration, interval)
+        if on_time <= 0 or off_time < 0:
+            raise ValueError('Invalid on/off times')
+        self.on_time = on_time
+        self.off_time = off_time
+
+    def next_time(self) -> int:
+        next_time = super().next_time()
+        cycle = self.on_time + self.off_time
+        elapsed = next_time - self.start
+        if elapsed % cycle >= self.on_time:
+            next_time = self.start + (elapsed // cycle + 1) * cycle
+        return next_time
+
+
+class AllToAllTrafficIns(CBRTrafficIns):
+    """
+    Generador de tráfico entre todos los pares de un grupo de hosts.
+
+    Cada ``interval`` milisegundos cada host envía los datos a otro host
+    del grupo, rotando los destinos de forma que luego de ``n - 1`` envíos
+    cada host envió datos a todos los demás.
+
+    Parameters
+    ----------
+    time, data, duration, interval
+        Ver :class:`CBRTrafficIns`.
+    hosts : List[str], optional
+        Nombres de los hosts del grupo. Si no se especifica se usan todos
+        los hosts conectados en la simulación en cada envío.
+    by_ip : bool, optional
+        Si es ``True`` se envían paquetes a la dirección IP de la interfaz
+        1 de cada host en lugar de frames a su dirección mac. Por defecto
+        es ``False``.
+    """
+
+    def __init__(self, time: int, data: List[int], duration: int,
+                 interval: int, hosts: List[str] = None,
+                 by_ip: bool = False):
+        super().__init__(time, None, None, data, duration, interval)
+        self.hosts = hosts
+        self.by_ip = by_ip
+
+    def generate(self, net_sim: sim.NetSimulation):
+        hosts = self.hosts
+        if hosts is None:
+            hosts = sorted(net_sim.hosts)
+        count = len(hosts)
+        if count < 2:
+            return
+        shift = 1 + self.sent % (count - 1)
+        for index, source in enumerate(hosts):
+            target = hosts[(index + shift) % count]
+            if self.by_ip:
+                host = net_sim.hosts.get(target)
+                if host is None or 1 not in host.ips:
+                    raise ValueError(f'Host {target} has no ip address')
+                target = host.ips[1]
+            self.send_to(net_sim, source, target, self.data)
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import weakref
 from io import UnsupportedOperation
 from typing import List, Tuple
 from nesim.devices.utils import (
@@ -20,33 +21,81 @@ PAYLOAD_TABLE = {
 class IP():
     """IP basic class
 
+    IPs are immutable and interned: building the same address twice returns
+    the same object, so they can be compared by identity and used as
+    dictionary keys. The binary forms are computed once and cached.
+
     Raises
     ------
     ValueError
         If the given values are not between 0 and 255
     """
 
-    def __init__(self, *numbers):
-        self.raw_value = 0
-        for i in range(len(numbers)):
-            num = numbers[-(i + 1)]
+    __slots__ = ('raw_value', '_bits', '_str', '__weakref__')
+
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, *numbers):
+        if len(numbers) > 4:
+            raise ValueError('An IP has at most 4 numbers')
+        raw_value = 0
+        for num in numbers:
             if not 0 <= num <= 255:
                 raise ValueError('IP numbers mut be between 0 and 255')
+            raw_value = (raw_value << 8) | num
+        return IP.from_raw(raw_value)
+
+    @staticmethod
+    def from_raw(raw_value: int) -> IP:
+        """Builds an IP from its 32 bits integer value.
+
+        Parameters
+        ----------
+        raw_value : int
+            Integer value of the IP.
+
+        Returns
+        -------
+        IP
+            Interned IP.
+        """
 
-            self.raw_value += (num << i * 8)
-        self.values = numbers
+        ip = IP._interned.get(raw_value)
+        if ip is None:
+            if not 0 <= raw_value <= 0xFFFFFFFF:
+                raise ValueError('IP value must be between 0 and 2**32 - 1')
+            ip = object.__new__(IP)
+            object.__setattr__(ip, 'raw_value', raw_value)
+            object.__setattr__(ip, '_bits', None)
+            object.__setattr__(ip, '_str', None)
+            IP._interned[raw_value] = ip
+        return ip
 
     @staticmethod
-    def from_str(ip_str: str):
+    def from_str(ip_str: str) -> IP:
         values = [int(e) for e in ip_str.split('.')]
         return IP(*values)
 
     @staticmethod
-    def from_bin(ip_bin: str):
-        vals = []
-        for i in range(len(ip_bin) // 8):
-            vals.append(int(ip_bin[i*8:8+i*8], base=2))
-        return IP(*vals)
+    def from_bin(ip_bin: str) -> IP:
+        return IP.from_raw(int(ip_bin, base=2))
+
+    @staticmethod
+    def from_bit_data(bit_data: List[int]) -> IP:
+        """Builds an IP from a list of 32 bits.
+
+        Parameters
+        ----------
+        bit_data : List[int]
+            Bits of the IP.
+
+        Returns
+        -------
+        IP
+            Interned IP.
+        """
+
+        return IP.from_raw(from_bit_data_to_number(bit_data))
 
     def check_subnet(self, subnet, mask) -> bool:
         """Check if the IP belongs to a certain subnet using a given mask.
@@ -66,26 +115,60 @@ class IP():
 
         return self.raw_value & mask.raw_value == subnet.raw_value
 
+    @property
+    def values(self) -> Tuple[int, int, int, int]:
+        """Tuple[int, int, int, int]: Numbers of the IP"""
+        raw = self.raw_value
+        return (raw >> 24, (raw >> 16) & 255, (raw >> 8) & 255, raw & 255)
+
     @property
     def str_binary(self):
         """str: Binary representation of the IP"""
         return f'{self.raw_value:032b}'
 
     @property
-    def bit_data(self):
-        """str: Binary representation of the IP"""
-        return [int(b) for b in self.str_binary]
+    def bit_data(self) -> List[int]:
+        """List[int]: Binary representation of the IP"""
+        bits = self._bits
+        if bits is None:
+            raw = self.raw_value
+            bits = tuple((raw >> shift) & 1 for shift in range(31, -1, -1))
+            object.__setattr__(self, '_bits', bits)
+        return list(bits)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('IP objects are immutable')
+
+    def __reduce__(self):
+        return IP.from_raw, (self.raw_value,)
 
     def __repr__(self):
         """str: Value representation of the IP"""
-        return '.'.join([str(v) for v in self.values])
+        text = self._str
+        if text is None:
+            text = '.'.join([str(v) for v in self.values])
+            object.__setattr__(self, '_str', text)
+        return text
 
     def __str__(self) -> str:
         return self.__repr__()
 
+    def __int__(self) -> int:
+        return self.raw_value
+
     def __eq__(self, o: object) -> bool:
+        if not isinstance(o, IP):
+            return NotImplemented
         return self.raw_value == o.raw_value
 
+    def __hash__(self) -> int:
+        return hash(self.raw_value)
+
+    def __lt__(self, o: object) -> bool:
+        if not isinstance(o, IP):
+            return NotImplemented
+        return self.raw_value < o.raw_value
+
     @staticmethod
     def build_packet(dest_ip: IP, orig_ip: IP, data: List[int]) -> List[int]:
         packet = dest_ip.bit_data + \
@@ -97,6 +180,97 @@ class IP():
 
         return packet
 
+
+class IPNetwork():
+    """IP network (an address and a mask).
+
+    Networks are immutable and hashable. The address is stored already
+    masked.
+
+    Parameters
+    ----------
+    address : IP
+        Any address of the network.
+    mask : IP
+        Mask of the network.
+    """
+
+    __slots__ = ('network', 'mask', '_raw_network', '_raw_mask')
+
+    def __init__(self, address: IP, mask: IP):
+        raw_mask = mask.raw_value
+        raw_network = address.raw_value & raw_mask
+        object.__setattr__(self, 'network', IP.from_raw(raw_network))
+        object.__setattr__(self, 'mask', mask)
+        object.__setattr__(self, '_raw_network', raw_network)
+        object.__setattr__(self, '_raw_mask', raw_mask)
+
+    @staticmethod
+    def from_str(network_str: str) -> IPNetwork:
+        """Builds a network from ``<ip>/<prefix>`` or ``<ip>/<mask>``.
+
+        Parameters
+        ----------
+        network_str : str
+            Text representation of the network.
+
+        Returns
+        -------
+        IPNetwork
+            Network.
+        """
+
+        address, mask = network_str.split('/')
+        if '.' in mask:
+            return IPNetwork(IP.from_str(address), IP.from_str(mask))
+        return IPNetwork(IP.from_str(address),
+                         IPNetwork.prefix_to_mask(int(mask)))
+
+    @staticmethod
+    def prefix_to_mask(prefix_len: int) -> IP:
+        """Builds the mask of a given prefix length.
+
+        Parameters
+        ----------
+        prefix_len : int
+            Prefix length (between 0 and 32).
+
+        Returns
+        -------
+        IP
+            Mask.
+        """
+
+        if not 0 <= prefix_len <= 32:
+            raise ValueError('Prefix length must be between 0 and 32')
+        return IP.from_raw((0xFFFFFFFF << (32 - prefix_len)) & 0xFFFFFFFF)
+
+    @property
+    def prefix_len(self) -> int:
+        """int: Amount of ones in the mask"""
+        return bin(self._raw_mask).count('1')
+
+    def __contains__(self, ip: IP) -> bool:
+        return ip.raw_value & self._raw_mask == self._raw_network
+
+    def __setattr__(self, name, value):
+        raise AttributeError('IPNetwork objects are immutable')
+
+    def __eq__(self, o: object) -> bool:
+        if not isinstance(o, IPNetwork):
+            return NotImplemented
+        return self._raw_network == o._raw_network and \
+               self._raw_mask == o._raw_mask
+
+    def __hash__(self) -> int:
+        return hash((self._raw_network, self._raw_mask))
+
+    def __repr__(self) -> str:
+        return f'{self.network}/{self.prefix_len}'
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
 class IPPacket():
     """Representa un paquete IP
 
@@ -129,6 +303,13 @@ class IPPacket():
         Nombre del protocolo.
     bit_data : List[int]
         Paquete en forma de bits.
+
+        Se calcula la primera vez que se accede y se guarda, por lo que el
+        paquete no debe modificarse luego de construido.
+    source : List[int]
+        Datos de los cuales se obtuvo el paquete con ``parse`` (``None`` si
+        el paquete no fue obtenido de esta forma). Los bits del paquete se
+        toman directamente de estos datos en lugar de volver a codificarlo.
     """
 
     def __init__(self, dest_ip: IP, orig_ip: IP, payload: List[int],
@@ -141,6 +322,9 @@ class IPPacket():
         self.ttl = from_number_to_bit_data(ttl)
         self.protocol = from_number_to_bit_data(protocol)
         self.protocol_number = protocol
+        self.source = None
+        self._source_size = 0
+        self._bit_data = None
 
     def __str__(self) -> str:
         payload_hex = from_bit_data_to_hex(self.payload)
@@ -149,12 +333,19 @@ class IPPacket():
 
     @property
     def bit_data(self):
-        return self.to_ip.bit_data + \
-               self.from_ip.bit_data + \
-               self.ttl + \
-               self.protocol + \
-               data_size(self.payload) + \
-               extend_to_byte_divisor(self.payload)
+        bit_data = self._bit_data
+        if bit_data is None:
+            if self.source is not None:
+                bit_data = self.source[:self._source_size]
+            else:
+                bit_data = self.to_ip.bit_data + \
+                           self.from_ip.bit_data + \
+                           self.ttl + \
+                           self.protocol + \
+                           data_size(self.payload) + \
+                           extend_to_byte_divisor(self.payload)
+            self._bit_data = bit_data
+        return list(bit_data)
 
     @property
     def icmp_payload_msg(self) -> str:
@@ -198,8 +389,8 @@ class IPPacket():
         if len(data) < 88:
             return False, None
 
-        ip_dest = IP.from_bin(''.join(map(str, data[:32])))
-        ip_orig = IP.from_bin(''.join(map(str, data[32:64])))
+        ip_dest = IP.from_bit_data(data[:32])
+        ip_orig = IP.from_bit_data(data[32:64])
         ttl = from_bit_data_to_number(data[64:72])
         protocol = from_bit_data_to_number(data[72:80])
         payload_s = from_bit_data_to_number(data[80:88])
@@ -209,6 +400,8 @@ class IPPacket():
         if len(data) < total_size:
             return False, None
 
-        bit_data = data[88: 88 + payload_s * 8]
+        bit_data = data[88: total_size]
         packet = IPPacket(ip_dest, ip_orig, bit_data, ttl, protocol)
+        packet.source = data
+        packet._source_size = total_size
         return True, packet
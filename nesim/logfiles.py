@@ -0,0 +1,209 @@
+"""
+Escritura y lectura de los archivos de logs, opcionalmente comprimidos con
+gzip o xz.
+
+Ejemplo::
+
+    python -m nesim.logfiles output/S.txt.gz --start 1000 --end 2000
+"""
+
+import argparse
+from pathlib import Path
+from typing import Iterator, List, TextIO
+
+COMPRESSIONS = {
+    'gzip': '.gz',
+    'xz': '.xz',
+}
+
+_CHUNK_LINES = 4096
+
+# Maximum number of fields of each host data file: the last field of a
+# payload (e.g. ``echo request``) may contain spaces.
+_DATA_FIELDS = {
+    '_data.txt': 4,
+    '_payload.txt': 3,
+}
+
+
+def log_path(path: Path, compression: str = None) -> Path:
+    """
+    Ruta final de un archivo de logs según la compresión.
+
+    Parameters
+    ----------
+    path : Path
+        Ruta del archivo sin comprimir.
+    compression : str, optional
+        Compresión: ``None``, ``'gzip'`` o ``'xz'``.
+
+    Returns
+    -------
+    Path
+        Ruta con la extensión de la compresión (``.gz`` o ``.xz``).
+    """
+
+    if compression is None:
+        return Path(path)
+    if compression not in COMPRESSIONS:
+        raise ValueError(f'Unknown log compression {compression}. '
+                         f'Available: {", ".join(COMPRESSIONS)}')
+    path = Path(path)
+    return path.with_name(path.name + COMPRESSIONS[compression])
+
+
+def open_log(path: Path, compression: str = None,
+             level: int = None) -> TextIO:
+    """
+    Abre un archivo de logs para escribir.
+
+    Con compresión el contenido se comprime a medida que se escribe.
+
+    Parameters
+    ----------
+    path : Path
+        Ruta del archivo sin comprimir.
+    compression : str, optional
+        Compresión: ``None`` (por defecto), ``'gzip'`` o ``'xz'``.
+    level : int, optional
+        Nivel de compresión (de 0 a 9 en ambos casos). Por defecto 9 en
+        gzip y 6 en xz.
+
+    Returns
+    -------
+    TextIO
+        Archivo abierto en modo texto.
+    """
+
+    path = log_path(path, compression)
+    if compression is None:
+        return open(str(path), 'w+')
+    if compression == 'gzip':
+        import gzip
+        level = 9 if level is None else level
+        return gzip.open(str(path), 'wt', compresslevel=level)
+    import lzma
+    return lzma.open(str(path), 'wt', preset=level)
+
+
+def write_lines(file: TextIO, lines: List[str]):
+    """
+    Escribe líneas separadas por saltos de línea (sin salto al final) por
+    bloques, sin construir todo el texto en memoria.
+
+    Parameters
+    ----------
+    file : TextIO
+        Archivo donde se escribe.
+    lines : List[str]
+        Líneas a escribir.
+    """
+
+    for start in range(0, len(lines), _CHUNK_LINES):
+        if start:
+            file.write('\n')
+        file.write('\n'.join(lines[start:start + _CHUNK_LINES]))
+
+
+def read_log(path: Path) -> TextIO:
+    """
+    Abre un archivo de logs para leer, descomprimiéndolo a medida que se lee
+    si su extensión es ``.gz`` o ``.xz``.
+
+    Parameters
+    ----------
+    path : Path
+        Ruta del archivo.
+
+    Returns
+    -------
+    TextIO
+        Archivo abierto en modo texto.
+    """
+
+    path = Path(path)
+    if path.suffix == COMPRESSIONS['gzip']:
+        import gzip
+        return gzip.open(str(path), 'rt')
+    if path.suffix == COMPRESSIONS['xz']:
+        import lzma
+        return lzma.open(str(path), 'rt')
+    return open(str(path), 'r')
+
+
+def iter_rows(path: Path, start: int = None,
+              end: int = None) -> Iterator[List[str]]:
+    """
+    Recorre las filas de un archivo de logs o de datos recibidos.
+
+    En los logs en forma de tabla se devuelven las celdas de cada fila (sin
+    los encabezados ni los separadores). En los archivos de datos de los
+    hosts se devuelven los campos de cada línea: el tiempo, la mac origen,
+    los datos y ``ERROR`` si se detectó un error (``<host>_data.txt``), o
+    el tiempo, el IP origen y el contenido del paquete
+    (``<host>_payload.txt``, el contenido puede tener espacios).
+
+    Parameters
+    ----------
+    path : Path
+        Ruta del archivo (comprimido o no).
+    start, end : int, optional
+        Si se especifican, solo se devuelven las filas cuyo tiempo está
+        entre ``start`` y ``end`` (ambos incluidos).
+
+    Yields
+    ------
+    List[str]
+        Celdas de cada fila. La primera es el tiempo en milisegundos.
+    """
+
+    path = Path(path)
+    name = path.name
+    if path.suffix in COMPRESSIONS.values():
+        name = path.stem
+    fields = next((count for suffix, count in _DATA_FIELDS.items()
+                   if name.endswith(suffix)), 0)
+
+    with read_log(path) as file:
+        for line in file:
+            if line.startswith('|'):
+                row = [cell.strip() for cell in line.strip()[1:-1].split('|')]
+            else:
+                row = line.strip().split(maxsplit=fields - 1)
+            if not row or not row[0].isdigit():
+                continue
+            time = int(row[0])
+            if start is not None and time < start:
+                continue
+            if end is not None and time > end:
+                continue
+            yield row
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Añade las opciones del lector de logs a un parser."""
+
+    parser.add_argument('file', help='log or data file (.txt, .gz or .xz)')
+    parser.add_argument('--start', type=int, default=None)
+    parser.add_argument('--end', type=int, default=None)
+
+
+def run(opts: argparse.Namespace):
+    """Imprime las filas de un archivo de logs separadas por tabuladores."""
+
+    if not Path(opts.file).exists():
+        raise ValueError(f"Invalid path '{opts.file}'")
+    for row in iter_rows(opts.file, opts.start, opts.end):
+        print('\t'.join(row))
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m nesim.logfiles',
+        description='Print the rows of a (compressed) log file.')
+    add_arguments(parser)
+    run(parser.parse_args(args))
+
+
+if __name__ == '__main__':
+    main()
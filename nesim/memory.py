@@ -0,0 +1,214 @@
+"""
+Reporte del uso de memoria de una simulación por subsistema y por
+dispositivo.
+"""
+
+import csv
+import sys
+import tracemalloc
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+from nesim.devices.send_receiver import SendReceiver
+
+
+SUBSYSTEMS = (
+    'logs',
+    'send_queues',
+    'ports_buffer',
+    'received_data',
+    'waiting_for_arpq',
+    'tables',
+    'instructions',
+)
+
+
+def deep_size(*objs) -> Tuple[int, int]:
+    """
+    Calcula el tamaño aproximado en bytes de unos objetos y la cantidad de
+    objetos que contienen.
+
+    Se recorren las listas, tuplas, deques, conjuntos, diccionarios y los
+    atributos de las instancias. Los objetos compartidos se cuentan una
+    sola vez y los enteros pequeños no se cuentan porque Python los
+    comparte.
+
+    Parameters
+    ----------
+    *objs : object
+        Objetos a medir.
+
+    Returns
+    -------
+    int
+        Tamaño en bytes.
+    int
+        Cantidad de objetos.
+    """
+
+    size, count = 0, 0
+    seen = set()
+    stack = list(objs)
+    while stack:
+        item = stack.pop()
+        if isinstance(item, int) and -5 <= item <= 256:
+            continue
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        count += 1
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, deque, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, '__dict__'):
+            stack.append(vars(item))
+    return size, count
+
+
+def _device_parts(device) -> Dict[str, List[object]]:
+    parts = {name: [] for name in SUBSYSTEMS}
+    parts['logs'].append(device.logs)
+    for send_receiver in device.ports:
+        if isinstance(send_receiver, SendReceiver):
+            parts['send_queues'].append(send_receiver.data)
+            parts['send_queues'].append(send_receiver.current_package)
+    for attr, subsystem in (('ports_buffer', 'ports_buffer'),
+                            ('received_data', 'received_data'),
+                            ('received_payload', 'received_data'),
+                            ('waiting_for_arpq', 'waiting_for_arpq'),
+                            ('mac_table', 'tables'),
+                            ('ip_table', 'tables'),
+                            ('routes', 'tables')):
+        value = getattr(device, attr, None)
+        if value is not None:
+            parts[subsystem].append(value)
+    return parts
+
+
+class MemoryReporter():
+    """
+    Muestrea periódicamente la memoria usada por la simulación y la escribe
+    como una serie de tiempo en un archivo CSV.
+
+    Cada muestra contiene:
+
+    - Por subsistema (``scope = 'subsystem'``): los bytes y la cantidad de
+      objetos de los logs de los dispositivos, las colas de envío, los
+      buffers de los puertos, los datos recibidos por los hosts, los
+      paquetes en espera de ARPQ, las tablas (mac, ARP y rutas) y las
+      instrucciones pendientes.
+    - Por dispositivo (``scope = 'device'``): los ``top`` dispositivos que
+      más memoria usan.
+    - Si ``trace`` es ``True``, la memoria reservada por Python según
+      ``tracemalloc`` (``scope = 'tracemalloc'``): el total actual, el
+      máximo y los ``top`` archivos de código que más memoria reservaron.
+
+    Parameters
+    ----------
+    path : str
+        Ruta del archivo CSV.
+    top : int, optional
+        Cantidad de dispositivos y archivos a reportar, por defecto 5.
+    trace : bool, optional
+        Si se usa ``tracemalloc``, por defecto ``True``. Con ``tracemalloc``
+        activo la simulación es más lenta.
+    """
+
+    HEADER = ('time', 'scope', 'name', 'bytes', 'objects')
+
+    def __init__(self, path: str, top: int = 5, trace: bool = True):
+        self.path = Path(path)
+        self.top = top
+        self.trace = trace
+        self._started_trace = False
+        self._header_written = False
+
+    def start(self):
+        """Comienza el rastreo de ``tracemalloc`` si es necesario."""
+
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_trace = True
+
+    def stop(self):
+        """Detiene el rastreo de ``tracemalloc`` si fue iniciado aquí."""
+
+        if self._started_trace:
+            tracemalloc.stop()
+            self._started_trace = False
+
+    def measure(self, devices: Iterable, instructions: list = ()) \
+            -> List[Tuple[str, str, int, int]]:
+        """
+        Mide la memoria usada por los subsistemas y los dispositivos.
+
+        Parameters
+        ----------
+        devices : Iterable[Device]
+            Dispositivos de la simulación.
+        instructions : list, optional
+            Instrucciones pendientes.
+
+        Returns
+        -------
+        List[Tuple[str, str, int, int]]
+            Filas ``(scope, name, bytes, objects)``.
+        """
+
+        totals = {name: [0, 0] for name in SUBSYSTEMS}
+        by_device = []
+        for device in devices:
+            device_bytes, device_objects = 0, 0
+            for subsystem, values in _device_parts(device).items():
+                size, count = deep_size(*values)
+                totals[subsystem][0] += size
+                totals[subsystem][1] += count
+                device_bytes += size
+                device_objects += count
+            by_device.append((device.name, device_bytes, device_objects))
+
+        size, count = deep_size(instructions)
+        totals['instructions'] = [size, count]
+
+        rows = [('subsystem', name, size, count)
+                for name, (size, count) in totals.items()]
+        by_device.sort(key=lambda d: d[1], reverse=True)
+        rows.extend(('device', name, size, count)
+                    for name, size, count in by_device[:self.top])
+
+        if self.trace and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            rows.append(('tracemalloc', 'current', current, 0))
+            rows.append(('tracemalloc', 'peak', peak, 0))
+            stats = tracemalloc.take_snapshot().statistics('filename')
+            for stat in stats[:self.top]:
+                frame = stat.traceback[0]
+                rows.append(('tracemalloc', frame.filename, stat.size,
+                             stat.count))
+        return rows
+
+    def sample(self, net_sim):
+        """
+        Toma una muestra de una simulación y la añade al archivo.
+
+        Parameters
+        ----------
+        net_sim : NetSimulation
+            Simulación a muestrear.
+        """
+
+        devices = list(net_sim.devices.values()) + \
+                  list(net_sim.disconnected_devices.values())
+        rows = self.measure(devices, net_sim.instructions)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        mode = 'a' if self._header_written else 'w'
+        with open(str(self.path), mode, newline='') as file:
+            writer = csv.writer(file)
+            if not self._header_written:
+                writer.writerow(self.HEADER)
+                self._header_written = True
+            writer.writerows((net_sim.time,) + row for row in rows)
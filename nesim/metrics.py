@@ -0,0 +1,394 @@
+"""
+Métricas de la simulación y su exportación en el formato de texto de
+Prometheus.
+"""
+
+import os
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+from nesim.devices.send_receiver import SendReceiver
+from nesim.frame import FRAME_CACHE
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+                     .replace('\n', '\\n')
+
+
+def _format_labels(label_names: Tuple[str, ...], key: Tuple,
+                   extra: str = '') -> str:
+    labels = [f'{n}="{_escape(v)}"' for n, v in zip(label_names, key)]
+    if extra:
+        labels.append(extra)
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+class Metric():
+    """
+    Representa una familia de métricas con etiquetas.
+
+    Parameters
+    ----------
+    name : str
+        Nombre de la métrica.
+    doc : str
+        Descripción de la métrica.
+    label_names : Tuple[str, ...], optional
+        Nombres de las etiquetas de la métrica.
+
+    Attributes
+    ----------
+    values : Dict[Tuple, object]
+        Valor de la métrica para cada combinación de etiquetas.
+    """
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, doc: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(label_names)
+        self.values: Dict[Tuple, object] = {}
+
+    def samples(self) -> Iterable[str]:
+        """Devuelve las líneas de la métrica en formato Prometheus."""
+
+        for key, value in self.values.items():
+            yield f'{self.name}{_format_labels(self.label_names, key)} {value}'
+
+    def to_prometheus(self) -> str:
+        """str : Métrica en formato de texto de Prometheus."""
+
+        lines = [f'# HELP {self.name} {self.doc}',
+                 f'# TYPE {self.name} {self.metric_type}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Métrica cuyo valor solo puede aumentar."""
+
+    metric_type = 'counter'
+
+    def inc(self, key: Tuple = (), amount: int = 1):
+        """
+        Incrementa el contador.
+
+        Parameters
+        ----------
+        key : Tuple
+            Valores de las etiquetas.
+        amount : int, optional
+            Valor a sumar, por defecto 1.
+        """
+
+        values = self.values
+        values[key] = values.get(key, 0) + amount
+
+    def incrementer(self, key: Tuple = ()):
+        """
+        Devuelve una función que incrementa el contador para unas etiquetas
+        dadas ignorando los argumentos con que es llamada.
+
+        Esta función puede ser añadida directamente a las listas de
+        callbacks de los dispositivos (``on_send``, ``on_receive``, etc).
+
+        Parameters
+        ----------
+        key : Tuple
+            Valores de las etiquetas.
+        """
+
+        values = self.values
+        values.setdefault(key, 0)
+
+        def _inc(*_):
+            values[key] += 1
+        return _inc
+
+
+class Gauge(Metric):
+    """Métrica cuyo valor puede aumentar o disminuir."""
+
+    metric_type = 'gauge'
+
+    def set(self, key: Tuple, value):
+        """
+        Asigna el valor de la métrica.
+
+        Parameters
+        ----------
+        key : Tuple
+            Valores de las etiquetas.
+        value : int or float
+            Valor de la métrica.
+        """
+
+        self.values[key] = value
+
+
+class Histogram(Metric):
+    """
+    Métrica que cuenta observaciones por intervalos.
+
+    Parameters
+    ----------
+    name : str
+        Nombre de la métrica.
+    doc : str
+        Descripción de la métrica.
+    label_names : Tuple[str, ...], optional
+        Nombres de las etiquetas de la métrica.
+    buckets : List[float], optional
+        Límites superiores de los intervalos en orden creciente.
+    """
+
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, doc: str, label_names: Tuple[str, ...] = (),
+                 buckets: List[float] = (1, 2, 4, 8, 16, 32, 64, 128, 256,
+                                         512, 1024)):
+        super().__init__(name, doc, label_names)
+        self.buckets = list(buckets)
+
+    def observe(self, key: Tuple, value: float):
+        """
+        Registra una observación.
+
+        Parameters
+        ----------
+        key : Tuple
+            Valores de las etiquetas.
+        value : float
+            Valor observado.
+        """
+
+        data = self.values.get(key)
+        if data is None:
+            data = self.values[key] = [[0] * (len(self.buckets) + 1), 0, 0]
+        data[0][bisect_left(self.buckets, value)] += 1
+        data[1] += value
+        data[2] += 1
+
+    def samples(self) -> Iterable[str]:
+        names = self.label_names
+        for key, (counts, total, count) in self.values.items():
+            accum = 0
+            bounds = [str(b) for b in self.buckets] + ['+Inf']
+            for bound, bucket_count in zip(bounds, counts):
+                accum += bucket_count
+                labels = _format_labels(names, key, f'le="{bound}"')
+                yield f'{self.name}_bucket{labels} {accum}'
+            yield f'{self.name}_sum{_format_labels(names, key)} {total}'
+            yield f'{self.name}_count{_format_labels(names, key)} {count}'
+
+
+class MetricsRegistry():
+    """Registro de métricas."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, doc: str,
+                label_names: Tuple[str, ...] = ()) -> Counter:
+        """Crea y registra un ``Counter``."""
+        return self._register(Counter(name, doc, label_names))
+
+    def gauge(self, name: str, doc: str,
+              label_names: Tuple[str, ...] = ()) -> Gauge:
+        """Crea y registra un ``Gauge``."""
+        return self._register(Gauge(name, doc, label_names))
+
+    def histogram(self, name: str, doc: str,
+                  label_names: Tuple[str, ...] = (),
+                  buckets: List[float] = None) -> Histogram:
+        """Crea y registra un ``Histogram``."""
+        if buckets is None:
+            return self._register(Histogram(name, doc, label_names))
+        return self._register(Histogram(name, doc, label_names, buckets))
+
+    def to_prometheus(self) -> str:
+        """str : Todas las métricas en formato de texto de Prometheus."""
+
+        return '\n'.join(m.to_prometheus() for m in self.metrics.values()) \
+               + '\n'
+
+    def write(self, path: str):
+        """
+        Escribe las métricas en un archivo en formato de texto de
+        Prometheus.
+
+        El archivo se reemplaza de forma atómica para que nunca se lea a
+        medio escribir.
+
+        Parameters
+        ----------
+        path : str
+            Ruta del archivo.
+        """
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + '.tmp')
+        with open(str(temp_path), 'w') as file:
+            file.write(self.to_prometheus())
+        os.replace(str(temp_path), str(path))
+
+
+class NetMetrics():
+    """
+    Métricas de una simulación.
+
+    Las métricas se alimentan de los callbacks de los ``SendReceiver``
+    (``on_send``, ``on_receive``, ``on_collision``, ``on_drop``) y de los
+    callbacks de los dispositivos (``on_forward``, ``on_flood``,
+    ``on_arp_miss``).
+
+    Parameters
+    ----------
+    registry : MetricsRegistry, optional
+        Registro donde se crean las métricas.
+    """
+
+    def __init__(self, registry: MetricsRegistry = None):
+        self.registry = registry if registry is not None else MetricsRegistry()
+        reg = self.registry
+        port_labels = ('device', 'port')
+        self.bits_sent = reg.counter(
+            'nesim_bits_sent_total', 'Bits sent by port.', port_labels)
+        self.bits_received = reg.counter(
+            'nesim_bits_received_total', 'Bits received by port.', port_labels)
+        self.collisions = reg.counter(
+            'nesim_collisions_total', 'Collisions detected by port.',
+            port_labels)
+        self.backoff = reg.histogram(
+            'nesim_backoff_ms', 'Back-off time after a collision.',
+            ('device',))
+        self.frames_forwarded = reg.counter(
+            'nesim_frames_forwarded_total',
+            'Frames forwarded by a switch through a single port.',
+            port_labels)
+        self.frames_flooded = reg.counter(
+            'nesim_frames_flooded_total',
+            'Frames flooded by a switch, by ingress port.', port_labels)
+        self.frames_dropped = reg.counter(
+            'nesim_frames_dropped_total',
+            'Frames dropped by a bounded egress queue.', port_labels)
+        self.bits_dropped = reg.counter(
+            'nesim_bits_dropped_total',
+            'Bits dropped by a bounded egress queue.', port_labels)
+        self.arp_misses = reg.counter(
+            'nesim_arp_misses_total',
+            'Packets that required an ARPQ request.', ('device',))
+        self.queue_depth = reg.gauge(
+            'nesim_queue_depth_frames', 'Frames waiting to be sent by port.',
+            port_labels)
+        self.queue_depth_samples = reg.histogram(
+            'nesim_queue_depth_samples', 'Sampled port queue depths.',
+            ('device',), buckets=[0, 1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.sim_time = reg.gauge(
+            'nesim_simulation_time_ms', 'Simulated time.')
+        self.frame_cache = reg.gauge(
+            'nesim_frame_cache_lookups', 'Encoded frame cache lookups.',
+            ('result',))
+        self._attached = set()
+
+    def attach(self, device):
+        """
+        Conecta las métricas a los callbacks de un dispositivo.
+
+        Conectar varias veces el mismo dispositivo no tiene efecto.
+
+        Parameters
+        ----------
+        device : Device
+            Dispositivo a conectar.
+        """
+
+        if id(device) in self._attached:
+            return
+        self._attached.add(id(device))
+
+        name = device.name
+        for port_name, send_receiver in self._send_receivers(device):
+            key = (name, port_name)
+            send_receiver.on_send.append(self.bits_sent.incrementer(key))
+            send_receiver.on_receive.append(
+                self.bits_received.incrementer(key))
+            send_receiver.on_collision.append(
+                self.collisions.incrementer(key))
+            send_receiver.on_collision.append(
+                self._backoff_observer(device, port_name))
+            send_receiver.on_drop.append(self._drop_counter(key))
+
+        if hasattr(device, 'on_forward'):
+            device.on_forward.append(
+                lambda _, out_port: self.frames_forwarded.inc(
+                    (name, device.port_name(out_port))))
+            device.on_flood.append(
+                lambda in_port: self.frames_flooded.inc(
+                    (name, device.port_name(in_port))))
+
+        if hasattr(device, 'on_arp_miss'):
+            device.on_arp_miss.append(self.arp_misses.incrementer((name,)))
+
+    def _drop_counter(self, key: Tuple):
+        def _drop(package, _):
+            self.frames_dropped.inc(key)
+            self.bits_dropped.inc(key, len(package))
+        return _drop
+
+    def _backoff_observer(self, device, port_name: str):
+        # The port is looked up on each call since connecting a cable
+        # replaces its SendReceiver
+        key = (device.name,)
+        port = device.port_names.index(port_name)
+        return lambda: self.backoff.observe(key,
+                                            device.ports[port].time_to_send)
+
+    @staticmethod
+    def _send_receivers(device):
+        for port_name, send_receiver in zip(device.port_names, device.ports):
+            if isinstance(send_receiver, SendReceiver):
+                yield port_name, send_receiver
+
+    def sample(self, devices, time: int):
+        """
+        Toma una muestra de las métricas que no se alimentan de eventos
+        (profundidad de las colas de envío y uso de la caché de frames).
+
+        Parameters
+        ----------
+        devices : Iterable[Device]
+            Dispositivos a muestrear.
+        time : int
+            Tiempo de la simulación.
+        """
+
+        self.sim_time.set((), time)
+        self.frame_cache.set(('hit',), FRAME_CACHE.hits)
+        self.frame_cache.set(('miss',), FRAME_CACHE.misses)
+        for device in devices:
+            for port_name, send_receiver in self._send_receivers(device):
+                depth = len(send_receiver.data)
+                self.queue_depth.set((device.name, port_name), depth)
+                self.queue_depth_samples.observe((device.name,), depth)
+
+    def write(self, path: str):
+        """
+        Escribe las métricas en formato de texto de Prometheus.
+
+        Parameters
+        ----------
+        path : str
+            Ruta del archivo.
+        """
+
+        self.registry.write(path)
@@ -0,0 +1,272 @@
+"""
+Actualización en paralelo de los dispositivos durante un ciclo de la
+simulación.
+
+En cada fase de un ciclo (actualizar los hosts, actualizar los switches y
+routers, leer los puertos de los switches y routers y leer los puertos de
+los hosts) cada dispositivo modifica casi solo su propio estado, por lo
+que los dispositivos de una fase se pueden repartir entre varios hilos.
+Para que el resultado no dependa de cuántos hilos se usen ni del orden en
+que se ejecutan:
+
+- Los dispositivos unidos por un medio compartido (un cable que se usa en
+  ambos sentidos) se actualizan en el mismo hilo y en el orden de la
+  simulación.
+- Los callbacks de los dispositivos (``on_send``, ``on_frame``, etc.), que
+  pueden modificar estructuras compartidas (métricas, seguimiento de
+  flujos, puntos de parada), no se ejecutan en los hilos: se guardan y se
+  ejecutan al terminar la fase en el orden de los dispositivos. Lo mismo
+  ocurre con los textos que imprimen los dispositivos y sus logs (ver
+  ``emit``).
+- Cada dispositivo usa su propio generador de números aleatorios (ver
+  ``nesim.rng``), creado a partir del generador global.
+
+El resultado es el mismo para cualquier cantidad de hilos (incluido uno),
+pero no coincide con el de una simulación que no usa ``ParallelUpdater``
+con la misma semilla, en la que todos los dispositivos usan el generador
+global.
+
+Solo se obtiene una mejora de velocidad en las versiones de CPython sin
+GIL (``python3.13t`` o posteriores).
+"""
+
+from __future__ import annotations
+import logging
+import os
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
+import nesim.rng as rng
+
+if TYPE_CHECKING:
+    from nesim.devices.device import Device
+
+
+_logger = logging.getLogger(__name__)
+_local = threading.local()
+
+Deferred = Tuple[Callable, tuple]
+
+
+def gil_enabled() -> bool:
+    """bool : Indica si el intérprete actual usa el GIL."""
+
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+class DeferredCallbacks(list):
+    """
+    Lista de callbacks que, dentro de una fase en paralelo, guarda los
+    llamados en lugar de ejecutarlos.
+
+    Fuera de una fase en paralelo (por ejemplo al ejecutar las
+    instrucciones) se comporta como una lista normal.
+    """
+
+    def __iter__(self):
+        calls: List[Deferred] = getattr(_local, 'calls', None)
+        if calls is None:
+            return super().__iter__()
+        return iter([_deferred(calls, act) for act in super().__iter__()])
+
+
+def _deferred(calls: List[Deferred], act: Callable) -> Callable:
+    return lambda *args: calls.append((act, args))
+
+
+def emit(act: Callable, *args):
+    """
+    Escribe una salida de un dispositivo (por ejemplo con ``print`` o un
+    log).
+
+    Dentro de una fase en paralelo la salida se guarda y se escribe al
+    terminar la fase junto a los callbacks, en el orden de los
+    dispositivos, por lo que no depende del orden en que se ejecutan los
+    hilos.
+
+    Parameters
+    ----------
+    act : Callable
+        Función que escribe la salida.
+    *args
+        Argumentos de la función.
+    """
+
+    calls: List[Deferred] = getattr(_local, 'calls', None)
+    if calls is None:
+        act(*args)
+    else:
+        calls.append((act, args))
+
+
+def defer_callbacks(device: Device):
+    """
+    Reemplaza las listas de callbacks (atributos ``on_*``) de un dispositivo
+    y de sus puertos por ``DeferredCallbacks``.
+
+    Debe llamarse antes de conectar funciones a los callbacks, ya que las
+    listas se reemplazan por otras.
+
+    Parameters
+    ----------
+    device : Device
+        Dispositivo.
+    """
+
+    from nesim.devices.send_receiver import SendReceiver
+
+    owners = [device] + [sr for sr in device.ports
+                         if isinstance(sr, SendReceiver)]
+    for owner in owners:
+        for name, value in list(vars(owner).items()):
+            if name.startswith('on_') and type(value) is list:
+                setattr(owner, name, DeferredCallbacks(value))
+
+
+class ParallelUpdater():
+    """
+    Ejecuta las fases de un ciclo de la simulación en varios hilos.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Cantidad de hilos. Por defecto la cantidad de procesadores.
+    chunk_size : int, optional
+        Cantidad de grupos de dispositivos que procesa cada tarea. Por
+        defecto se reparten en cuatro tareas por hilo.
+    """
+
+    def __init__(self, workers: int = None, chunk_size: int = None):
+        if workers is not None and workers < 1:
+            raise ValueError('workers must be positive')
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.chunk_size = chunk_size
+        self._executor: ThreadPoolExecutor = None
+        self._generators: Dict[int, random.Random] = {}
+        self._groups: Dict[str, List[List[Device]]] = {}
+        if gil_enabled() and self.workers > 1:
+            _logger.warning('Parallel device updates need a free-threaded '
+                            'Python build to run faster')
+
+    def invalidate(self):
+        """
+        Descarta los grupos de dispositivos calculados. Se debe llamar cada
+        vez que cambia la topología.
+        """
+
+        self._groups = {}
+
+    def groups(self, phase: str, devices: List[Device]) -> List[List[Device]]:
+        """
+        Agrupa los dispositivos de una fase unidos por un medio compartido,
+        manteniendo su orden.
+
+        Parameters
+        ----------
+        phase : str
+            Nombre de la fase (los grupos se guardan hasta ``invalidate``).
+        devices : List[Device]
+            Dispositivos de la fase en el orden de la simulación.
+
+        Returns
+        -------
+        List[List[Device]]
+            Grupos en el orden de su primer dispositivo.
+        """
+
+        groups = self._groups.get(phase)
+        if groups is not None:
+            return groups
+
+        parent = list(range(len(devices)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        medium_owner: Dict[int, int] = {}
+        for index, device in enumerate(devices):
+            for send_receiver in device.ports:
+                head = getattr(send_receiver, 'cable_head', None)
+                if head is None or head.send_cable is not head.receive_cable:
+                    continue
+                other = medium_owner.setdefault(id(head.send_cable), index)
+                parent[find(index)] = find(other)
+
+        by_root: Dict[int, List[Device]] = {}
+        for index, device in enumerate(devices):
+            by_root.setdefault(find(index), []).append(device)
+        groups = sorted(by_root.values(), key=lambda g: devices.index(g[0]))
+        self._groups[phase] = groups
+        return groups
+
+    def run(self, phase: str, devices: List[Device], method: str, *args):
+        """
+        Llama a un método de cada dispositivo repartiendo los dispositivos
+        entre los hilos y luego ejecuta en orden los callbacks guardados.
+
+        Parameters
+        ----------
+        phase : str
+            Nombre de la fase.
+        devices : List[Device]
+            Dispositivos de la fase en el orden de la simulación.
+        method : str
+            Nombre del método a llamar (``'update'`` o ``'receive'``).
+        *args
+            Argumentos del método.
+        """
+
+        if not devices:
+            return
+        groups = self.groups(phase, devices)
+        for device in devices:
+            if id(device) not in self._generators:
+                self._generators[id(device)] = \
+                    random.Random(random.getrandbits(64))
+
+        size = self.chunk_size
+        if size is None:
+            size = max(1, -(-len(groups) // (4 * self.workers)))
+        chunks = [groups[i:i + size] for i in range(0, len(groups), size)]
+
+        if self.workers == 1 or len(chunks) == 1:
+            results = [self._run_chunk(chunk, method, args)
+                       for chunk in chunks]
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers)
+            results = list(self._executor.map(
+                lambda chunk: self._run_chunk(chunk, method, args), chunks))
+
+        for calls in results:
+            for act, call_args in calls:
+                act(*call_args)
+
+    def _run_chunk(self, chunk: List[List[Device]], method: str,
+                   args: tuple) -> List[Deferred]:
+        calls: List[Deferred] = []
+        _local.calls = calls
+        try:
+            for group in chunk:
+                for device in group:
+                    rng.use(self._generators[id(device)])
+                    getattr(device, method)(*args)
+        finally:
+            _local.calls = None
+            rng.use(None)
+        return calls
+
+    def shutdown(self):
+        """Detiene los hilos."""
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,358 @@
+"""
+Almacenamiento de los resultados de una simulación en una base de datos
+SQLite.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Tuple
+from nesim.devices.utils import from_bit_data_to_hex, from_number_to_bit_data
+
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS port_logs (
+    time INTEGER NOT NULL,
+    device TEXT NOT NULL,
+    port TEXT NOT NULL,
+    received TEXT,
+    sent TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS port_logs_device_time
+    ON port_logs (device, time, port);
+CREATE INDEX IF NOT EXISTS port_logs_time ON port_logs (time);
+
+CREATE TABLE IF NOT EXISTS frames (
+    time INTEGER NOT NULL,
+    device TEXT NOT NULL,
+    port TEXT NOT NULL,
+    event TEXT NOT NULL,
+    from_mac TEXT NOT NULL,
+    to_mac TEXT NOT NULL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS frames_device_time ON frames (device, time);
+CREATE INDEX IF NOT EXISTS frames_time ON frames (time);
+CREATE INDEX IF NOT EXISTS frames_from_mac ON frames (from_mac);
+CREATE INDEX IF NOT EXISTS frames_to_mac ON frames (to_mac);
+
+CREATE TABLE IF NOT EXISTS received_data (
+    time INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    from_mac TEXT NOT NULL,
+    data TEXT,
+    error INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS received_data_host_time
+    ON received_data (host, time);
+CREATE INDEX IF NOT EXISTS received_data_time ON received_data (time);
+CREATE INDEX IF NOT EXISTS received_data_from_mac
+    ON received_data (from_mac);
+
+CREATE TABLE IF NOT EXISTS received_payloads (
+    time INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    from_ip TEXT NOT NULL,
+    payload TEXT
+);
+CREATE INDEX IF NOT EXISTS received_payloads_host_time
+    ON received_payloads (host, time);
+CREATE INDEX IF NOT EXISTS received_payloads_time
+    ON received_payloads (time);
+CREATE INDEX IF NOT EXISTS received_payloads_from_ip
+    ON received_payloads (from_ip);
+'''
+
+_INSERTS = {
+    'port_logs': 'INSERT OR REPLACE INTO port_logs VALUES (?, ?, ?, ?, ?)',
+    'frames': 'INSERT INTO frames VALUES (?, ?, ?, ?, ?, ?, ?)',
+    'received_data': 'INSERT INTO received_data VALUES (?, ?, ?, ?, ?)',
+    'received_payloads': 'INSERT INTO received_payloads VALUES (?, ?, ?, ?)',
+}
+
+
+def _mac_hex(mac: int) -> str:
+    return from_bit_data_to_hex(from_number_to_bit_data(mac, 16))
+
+
+class ResultsStore():
+    """
+    Resultados de una simulación guardados en una base de datos SQLite.
+
+    Los registros se acumulan en memoria y se insertan en lotes de
+    ``batch_size`` dentro de una misma transacción. Las consultas insertan
+    antes los registros pendientes. Luego de ``close`` la base de datos se
+    vuelve a abrir al hacer una consulta o insertar registros.
+
+    La base de datos contiene las tablas:
+
+    - ``port_logs``: valor enviado y recibido por cada puerto en cada
+      milisegundo (los logs de hubs, switches, routers y hosts).
+    - ``frames``: frames enviados (``event = 'sent'``) y recibidos
+      (``event = 'received'``) por cada dispositivo.
+    - ``received_data``: frames recibidos por cada host.
+    - ``received_payloads``: paquetes IP recibidos por cada host.
+
+    Parameters
+    ----------
+    path : str
+        Ruta de la base de datos.
+    batch_size : int, optional
+        Cantidad de registros por transacción, por defecto 10 000.
+    overwrite : bool, optional
+        Si es ``True`` se elimina la base de datos existente, por defecto
+        ``False``.
+    """
+
+    def __init__(self, path: str, batch_size: int = 10_000,
+                 overwrite: bool = False):
+        path = Path(path)
+        if overwrite and path.exists():
+            path.unlink()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self._connection: sqlite3.Connection = None
+        self.connection.executescript(_SCHEMA)
+        self._pending: Dict[str, List[Tuple]] = {t: [] for t in _INSERTS}
+        self._pending_count = 0
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """sqlite3.Connection : Conexión a la base de datos."""
+
+        if self._connection is None:
+            self._connection = sqlite3.connect(str(self.path))
+            self._connection.row_factory = sqlite3.Row
+        return self._connection
+
+    def _add(self, table: str, row: Tuple):
+        self._pending[table].append(row)
+        self._pending_count += 1
+        if self._pending_count >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Inserta los registros pendientes en una transacción."""
+
+        if not self._pending_count:
+            return
+        with self.connection:
+            for table, rows in self._pending.items():
+                if rows:
+                    self.connection.executemany(_INSERTS[table], rows)
+                    rows.clear()
+        self._pending_count = 0
+
+    def close(self):
+        """Inserta los registros pendientes y cierra la base de datos."""
+
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def attach(self, device):
+        """
+        Conecta el almacén a los callbacks de un dispositivo.
+
+        Parameters
+        ----------
+        device : Device
+            Dispositivo a conectar.
+        """
+
+        name = device.name
+        device.on_port_log.append(
+            lambda time, received, sent: self.add_port_log(
+                time, name, device.port_names, received, sent))
+
+        if hasattr(device, 'on_frame'):
+            device.on_frame.append(
+                lambda event, port, frame, _: self.add_frame(
+                    device.sim_time, name, device.port_name(port), event,
+                    frame))
+
+        if hasattr(device, 'on_data_received'):
+            device.on_data_received.append(
+                lambda frame, error: self.add_received_data(
+                    device.sim_time, name, frame, error))
+            device.on_payload_received.append(
+                lambda packet, payload: self.add_received_payload(
+                    device.sim_time, name, packet, payload))
+
+    def add_port_log(self, time: int, device: str, port_names: List[str],
+                     received: List[str], sent: List[str]):
+        """
+        Registra los valores de los puertos de un dispositivo.
+
+        Los puertos sin cable conectado no se registran. Si ya existía un
+        registro para el mismo dispositivo, puerto y tiempo, se reemplaza.
+        """
+
+        for port, bit_re, bit_se in zip(port_names, received, sent):
+            if bit_re != '-' or bit_se != '-':
+                self._add('port_logs', (time, device, port, bit_re, bit_se))
+
+    def add_frame(self, time: int, device: str, port: str, event: str,
+                  frame):
+        """Registra un frame enviado o recibido por un dispositivo."""
+
+        self._add('frames', (time, device, port, event,
+                             _mac_hex(frame.from_mac), _mac_hex(frame.to_mac),
+                             from_bit_data_to_hex(frame.data)))
+
+    def add_received_data(self, time: int, host: str, frame, error: bool):
+        """Registra un frame recibido por un host."""
+
+        self._add('received_data', (time, host, _mac_hex(frame.from_mac),
+                                    from_bit_data_to_hex(frame.data),
+                                    int(error)))
+
+    def add_received_payload(self, time: int, host: str, packet,
+                             payload: str):
+        """Registra un paquete IP recibido por un host."""
+
+        self._add('received_payloads',
+                  (time, host, str(packet.from_ip), payload))
+
+    def query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        """
+        Ejecuta una consulta SQL sobre los resultados.
+
+        Parameters
+        ----------
+        sql : str
+            Consulta.
+        params : Tuple, optional
+            Parámetros de la consulta.
+
+        Returns
+        -------
+        List[sqlite3.Row]
+            Filas obtenidas.
+        """
+
+        self.flush()
+        return self.connection.execute(sql, params).fetchall()
+
+    def _select(self, table: str, start: int, end: int,
+                conditions: List[Tuple[str, object]]) -> List[sqlite3.Row]:
+        clauses, params = [], []
+        for clause, value in conditions:
+            if value is not None:
+                clauses.append(clause)
+                params.extend([value] * clause.count('?'))
+        if start is not None:
+            clauses.append('time >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('time <= ?')
+            params.append(end)
+        where = f' WHERE {" AND ".join(clauses)}' if clauses else ''
+        return self.query(f'SELECT * FROM {table}{where} ORDER BY time',
+                          tuple(params))
+
+    def received_data(self, host: str = None, start: int = None,
+                      end: int = None, from_mac: str = None) \
+                      -> List[sqlite3.Row]:
+        """
+        Frames recibidos por los hosts.
+
+        Parameters
+        ----------
+        host : str, optional
+            Nombre del host.
+        start, end : int, optional
+            Intervalo de tiempo (incluyendo los extremos).
+        from_mac : str, optional
+            Mac origen en hexadecimal (por ejemplo ``'00A1'``).
+
+        Returns
+        -------
+        List[sqlite3.Row]
+            Filas con las columnas ``time``, ``host``, ``from_mac``,
+            ``data`` y ``error``, ordenadas por tiempo.
+        """
+
+        return self._select('received_data', start, end, [
+            ('host = ?', host),
+            ('from_mac = ?', from_mac),
+        ])
+
+    def received_payloads(self, host: str = None, start: int = None,
+                          end: int = None, from_ip: str = None) \
+                          -> List[sqlite3.Row]:
+        """
+        Paquetes IP recibidos por los hosts.
+
+        Parameters
+        ----------
+        host : str, optional
+            Nombre del host.
+        start, end : int, optional
+            Intervalo de tiempo (incluyendo los extremos).
+        from_ip : str, optional
+            IP origen.
+
+        Returns
+        -------
+        List[sqlite3.Row]
+            Filas con las columnas ``time``, ``host``, ``from_ip`` y
+            ``payload``, ordenadas por tiempo.
+        """
+
+        return self._select('received_payloads', start, end, [
+            ('host = ?', host),
+            ('from_ip = ?', None if from_ip is None else str(from_ip)),
+        ])
+
+    def frames(self, device: str = None, start: int = None, end: int = None,
+               mac: str = None, event: str = None) -> List[sqlite3.Row]:
+        """
+        Frames enviados y recibidos por los dispositivos.
+
+        Parameters
+        ----------
+        device : str, optional
+            Nombre del dispositivo.
+        start, end : int, optional
+            Intervalo de tiempo (incluyendo los extremos).
+        mac : str, optional
+            Mac en hexadecimal, origen o destino del frame.
+        event : str, optional
+            ``'sent'`` o ``'received'``.
+
+        Returns
+        -------
+        List[sqlite3.Row]
+            Filas con las columnas ``time``, ``device``, ``port``,
+            ``event``, ``from_mac``, ``to_mac`` y ``data``, ordenadas por
+            tiempo.
+        """
+
+        return self._select('frames', start, end, [
+            ('device = ?', device),
+            ('event = ?', event),
+            ('(from_mac = ? OR to_mac = ?)', mac),
+        ])
+
+    def port_logs(self, device: str = None, start: int = None,
+                  end: int = None) -> List[sqlite3.Row]:
+        """
+        Valores enviados y recibidos por los puertos de los dispositivos.
+
+        Parameters
+        ----------
+        device : str, optional
+            Nombre del dispositivo.
+        start, end : int, optional
+            Intervalo de tiempo (incluyendo los extremos).
+
+        Returns
+        -------
+        List[sqlite3.Row]
+            Filas con las columnas ``time``, ``device``, ``port``,
+            ``received`` y ``sent``, ordenadas por tiempo.
+        """
+
+        return self._select('port_logs', start, end, [('device = ?', device)])
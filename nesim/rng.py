@@ -0,0 +1,45 @@
+"""
+Números aleatorios de los dispositivos.
+
+Por defecto se usa el generador global del módulo ``random``, por lo que
+``random.seed`` hace reproducibles las simulaciones. Durante las
+actualizaciones en paralelo (ver ``nesim.parallel``) cada dispositivo usa
+su propio generador, de forma que los números que obtiene no dependen del
+orden en que se ejecutan los hilos.
+"""
+
+import random as _random
+import threading
+
+_local = threading.local()
+
+
+def use(generator: _random.Random = None):
+    """
+    Cambia el generador usado en el hilo actual.
+
+    Parameters
+    ----------
+    generator : random.Random, optional
+        Generador a usar. Con ``None`` se vuelve a usar el generador global.
+    """
+
+    _local.generator = generator
+
+
+def random() -> float:
+    """float : Número aleatorio en ``[0, 1)``."""
+
+    generator = getattr(_local, 'generator', None)
+    if generator is None:
+        return _random.random()
+    return generator.random()
+
+
+def randint(a: int, b: int) -> int:
+    """int : Entero aleatorio en ``[a, b]``."""
+
+    generator = getattr(_local, 'generator', None)
+    if generator is None:
+        return _random.randint(a, b)
+    return generator.randint(a, b)
@@ -1,12 +1,29 @@
+import heapq
+import logging
 from io import UnsupportedOperation
+from time import monotonic
 from nesim.devices.ip_packet_sender import IPPacketSender
 from nesim.devices.router import Route, Router
 from nesim.ip import IP
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Tuple, Union
 from nesim.devices.switch import Switch
 from nesim.devices.hub import Hub
 from nesim.devices import Device, Duplex, Host
+from nesim.devices.send_receiver import DROP_POLICIES, SendReceiver
+from nesim.breakpoints import BreakEvent, Breakpoint
+from nesim.flows import FlowTracer
+from nesim.memory import MemoryReporter
+from nesim.metrics import NetMetrics
+import nesim.logfiles as logfiles
+import nesim.topology as topology
 import nesim.utils as utils
+from pathlib import Path
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+_logger = logging.getLogger(__name__)
 
 
 class NetSimulation():
@@ -18,33 +35,269 @@ class NetSimulation():
     output_path : str
         Ruta donde se guardarán los logs de la simulación al finalizar.
         la misma. (Por defecto es ``output``).
+    metrics_interval : int, optional
+        Si se especifica, se recolectan métricas de la simulación y cada
+        ``metrics_interval`` milisegundos simulados se escribe una
+        instantánea de las mismas en ``metrics.prom`` (formato de texto de
+        Prometheus) dentro de ``output_path``.
+    summary_only : bool, optional
+        Si es ``True`` no se registran ni se guardan los logs de cada ciclo
+        de los dispositivos, no se imprimen los frames enviados y recibidos
+        y al finalizar solo se guardan las métricas y los datos recibidos
+        por los hosts. Por defecto es ``False``.
+    results_db : str, optional
+        Si se especifica, los logs de los puertos, los frames enviados y
+        recibidos y los datos recibidos por los hosts se guardan en una base
+        de datos SQLite en esta ruta (se reemplaza si ya existe) en lugar de
+        en archivos de texto. Los logs de los dispositivos no se guardan en
+        memoria y la conexión se cierra en ``save_logs``.
+    prewarm : bool, optional
+        Si es ``True``, cada vez que cambia la topología (dispositivos,
+        cables o direcciones) se calculan las tablas mac de los switches y
+        las tablas ARP y se instalan en los dispositivos, evitando el
+        aprendizaje inicial (broadcasts ARPQ e inundación de los switches).
+        Por defecto es ``False``.
+    tables_path : str, optional
+        Archivo con tablas guardadas con ``save_tables`` que se instalan en
+        los dispositivos cada vez que cambia la topología.
+
+        Con ``prewarm`` o ``tables_path`` las tablas se reconstruyen en cada
+        cambio de la topología: se descartan las entradas anteriores,
+        incluidas las aprendidas durante la simulación.
+    log_compression : str, optional
+        Si es ``'gzip'`` o ``'xz'`` los logs de los dispositivos y los
+        datos recibidos por los hosts se guardan comprimidos (``.txt.gz`` o
+        ``.txt.xz``). Se pueden leer con ``nesim.logfiles.iter_rows``.
+    log_compression_level : int, optional
+        Nivel de compresión de los logs (de 0 a 9).
+    memory_interval : int, optional
+        Si se especifica, cada ``memory_interval`` milisegundos simulados
+        se mide la memoria usada por cada subsistema (logs, colas de envío,
+        buffers, datos recibidos, etc.) y por los dispositivos que más
+        memoria usan, y se añade a ``memory.csv`` dentro de
+        ``output_path``. También se activa ``tracemalloc`` durante la
+        simulación.
+    trace_flows : bool, optional
+        Si es ``True``, se sigue cada frame y paquete IP (ver
+        ``nesim.flows.FlowTracer``) y al finalizar se escriben en
+        ``output_path`` los eventos de cada uno en ``hops.csv`` y los
+        histogramas de latencia y cantidad de saltos por flujo en
+        ``flows.prom``. Por defecto es ``False``.
+    max_time : int, optional
+        Si se especifica, la simulación termina al llegar a este tiempo
+        (se ejecutan los milisegundos anteriores).
+    max_wall_time : float, optional
+        Si se especifica, la simulación termina luego de ejecutarse
+        durante estos segundos (contados desde ``load``).
+    expected_payloads : int or Dict[str, int], optional
+        Si se especifica, la simulación termina cuando los hosts reciben
+        esta cantidad de paquetes IP (los que se guardan en
+        ``<host>_payload.txt``), en total o por host (según su nombre).
+    quiescence : int, optional
+        Si se especifica, la simulación termina cuando durante esta
+        cantidad de ``signal time`` (el mayor de los cables conectados, ver
+        ``max_signal_time``) no se ejecuta ninguna instrucción ni se envía
+        ningún bit, aunque queden instrucciones para más adelante.
+    workers : int, optional
+        Si se especifica, los hosts, switches y routers se actualizan en
+        esta cantidad de hilos (ver ``nesim.parallel``). El resultado no
+        depende de la cantidad de hilos (incluido ``1``), pero no coincide
+        con el de una simulación sin ``workers`` con la misma semilla, ya
+        que cada dispositivo usa su propio generador de números aleatorios.
+        Solo se obtiene una mejora de velocidad en versiones de Python sin
+        GIL.
+
+    Attributes
+    ----------
+    max_signal_time : int
+        Mayor ``signal time`` de los cables conectados. Al terminar las
+        instrucciones y los envíos la simulación continúa este tiempo para
+        que se reciban los últimos bits.
+    end_delay : int
+        Milisegundos sin instrucciones pendientes ni dispositivos activos
+        luego de los cuales termina la simulación (``max_signal_time`` al
+        planificar la última instrucción).
+    stop_reason : str
+        Motivo por el que terminó la simulación (``None`` mientras está en
+        ejecución): ``'finished'`` (no quedan instrucciones ni envíos),
+        ``'max_time'``, ``'max_wall_time'``, ``'payloads'`` o
+        ``'quiescence'``.
+    port_index : Dict[str, Tuple[Device, int]]
+        Dispositivo e índice del puerto correspondientes a cada nombre de
+        puerto.
+    metrics : NetMetrics
+        Métricas de la simulación, ``None`` si no se recolectan.
+    results : ResultsStore
+        Base de datos con los resultados de la simulación, ``None`` si los
+        resultados se guardan en archivos de texto.
+    memory : MemoryReporter
+        Reporte de memoria de la simulación, ``None`` si no se mide.
+    flows : FlowTracer
+        Seguimiento de los frames y paquetes IP, ``None`` si no se
+        siguen.
+    parallel : ParallelUpdater
+        Actualización de los dispositivos en varios hilos, ``None`` si se
+        actualizan en el hilo principal.
+    auto_routing : bool
+        Indica si las rutas se calculan automáticamente (ver
+        ``auto_routes``).
     """
 
-    def __init__(self, output_path: str = 'output'):
+    METRICS_FILE_NAME = 'metrics.prom'
+    MEMORY_FILE_NAME = 'memory.csv'
+    HOPS_FILE_NAME = 'hops.csv'
+    FLOWS_FILE_NAME = 'flows.prom'
+
+    def __init__(self, output_path: str = 'output',
+                 metrics_interval: int = None, summary_only: bool = False,
+                 results_db: str = None, prewarm: bool = False,
+                 tables_path: str = None, memory_interval: int = None,
+                 log_compression: str = None,
+                 log_compression_level: int = None,
+                 trace_flows: bool = False, max_time: int = None,
+                 max_wall_time: float = None,
+                 expected_payloads: Union[int, Dict[str, int]] = None,
+                 quiescence: int = None, workers: int = None):
         utils.check_config()
         self.instructions = []
+        self._inst_count = 0
         self.signal_time = utils.CONFIG['signal_time']
         self.output_path = output_path
         self.inst_index = 0
         self.time = 0
         self.pending_devices = []
-        self.port_to_device: Dict[str, Device] = {}
+        self.port_index: Dict[str, Tuple[Device, int]] = {}
         self.devices: Dict[str, Device] = {}
         self.disconnected_devices: Dict[str, Device] = {}
         self.hosts: Dict[str, Host] = {}
+        self.max_signal_time = self.signal_time
         self.end_delay = self.signal_time
+        self.summary_only = summary_only
+        if log_compression is not None and \
+           log_compression not in logfiles.COMPRESSIONS:
+            raise ValueError(f'Unknown log compression {log_compression}')
+        self.log_compression = log_compression
+        self.log_compression_level = log_compression_level
+        self.metrics_interval = metrics_interval
+        self.metrics = None
+        if metrics_interval is not None or summary_only:
+            self.metrics = NetMetrics()
+        self.results = None
+        if results_db is not None:
+            from nesim.results import ResultsStore
+            self.results = ResultsStore(results_db, overwrite=True)
+        self.memory_interval = memory_interval
+        self.memory = None
+        if memory_interval is not None:
+            self.memory = MemoryReporter(
+                str(Path(output_path) / self.MEMORY_FILE_NAME))
+            self.memory.start()
+        self.flows = None
+        if trace_flows:
+            self.flows = FlowTracer(lambda: self.time)
+        self.prewarm = prewarm
+        self.auto_routing = False
+        self._loaded_tables = None
+        if tables_path is not None:
+            self.load_tables(tables_path)
+        self._topology_changed = False
+        self._breakpoints: List[Breakpoint] = []
+        self._break_event: BreakEvent = None
+        self.parallel = None
+        if workers is not None:
+            from nesim.parallel import ParallelUpdater
+            self.parallel = ParallelUpdater(workers)
+
+        self.max_time = max_time
+        self.max_wall_time = max_wall_time
+        self.expected_payloads = expected_payloads
+        self.quiescence = quiescence
+        self.stop_reason = None
+        self._idle_ticks = 0
+        self._wall_deadline = None
+        self._payloads_left: Dict[str, int] = {}
+        self._payloads_pending = None
+        self._bits_started = 0
+        self._bits_seen = 0
+        self._last_activity = 0
 
     @property
     def is_running(self):
         """
-        bool : Indica si la simulación todavía está en ejecución.
+        bool : Indica si la simulación todavía está en ejecución (ver
+        ``stop_reason``).
+        """
+
+        return self.stop_reason is None
+
+    def _check_stop(self):
+        # Every condition but the default one is O(1)
+        if self.stop_reason is not None:
+            return
+        reason = None
+        if self.max_time is not None and self.time >= self.max_time:
+            reason = 'max_time'
+        elif self._wall_deadline is not None and \
+                monotonic() >= self._wall_deadline:
+            reason = 'max_wall_time'
+        elif self._payloads_pending == 0:
+            reason = 'payloads'
+        elif self.quiescence is not None and \
+                self.time - self._last_activity >= \
+                self.quiescence * self.max_signal_time:
+            reason = 'quiescence'
+        elif not self.instructions and \
+                not any(d.is_active for d in self.devices.values()):
+            self._idle_ticks += 1
+            if self._idle_ticks >= self.end_delay:
+                reason = 'finished'
+        if reason is not None:
+            self.stop_reason = reason
+            _logger.info('Simulation stopped at %d: %s', self.time, reason)
+
+    def _bit_started(self, _):
+        self._bits_started += 1
+
+    def _payload_received(self, host: Host):
+        left = self._payloads_left
+        key = host.name if host.name in left else None
+        if left.get(key, 0) > 0:
+            left[key] -= 1
+            self._payloads_pending -= 1
+
+    def schedule(self, instruction):
         """
+        Planifica una instrucción para ser ejecutada en la simulación.
+
+        Las instrucciones con el mismo tiempo se ejecutan en el orden en
+        que fueron planificadas. Una instrucción planificada para el tiempo
+        actual luego de ejecutarse las instrucciones de ese tiempo (por
+        ejemplo desde un callback de un dispositivo) se ejecuta al comenzar
+        el siguiente milisegundo.
+
+        Parameters
+        ----------
+        instruction : Instruction
+            Instrucción a planificar.
+
+        Raises
+        ------
+        ValueError
+            Si el tiempo de la instrucción ya pasó.
+        """
+
+        if instruction.time < self.time:
+            raise ValueError(
+                f'Can not schedule an instruction at time {instruction.time} '
+                f'(current time is {self.time})')
 
-        device_sending = any([d.is_active for d in self.devices.values()])
-        running = self.instructions or device_sending
-        if not running:
-            self.end_delay -= 1
-        return self.end_delay > 0
+        heapq.heappush(self.instructions,
+                       (instruction.time, self._inst_count, instruction))
+        self._inst_count += 1
+        self.end_delay = self.max_signal_time
+        self._idle_ticks = 0
+        if self.stop_reason == 'finished':
+            self.stop_reason = None
 
     def add_device(self, device: Device):
         """
@@ -62,13 +315,38 @@ class NetSimulation():
 
         self.devices[device.name] = device
 
+        if self.summary_only:
+            device.logs_enabled = False
+        device.log_compression = self.log_compression
+        device.log_compression_level = self.log_compression_level
+        if self.parallel is not None:
+            from nesim.parallel import defer_callbacks
+            defer_callbacks(device)
+        if self.metrics is not None:
+            self.metrics.attach(device)
+        if self.results is not None:
+            self.results.attach(device)
+            device.keep_logs = False
+        if self.flows is not None:
+            self.flows.attach(device)
+        for breakpoint in self._breakpoints:
+            breakpoint.attach(device)
+        if self.quiescence is not None:
+            for send_receiver in device.ports:
+                if isinstance(send_receiver, SendReceiver):
+                    send_receiver.on_send.append(self._bit_started)
+        if self.expected_payloads is not None and isinstance(device, Host):
+            device.on_payload_received.append(
+                lambda *_: self._payload_received(device))
+
         if isinstance(device, Host):
             self.hosts[device.name] = device
 
-        for port in device.ports.keys():
-            self.port_to_device[port] = device
+        for index, port in enumerate(device.port_names):
+            self.port_index[port] = (device, index)
+        self._topology_changed = True
 
-    def connect(self, port1, port2):
+    def connect(self, port1, port2, signal_time: int = None):
         """
         Conecta dos puertos mediante un cable.
 
@@ -76,16 +354,23 @@ class NetSimulation():
         ----------
         port1, port2 : str
             Nombres de los puertos a conectar.
+        signal_time : int, optional
+            Tiempo que debe estar cada bit en transmisión en el cable (la
+            velocidad del enlace). Por defecto es el ``signal time`` de la
+            simulación.
         """
 
-        if port1 not in self.port_to_device.keys():
+        if signal_time is not None and signal_time <= 0:
+            raise ValueError('The signal time of a link must be positive')
+
+        if port1 not in self.port_index:
             raise ValueError(f'Unknown port {port1}')
 
-        if port2 not in self.port_to_device.keys():
+        if port2 not in self.port_index:
             raise ValueError(f'Unknown port {port2}')
 
-        dev1 = self.port_to_device[port1]
-        dev2 = self.port_to_device[port2]
+        dev1, index1 = self.port_index[port1]
+        dev2, index2 = self.port_index[port2]
 
         if dev1.name in self.disconnected_devices.keys():
             self.disconnected_devices.pop(dev1.name)
@@ -95,11 +380,14 @@ class NetSimulation():
             self.add_device(dev2)
 
         is_simple = isinstance(dev1, Hub) or isinstance(dev2, Hub)
-        cab = Duplex(simple=is_simple)
+        cab = Duplex(simple=is_simple, signal_time=signal_time)
+        if signal_time is not None:
+            self.max_signal_time = max(self.max_signal_time, signal_time)
         dev1.sim_time = self.time
         dev2.sim_time = self.time
-        self.port_to_device[port1].connect(cab.head_1, port1)
-        self.port_to_device[port2].connect(cab.head_2, port2)
+        dev1.connect(cab.head_1, index1)
+        dev2.connect(cab.head_2, index2)
+        self._topology_changed = True
 
     def send(self, host_name: str, data: List[int],
              package_size: int = 8):
@@ -189,18 +477,23 @@ class NetSimulation():
               route: Route = None):
         """
         Ejecuta una de las acciones realcionadas con las rutas: ``add``,
-        ``remove``, ``reset``
+        ``remove``, ``reset``, ``auto``
 
         Parameters
         ----------
         device_name : str
-            Nombre del dispositivo al que se le ejecuta la acción.
+            Nombre del dispositivo al que se le ejecuta la acción (se ignora
+            en la acción ``auto``, que afecta a todos los routers).
         action : str, optional
             Acción a ejecutar.
         route : Route, optional
             Ruta a añadir o eliminar.
         """
 
+        if action == 'auto':
+            self.auto_routes()
+            return
+
         router: Router = self.devices[device_name]
         if action == 'add':
             router.add_route(route)
@@ -209,6 +502,49 @@ class NetSimulation():
         else:
             router.reset_routes()
 
+    def set_queue(self, target: str, capacity: int, unit: str = 'frames',
+                  policy: str = 'tail'):
+        """
+        Acota la cola de envío de un puerto o de todos los puertos de un
+        dispositivo.
+
+        Parameters
+        ----------
+        target : str
+            Nombre del puerto o del dispositivo.
+        capacity : int
+            Capacidad de la cola.
+        unit : str, optional
+            Unidad de la capacidad: ``'frames'`` (por defecto) o ``'bits'``.
+        policy : str, optional
+            Política de descarte: ``'tail'`` (por defecto) o ``'red'``.
+
+        Raises
+        ------
+        ValueError
+            Si el puerto o dispositivo no existe o la política es inválida.
+        UnsupportedOperation
+            Si el dispositivo no tiene colas de envío (hubs).
+        """
+
+        if policy not in DROP_POLICIES:
+            raise ValueError(f'Unknown drop policy {policy}')
+
+        if target in self.port_index:
+            device, index = self.port_index[target]
+            ports = [device.ports[index]]
+        elif target in self.devices:
+            device = self.devices[target]
+            ports = device.ports
+        else:
+            raise ValueError(f'Unknown port or device {target}')
+
+        for send_receiver in ports:
+            if not isinstance(send_receiver, SendReceiver):
+                raise UnsupportedOperation(
+                    f'Can not set a queue to {device.name}')
+            send_receiver.set_queue(capacity, unit, DROP_POLICIES[policy]())
+
     def disconnect(self, port: str):
         """
         Desconecta un puerto.
@@ -219,11 +555,12 @@ class NetSimulation():
             Puerto a desconectar.
         """
 
-        if port not in self.port_to_device.keys():
+        if port not in self.port_index:
             raise ValueError(f'Unknown port {port}')
 
-        dev = self.port_to_device[port]
-        dev.disconnect(port)
+        dev, index = self.port_index[port]
+        dev.disconnect(index)
+        self._topology_changed = True
 
         if dev.name in self.hosts.keys():
             self.hosts.pop(dev.name)
@@ -232,7 +569,7 @@ class NetSimulation():
             return
 
         if isinstance(dev, Hub):
-            for cable in dev.ports.values():
+            for cable in dev.ports:
                 if cable is not None:
                     break
             else:
@@ -240,13 +577,46 @@ class NetSimulation():
                 self.disconnected_devices[dev.name] = dev
 
         if isinstance(dev, Switch):
-            for send_receiver in dev.ports.values():
+            for send_receiver in dev.ports:
                 if send_receiver.cable_head is not None:
                     break
             else:
                 self.devices.pop(dev.name)
                 self.disconnected_devices[dev.name] = dev
 
+    def load(self, instructions):
+        """
+        Prepara la simulación para ejecutar una lista de instrucciones
+        desde el tiempo 0, sin comenzar a ejecutarla.
+
+        Luego se puede avanzar con ``step`` o ``run_until`` y guardar los
+        resultados con ``save_logs``.
+
+        Parameters
+        ----------
+        instructions : List[Instruction]
+            Lista de instrucciones a ejecutar en la simulación.
+        """
+
+        self.instructions = []
+        self.time = 0
+        self.stop_reason = None
+        self._idle_ticks = 0
+        self._last_activity = 0
+        self._bits_seen = self._bits_started
+        self._wall_deadline = None
+        if self.max_wall_time is not None:
+            self._wall_deadline = monotonic() + self.max_wall_time
+        if self.expected_payloads is not None:
+            expected = self.expected_payloads
+            if not isinstance(expected, dict):
+                expected = {None: expected}
+            self._payloads_left = dict(expected)
+            self._payloads_pending = sum(expected.values())
+        for instr in instructions:
+            self.schedule(instr)
+        self._check_stop()
+
     def start(self, instructions):
         """
         Comienza la simulación dada una lista de instrucciones.
@@ -257,12 +627,180 @@ class NetSimulation():
             Lista de instrucciones a ejecutar en la simulación.
         """
 
-        self.instructions = instructions
-        self.time = 0
+        self.load(instructions)
         while self.is_running:
             self.update()
-        for device in self.devices.values():
-            device.save_log(self.output_path)
+        self.save_logs()
+
+    def step(self, ticks: int = 1) -> int:
+        """
+        Ejecuta ``ticks`` milisegundos de la simulación (menos si la
+        simulación termina antes).
+
+        Parameters
+        ----------
+        ticks : int, optional
+            Cantidad de milisegundos a ejecutar, por defecto 1.
+
+        Returns
+        -------
+        int
+            Cantidad de milisegundos ejecutados.
+        """
+
+        done = 0
+        while done < ticks and self.is_running:
+            self.update()
+            done += 1
+        return done
+
+    def run_until(self, *breakpoints: Breakpoint,
+                  max_ticks: int = None) -> BreakEvent:
+        """
+        Ejecuta la simulación hasta que se active alguno de los puntos de
+        parada (ver ``nesim.breakpoints``), hasta que termine o hasta
+        ejecutar ``max_ticks`` milisegundos.
+
+        Los puntos de parada se conectan a los callbacks de los
+        dispositivos mientras dura la ejecución, por lo que solo se evalúan
+        cuando ocurre su evento. La simulación se detiene al terminar el
+        milisegundo en que se activó alguno.
+
+        Parameters
+        ----------
+        *breakpoints : Breakpoint
+            Puntos de parada.
+        max_ticks : int, optional
+            Máxima cantidad de milisegundos a ejecutar.
+
+        Returns
+        -------
+        BreakEvent
+            Evento que detuvo la simulación (``None`` si terminó o se
+            alcanzó ``max_ticks``).
+        """
+
+        devices = list(self.devices.values()) + \
+            list(self.disconnected_devices.values())
+        for breakpoint in breakpoints:
+            breakpoint.clock = lambda: self.time
+            breakpoint.on_hit.append(self._on_break)
+            for device in devices:
+                breakpoint.attach(device)
+            self._breakpoints.append(breakpoint)
+
+        self._break_event = None
+        ticks = 0
+        try:
+            while self._break_event is None and \
+                  (max_ticks is None or ticks < max_ticks) and \
+                  self.is_running:
+                self.update()
+                ticks += 1
+        finally:
+            for breakpoint in breakpoints:
+                breakpoint.detach()
+                breakpoint.on_hit.remove(self._on_break)
+                self._breakpoints.remove(breakpoint)
+        return self._break_event
+
+    def _on_break(self, event: BreakEvent):
+        if self._break_event is None:
+            self._break_event = event
+
+    async def start_async(self, instructions=None,
+                          queue: 'asyncio.Queue' = None,
+                          tick_slice: int = 1000):
+        """
+        Ejecuta la simulación dentro de un ciclo de eventos de ``asyncio``.
+
+        La simulación avanza en bloques de ``tick_slice`` milisegundos
+        simulados y cede el control al ciclo de eventos entre un bloque y
+        el siguiente. Mientras tanto se pueden añadir nuevas instrucciones
+        (o listas de instrucciones) a ``queue``; las que tengan un tiempo
+        ya pasado se ejecutan en el tiempo actual de la simulación.
+
+        Si se da una cola, la simulación espera por nuevas instrucciones
+        cuando no tiene nada que hacer y termina cuando recibe ``None``
+        por la misma o cuando se cumple otra condición de parada (ver
+        ``stop_reason``).
+
+        Parameters
+        ----------
+        instructions : List[Instruction], optional
+            Instrucciones iniciales de la simulación.
+        queue : asyncio.Queue, optional
+            Cola de la cual se leen nuevas instrucciones.
+        tick_slice : int, optional
+            Cantidad de milisegundos simulados entre cada cesión del
+            control, por defecto 1000.
+        """
+
+        import asyncio
+
+        if tick_slice <= 0:
+            raise ValueError('tick_slice must be positive')
+
+        self.load(instructions or [])
+
+        queue_open = queue is not None
+        while True:
+            while queue_open and not queue.empty():
+                queue_open = self._inject(queue.get_nowait())
+
+            ticks = 0
+            while ticks < tick_slice and self.is_running:
+                self.update()
+                ticks += 1
+
+            if ticks == tick_slice:
+                await asyncio.sleep(0)
+            elif queue_open and self.stop_reason == 'finished':
+                queue_open = self._inject(await queue.get())
+            else:
+                break
+        self.save_logs()
+
+    def _inject(self, item) -> bool:
+        if item is None:
+            return False
+        if not isinstance(item, list):
+            item = [item]
+        for instr in item:
+            instr.time = max(instr.time, self.time)
+            self.schedule(instr)
+        return True
+
+    def save_logs(self):
+        """
+        Guarda los logs de todos los dispositivos en ``output_path`` (o en
+        la base de datos de resultados si se especificó ``results_db``).
+        """
+
+        if self.results is not None:
+            self.results.close()
+        else:
+            for device in self.devices.values():
+                device.save_log(self.output_path)
+        if self.metrics is not None:
+            self.write_metrics()
+        if self.memory is not None:
+            self.memory.sample(self)
+            self.memory.stop()
+        if self.flows is not None:
+            self.flows.write(self.output_path, self.HOPS_FILE_NAME,
+                             self.FLOWS_FILE_NAME)
+        if self.parallel is not None:
+            self.parallel.shutdown()
+
+    def write_metrics(self):
+        """
+        Escribe una instantánea de las métricas de la simulación en
+        ``output_path``.
+        """
+
+        self.metrics.sample(self.devices.values(), self.time)
+        self.metrics.write(str(Path(self.output_path) / self.METRICS_FILE_NAME))
 
     def assign_mac_addres(self, device_name, mac, interface):
         """
@@ -277,6 +815,7 @@ class NetSimulation():
         """
 
         self.devices[device_name].mac_addrs[interface] = mac
+        self._topology_changed = True
 
     def assign_ip_addres(self, device_name, ip: IP, mask: IP, interface: int):
         """
@@ -296,25 +835,69 @@ class NetSimulation():
 
         device.ips[interface] = ip
         device.masks[interface] = mask
+        self._topology_changed = True
 
-    def update(self):
+    def auto_routes(self):
         """
-        Ejecuta un ciclo de la simulación actualizando el estado de la
-        misma.
+        Calcula las rutas de todos los routers y hosts según los caminos más
+        cortos entre las redes de sus interfaces y reemplaza sus tablas de
+        rutas.
 
-        Esta función se ejecuta una vez por cada milisegundo simulado.
+        A partir de este momento las rutas se vuelven a calcular cada vez
+        que cambia la topología (por ejemplo, luego de un ``disconnect``).
         """
 
-        current_insts = []
-        while self.instructions and self.time == self.instructions[0].time:
-            current_insts.append(self.instructions.pop(0))
+        self.auto_routing = True
+        topology.install_routes(
+            self.devices, topology.shortest_path_routes(self.devices.values()))
 
-        for instr in current_insts:
-            instr.execute(self)
+    def prewarm_tables(self, clear: bool = True):
+        """
+        Calcula a partir de la topología actual las tablas mac de los
+        switches y las tablas ARP de los dispositivos y las instala en los
+        mismos.
 
-        for device in self.devices.values():
-            device.reset()
+        Parameters
+        ----------
+        clear : bool, optional
+            Si es ``True`` (por defecto) se descartan antes las entradas
+            existentes, de forma que las tablas quedan iguales a las
+            calculadas.
+        """
+
+        devices = list(self.devices.values())
+        topology.install_tables(self.devices, topology.mac_tables(devices),
+                                topology.ip_tables(devices), clear)
+
+    def save_tables(self, path: str):
+        """
+        Guarda las tablas mac y ARP actuales de los dispositivos en un
+        archivo JSON para ser cargadas en otra simulación.
+
+        Parameters
+        ----------
+        path : str
+            Ruta del archivo.
+        """
+
+        topology.save_tables(path, self.devices.values())
 
+    def load_tables(self, path: str):
+        """
+        Carga tablas guardadas con ``save_tables``. Las tablas se instalan
+        en los dispositivos (según su nombre) cada vez que cambia la
+        topología.
+
+        Parameters
+        ----------
+        path : str
+            Ruta del archivo.
+        """
+
+        self._loaded_tables = topology.load_tables(path)
+        self._topology_changed = True
+
+    def _update_serial(self):
         for host in self.hosts.values():
             host.update(self.time)
 
@@ -322,10 +905,7 @@ class NetSimulation():
             if isinstance(dev, Switch) or type(dev) == Router:
                 dev.update(self.time)
 
-        for _ in range(len(self.devices)):
-            for device in self.devices.values():
-                if isinstance(device, Hub):
-                    device.update(self.time)
+        self._update_hubs()
 
         for dev in self.devices.values():
             if isinstance(dev, Switch) or type(dev) == Router:
@@ -334,4 +914,69 @@ class NetSimulation():
         for host in self.hosts.values():
             host.receive()
 
+    def _update_parallel(self):
+        hosts = list(self.hosts.values())
+        forwarders = [dev for dev in self.devices.values()
+                      if isinstance(dev, Switch) or type(dev) == Router]
+
+        self.parallel.run('hosts', hosts, 'update', self.time)
+        self.parallel.run('forwarders', forwarders, 'update', self.time)
+        self._update_hubs()
+        self.parallel.run('forwarders', forwarders, 'receive')
+        self.parallel.run('hosts', hosts, 'receive')
+
+    def _update_hubs(self):
+        for _ in range(len(self.devices)):
+            for device in self.devices.values():
+                if isinstance(device, Hub):
+                    device.update(self.time)
+
+    def update(self):
+        """
+        Ejecuta un ciclo de la simulación actualizando el estado de la
+        misma.
+
+        Esta función se ejecuta una vez por cada milisegundo simulado.
+        """
+
+        while self.instructions and self.instructions[0][0] <= self.time:
+            _, _, instr = heapq.heappop(self.instructions)
+            instr.execute(self)
+            self._last_activity = self.time
+
+        if self._topology_changed:
+            self._topology_changed = False
+            if self._loaded_tables is not None:
+                topology.install_tables(self.devices, *self._loaded_tables,
+                                        clear=True)
+            if self.prewarm:
+                self.prewarm_tables(clear=self._loaded_tables is None)
+            if self.auto_routing:
+                self.auto_routes()
+            if self.flows is not None:
+                self.flows.set_links(topology.links(self.devices.values()))
+            if self.parallel is not None:
+                self.parallel.invalidate()
+
+        for device in self.devices.values():
+            device.reset()
+
+        if self.parallel is not None:
+            self._update_parallel()
+        else:
+            self._update_serial()
+
+        if self.metrics_interval is not None and \
+           self.time % self.metrics_interval == 0:
+            self.write_metrics()
+
+        if self.memory_interval is not None and \
+           self.time % self.memory_interval == 0:
+            self.memory.sample(self)
+
+        if self._bits_started != self._bits_seen:
+            self._bits_seen = self._bits_started
+            self._last_activity = self.time
+
         self.time += 1
+        self._check_stop()
@@ -0,0 +1,391 @@
+"""
+Análisis de la topología de una simulación.
+
+Permite calcular, a partir de los cables conectados y de las direcciones
+asignadas, las tablas que los dispositivos aprenderían durante la
+simulación (tablas mac de los switches y tablas ARP) para instalarlas antes
+de comenzar, y las rutas de los routers según los caminos más cortos.
+"""
+
+import json
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+from nesim.devices.device import Device
+from nesim.devices.frame_sender import FrameSender
+from nesim.devices.hub import Hub
+from nesim.devices.ip_packet_sender import IPPacketSender
+from nesim.devices.router import Route, Router
+from nesim.devices.host import Host
+from nesim.devices.switch import Switch
+from nesim.devices.utils import (
+    from_bit_data_to_hex,
+    from_bit_data_to_number,
+    from_number_to_bit_data
+)
+from nesim.ip import IP, IPNetwork
+
+Port = Tuple[Device, int]
+
+
+def _cable_head(device: Device, port: int):
+    if isinstance(device, Hub):
+        return device.ports[port]
+    send_receiver = device.ports[port]
+    return send_receiver.cable_head if send_receiver is not None else None
+
+
+def links(devices: Iterable[Device]) -> Dict[Port, Port]:
+    """
+    Obtiene los puertos unidos por cada cable.
+
+    Parameters
+    ----------
+    devices : Iterable[Device]
+        Dispositivos de la simulación.
+
+    Returns
+    -------
+    Dict[Port, Port]
+        Puerto (dispositivo e índice) del otro extremo del cable conectado a
+        cada puerto.
+    """
+
+    ends: Dict[frozenset, List[Port]] = {}
+    for device in devices:
+        for port in range(len(device.ports)):
+            head = _cable_head(device, port)
+            if head is not None:
+                key = frozenset((id(head.send_cable), id(head.receive_cable)))
+                ends.setdefault(key, []).append((device, port))
+
+    peers = {}
+    for ports in ends.values():
+        if len(ports) == 2:
+            peers[ports[0]] = ports[1]
+            peers[ports[1]] = ports[0]
+    return peers
+
+
+def _reachable(device: Device, ports: Iterable[int],
+               peers: Dict[Port, Port]) -> Iterator[Tuple[Port, int]]:
+    """
+    Recorre a lo ancho la red de capa 2 (hubs y switches) a partir de
+    algunos puertos de un dispositivo.
+
+    Devuelve cada interfaz de un dispositivo final (hosts y routers)
+    alcanzada junto con el puerto de ``device`` por el que se alcanzó
+    primero (el más cercano).
+    """
+
+    visited = {id(device)}
+    seen = set()
+    queue = deque((peers.get((device, port)), port) for port in ports)
+    while queue:
+        peer, origin = queue.popleft()
+        if peer is None:
+            continue
+        dev, index = peer
+        if isinstance(dev, (Hub, Switch)):
+            if id(dev) in visited:
+                continue
+            visited.add(id(dev))
+            queue.extend((peers.get((dev, i)), origin)
+                         for i in range(len(dev.ports)) if i != index)
+        elif isinstance(dev, FrameSender) and (id(dev), index) not in seen:
+            seen.add((id(dev), index))
+            yield peer, origin
+
+
+def mac_tables(devices: Iterable[Device]) -> Dict[str, Dict[int, int]]:
+    """
+    Calcula la tabla mac de cada switch.
+
+    Parameters
+    ----------
+    devices : Iterable[Device]
+        Dispositivos de la simulación.
+
+    Returns
+    -------
+    Dict[str, Dict[int, int]]
+        Por cada switch, el índice del puerto por el que se alcanza cada
+        dirección mac.
+    """
+
+    devices = list(devices)
+    peers = links(devices)
+    tables = {}
+    for device in devices:
+        if not isinstance(device, Switch):
+            continue
+        table = tables[device.name] = {}
+        ports = range(len(device.ports))
+        for (endpoint, index), origin in _reachable(device, ports, peers):
+            mac = endpoint.mac_addrs.get(index + 1)
+            if mac is not None:
+                table.setdefault(from_bit_data_to_number(mac), origin)
+    return tables
+
+
+def ip_tables(devices: Iterable[Device]) -> Dict[str, Dict[IP, List[int]]]:
+    """
+    Calcula la tabla ARP de cada dispositivo capaz de enviar paquetes IP.
+
+    Parameters
+    ----------
+    devices : Iterable[Device]
+        Dispositivos de la simulación.
+
+    Returns
+    -------
+    Dict[str, Dict[IP, List[int]]]
+        Por cada dispositivo, la dirección mac de cada IP alcanzable sin
+        pasar por un router.
+    """
+
+    devices = list(devices)
+    peers = links(devices)
+    tables = {}
+    for device in devices:
+        if not isinstance(device, IPPacketSender):
+            continue
+        table = tables[device.name] = {}
+        for (endpoint, index), _ in _reachable(
+                device, range(len(device.ports)), peers):
+            if not isinstance(endpoint, IPPacketSender):
+                continue
+            ip = endpoint.ips.get(index + 1)
+            mac = endpoint.mac_addrs.get(index + 1)
+            if ip is not None and mac is not None:
+                table.setdefault(ip, list(mac))
+    return tables
+
+
+def install_tables(devices: Dict[str, Device],
+                   mac: Dict[str, Dict[int, int]],
+                   ip: Dict[str, Dict[IP, List[int]]],
+                   clear: bool = False):
+    """
+    Añade las entradas dadas a las tablas de los dispositivos.
+
+    Los dispositivos que no existan y las entradas de las tablas mac que
+    apuntan a puertos sin cable se ignoran.
+
+    Parameters
+    ----------
+    devices : Dict[str, Device]
+        Dispositivos de la simulación según su nombre.
+    mac : Dict[str, Dict[int, int]]
+        Entradas de las tablas mac de los switches.
+    ip : Dict[str, Dict[IP, List[int]]]
+        Entradas de las tablas ARP.
+    clear : bool, optional
+        Si es ``True`` se vacían antes las tablas mac y ARP de todos los
+        dispositivos, de forma que no queden entradas de una topología
+        anterior. Por defecto es ``False``.
+    """
+
+    if clear:
+        for device in devices.values():
+            if isinstance(device, Switch):
+                device.mac_table.clear()
+            if isinstance(device, IPPacketSender):
+                device.ip_table.clear()
+
+    for name, table in mac.items():
+        device = devices.get(name)
+        if isinstance(device, Switch):
+            device.mac_table.update(
+                (addr, port) for addr, port in table.items()
+                if device.ports[port].cable_head is not None)
+    for name, table in ip.items():
+        device = devices.get(name)
+        if isinstance(device, IPPacketSender):
+            device.ip_table.update(table)
+
+
+def shortest_path_routes(devices: Iterable[Device]) \
+        -> Dict[str, List[Route]]:
+    """
+    Calcula las rutas de cada router (y host) según los caminos más cortos
+    (en cantidad de saltos) entre las redes de sus interfaces.
+
+    Dos routers son vecinos si tienen interfaces en la misma red y estas
+    están conectadas mediante cables, hubs o switches. Los hosts no
+    reenvían paquetes, por lo que no se usan como intermediarios. Si todas
+    las rutas a redes no conectadas directamente de un dispositivo usan el
+    mismo gateway se reemplazan por una ruta por defecto.
+
+    Parameters
+    ----------
+    devices : Iterable[Device]
+        Dispositivos de la simulación.
+
+    Returns
+    -------
+    Dict[str, List[Route]]
+        Rutas de cada router.
+    """
+
+    devices = list(devices)
+    peers = links(devices)
+    routers = [d for d in devices if isinstance(d, Router)]
+
+    # Connected interfaces and their networks
+    networks: Dict[str, Dict[int, IPNetwork]] = {}
+    members: Dict[IPNetwork, List[Router]] = {}
+    for router in routers:
+        nets = networks[router.name] = {}
+        for interface, ip in sorted(router.ips.items()):
+            mask = router.masks.get(interface)
+            if mask is None or _cable_head(router, interface - 1) is None:
+                continue
+            network = IPNetwork(ip, mask)
+            nets[interface] = network
+            members.setdefault(network, []).append(router)
+
+    # Routers reachable through each interface (same network)
+    neighbors: Dict[str, List[Tuple[Router, int, IP]]] = {}
+    for router in routers:
+        adjacent = neighbors[router.name] = []
+        for interface, network in networks[router.name].items():
+            for (peer, index), _ in _reachable(router, [interface - 1],
+                                                peers):
+                peer_ip = peer.ips.get(index + 1) \
+                    if isinstance(peer, Router) else None
+                if peer_ip is not None and \
+                   networks[peer.name].get(index + 1) == network:
+                    adjacent.append((peer, interface, peer_ip))
+
+    zero = IP(0, 0, 0, 0)
+    tables = {}
+    for router in routers:
+        direct = networks[router.name]
+        routes = [Route(net.network, net.mask, zero, interface)
+                  for interface, net in direct.items()]
+
+        # Breadth-first search storing the first hop of each path
+        first_hop = {router.name: None}
+        distance = {router.name: 0}
+        queue = deque([router])
+        while queue:
+            current = queue.popleft()
+            if current is not router and isinstance(current, Host):
+                continue
+            for peer, interface, gateway in neighbors[current.name]:
+                if peer.name not in first_hop:
+                    first_hop[peer.name] = first_hop[current.name] or \
+                                           (gateway, interface)
+                    distance[peer.name] = distance[current.name] + 1
+                    queue.append(peer)
+
+        direct_nets = set(direct.values())
+        remote = []
+        for network, network_members in members.items():
+            if network in direct_nets:
+                continue
+            reached = [m.name for m in network_members
+                       if first_hop.get(m.name) is not None]
+            if reached:
+                nearest = min(reached, key=distance.get)
+                gateway, interface = first_hop[nearest]
+                remote.append(Route(network.network, network.mask,
+                                    gateway, interface))
+
+        hops = {(r.gateway, r.interface) for r in remote}
+        if len(hops) == 1:
+            gateway, interface = hops.pop()
+            remote = [Route(zero, zero, gateway, interface)]
+        tables[router.name] = routes + remote
+    return tables
+
+
+def install_routes(devices: Dict[str, Device],
+                   routes: Dict[str, List[Route]]):
+    """
+    Reemplaza las rutas de los routers dados.
+
+    Parameters
+    ----------
+    devices : Dict[str, Device]
+        Dispositivos de la simulación según su nombre.
+    routes : Dict[str, List[Route]]
+        Rutas de cada router.
+    """
+
+    for name, router_routes in routes.items():
+        device = devices.get(name)
+        if isinstance(device, Router):
+            device.set_routes(router_routes)
+
+
+def _mac_hex(mac: int) -> str:
+    return from_bit_data_to_hex(from_number_to_bit_data(mac, 16))
+
+
+def save_tables(path: str, devices: Iterable[Device]):
+    """
+    Guarda las tablas mac y ARP actuales de los dispositivos en un archivo
+    JSON.
+
+    Parameters
+    ----------
+    path : str
+        Ruta del archivo.
+    devices : Iterable[Device]
+        Dispositivos cuyas tablas se guardan.
+    """
+
+    data = {'mac_tables': {}, 'ip_tables': {}}
+    for device in devices:
+        if isinstance(device, Switch):
+            data['mac_tables'][device.name] = {
+                _mac_hex(mac): device.port_name(port)
+                for mac, port in device.mac_table.items()
+            }
+        elif isinstance(device, IPPacketSender):
+            data['ip_tables'][device.name] = {
+                str(ip): from_bit_data_to_hex(mac)
+                for ip, mac in device.ip_table.items()
+            }
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(path), 'w') as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+
+
+def load_tables(path: str) -> Tuple[Dict[str, Dict[int, int]],
+                                    Dict[str, Dict[IP, List[int]]]]:
+    """
+    Carga las tablas guardadas con ``save_tables``.
+
+    Parameters
+    ----------
+    path : str
+        Ruta del archivo.
+
+    Returns
+    -------
+    Dict[str, Dict[int, int]]
+        Tablas mac de los switches.
+    Dict[str, Dict[IP, List[int]]]
+        Tablas ARP.
+    """
+
+    with open(str(path), 'r') as file:
+        data = json.load(file)
+
+    mac = {
+        name: {int(mac_hex, 16): int(port.split('_')[-1]) - 1
+               for mac_hex, port in table.items()}
+        for name, table in data.get('mac_tables', {}).items()
+    }
+    ip = {
+        name: {IP.from_str(ip_str):
+               from_number_to_bit_data(int(mac_hex, 16), 16)
+               for ip_str, mac_hex in table.items()}
+        for name, table in data.get('ip_tables', {}).items()
+    }
+    return mac, ip
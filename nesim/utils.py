@@ -1,33 +1,54 @@
 from pathlib import Path
+from nesim.devices.error_detection import ERROR_DETECTION_ALGORITHMS
 
 CONFIG = {
     'signal_time' : 10,
     'error_detection' : 'simple_hash',
     'error_prob' : 0.001,
+    'frame_cache_size' : 1024,
 }
 
 _CONFIG_FILE_NAME = 'config.txt'
+_config_loaded = False
 
 def _set_config_val(key: str, value):
     if key == 'signal_time':
         CONFIG[key] = int(value)
     if key == 'error_detection':
+        if value not in ERROR_DETECTION_ALGORITHMS:
+            raise ValueError(f'Invalid error detection algorithm {value}. '
+                             f'Available: {", ".join(ERROR_DETECTION_ALGORITHMS)}')
         CONFIG[key] = value
     if key == 'error_prob':
         CONFIG[key] = float(value)
+    if key == 'frame_cache_size':
+        CONFIG[key] = int(value)
 
-def check_config():
-    path = Path(_CONFIG_FILE_NAME)
+def load_config(path: str = _CONFIG_FILE_NAME):
+    """
+    Carga la configuración de un archivo.
+
+    Si el archivo no existe se mantienen los valores actuales (por defecto
+    los de ``CONFIG``).
+
+    Parameters
+    ----------
+    path : str, optional
+        Ruta del archivo, por defecto ``config.txt``.
+    """
+
+    global _config_loaded
+    path = Path(path)
     if path.exists():
-        with open(_CONFIG_FILE_NAME, 'r') as file:
-            lines = file.readlines()
-            for line in lines:
-                key, value = line.split()
-                _set_config_val(key, value)
-    else:
-        with open(_CONFIG_FILE_NAME, 'w+') as file:
-            file.writelines([
-                'signal_time 10\n',
-                'error_detection simple_hash\n',
-                'error_prob 0.001',
-            ])
+        with open(str(path), 'r') as file:
+            for line in file:
+                if line.strip():
+                    key, value = line.split()
+                    _set_config_val(key, value)
+    _config_loaded = True
+
+def check_config():
+    """Carga ``config.txt`` si la configuración no se ha cargado aún."""
+
+    if not _config_loaded:
+        load_config()